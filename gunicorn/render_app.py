@@ -13,6 +13,8 @@ bind = '0.0.0.0:10000'
 
 chdir = './flask/'
 
+# Each worker process has its own session store: more than one worker needs the sessions shared,
+# i.e. SESSION_BACKEND set to 'redis' (see pyset.session_backend.RedisBackend)
 workers = 1
 threads = 1
 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+
+class AIScheduler:
+    """Plays the AI players' turns of every session, from a single background thread.
+
+    Turns wait in one heap ordered by due time (``time.monotonic``); the thread sleeps until the
+    earliest one is due, plays it through `play_turn` -- outside the scheduler's own lock, so a
+    slow turn never blocks scheduling or cancelling -- and schedules that player's next turn after
+    the delay `play_turn` returned. One thread serves every bot of every session.
+
+    Each game's turns carry the game's current *generation*: :meth:`cancel` drops its pending turns
+    and retires its generation, so a turn already being played when the game got cancelled (e.g.
+    paused, then resumed right away) doesn't schedule a second, duplicate chain of turns. A game's
+    generation is retired as well once its last chain of turns stops (game over, players removed).
+
+    :meth:`close` stops the thread for good (e.g. on app teardown); turns scheduled afterwards are
+    dropped.
+    """
+
+    def __init__(self, play_turn: Callable[[str, str], float | None], logger: logging.Logger):
+        """Initializes the AIScheduler. The thread only starts with the first scheduled turn.
+
+        Args:
+            play_turn (Callable[[str, str], float | None]): Plays one turn of (game_id,
+                player_name); returns the delay until that player's next turn, in seconds, or
+                None to stop playing it.
+            logger (logging.Logger): Logger used for turns that fail.
+        """
+        self._play_turn = play_turn
+        self._logger = logger
+
+        self._heap: list[tuple[float, int, str, str, int]] = []  # (due, tie-breaker, game_id, player_name, generation)
+        self._generations: dict[str, int] = {}  # Current generation of every game with turns scheduled
+        self._nb_chains: dict[str, int] = {}  # Chains of turns (one per scheduled player) of the current generations
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        """Returns the number of pending turns.
+
+        Returns:
+            int: Pending turns, cancelled ones excluded.
+        """
+        with self._condition:
+            return len(self._heap)
+
+    def schedule(self, game_id: str, player_name: str, delay: float) -> None:
+        """Schedules a player's turn.
+
+        Args:
+            game_id (str): Session the player is in.
+            player_name (str): AI player to play.
+            delay (float): Seconds from now until the turn.
+        """
+        with self._condition:
+            if self._closed:
+                return
+
+            generation = self._generations.setdefault(game_id, next(self._counter))
+            self._nb_chains[game_id] = self._nb_chains.get(game_id, 0) + 1
+            self._push(time.monotonic() + delay, game_id, player_name, generation)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ai-scheduler', daemon=True)
+                self._thread.start()
+
+    def cancel(self, game_id: str) -> None:
+        """Drops every pending turn of a game (paused, reset, removed...).
+
+        Args:
+            game_id (str): Session to cancel.
+        """
+        with self._condition:
+            if self._generations.pop(game_id, None) is None:
+                return
+            del self._nb_chains[game_id]
+
+            self._heap = [entry for entry in self._heap if entry[2] != game_id]
+            heapq.heapify(self._heap)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Stops the thread, once the turn it may be playing is over, dropping every pending turn. Idempotent."""
+        with self._condition:
+            self._closed = True
+            self._heap = []
+            self._generations = {}
+            self._nb_chains = {}
+            self._condition.notify()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _push(self, due: float, game_id: str, player_name: str, generation: int) -> None:
+        """Adds a turn to the heap, waking the thread up if it's now the earliest one.
+
+        Caller must hold ``_condition``.
+
+        Args:
+            due (float): ``time.monotonic`` time the turn is due at.
+            game_id (str): Session the player is in.
+            player_name (str): AI player to play.
+            generation (int): Generation of the game the turn belongs to.
+        """
+        heapq.heappush(self._heap, (due, next(self._counter), game_id, player_name, generation))
+        if self._heap[0][2] == game_id and self._heap[0][3] == player_name:
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """Thread body: plays the due turns, until closed."""
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    _ = self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._closed:
+                    return
+                _, _, game_id, player_name, generation = heapq.heappop(self._heap)
+
+            try:
+                delay = self._play_turn(game_id, player_name)
+            except Exception:
+                self._logger.exception('AI turn of %s in %s failed', player_name, game_id)
+                delay = None
+
+            with self._condition:
+                if self._generations.get(game_id) != generation:
+                    continue  # Cancelled meanwhile
+                if delay is not None:
+                    self._push(time.monotonic() + delay, game_id, player_name, generation)
+                    continue
+
+                self._nb_chains[game_id] -= 1
+                if not self._nb_chains[game_id]:
+                    del self._generations[game_id], self._nb_chains[game_id]
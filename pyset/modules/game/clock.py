@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+"""
+
+import time
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Source of "now" for the engine's timers, penalties and answer times (in seconds)."""
+
+    def now(self) -> float:
+        """Returns the current time.
+
+        Returns:
+            float: Current time, in seconds. Only differences between two readings are meaningful.
+        """
+        ...
+
+
+class WallClock:
+    """Real time, either ``time.time`` (the default) or ``time.monotonic``.
+
+    The engine only ever measures durations, so ``monotonic`` is the safer choice in production:
+    unlike wall time, it can't jump (NTP adjustments, DST, manual changes) in the middle of a
+    penalty or a pause.
+    """
+
+    __slots__ = ('_time',)
+
+    def __init__(self, monotonic: bool = False):
+        """Initializes a WallClock.
+
+        Args:
+            monotonic (bool, optional): Whether to read ``time.monotonic`` rather than
+                ``time.time``. Defaults to False.
+        """
+        self._time = time.monotonic if monotonic else time.time
+
+    def now(self) -> float:
+        """Returns the current time.
+
+        Returns:
+            float: Current time, in seconds.
+        """
+        return self._time()
+
+
+class VirtualClock:
+    """Manually advanced time, for simulations and tests: nothing ever has to sleep."""
+
+    __slots__ = ('_now',)
+
+    def __init__(self, start: float = 0.0):
+        """Initializes a VirtualClock.
+
+        Args:
+            start (float, optional): Initial time, in seconds. Defaults to 0.0.
+        """
+        self._now = start
+
+    def now(self) -> float:
+        """Returns the current (virtual) time.
+
+        Returns:
+            float: Current time, in seconds.
+        """
+        return self._now
+
+    def advance(self, seconds: float) -> float:
+        """Moves the clock forward.
+
+        Args:
+            seconds (float): Duration to skip, in seconds.
+
+        Returns:
+            float: New current time.
+        """
+        self._now = self._now + seconds
+        return self._now
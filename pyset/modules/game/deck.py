@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+"""
+
+import bisect
+import enum
+import math
+import random
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import permutations
+from typing import Any
+
+_MAX_MATERIALIZED_DECK_SIZE = 1 << 20  # Bigger decks are lazy: no per-card table is ever built (see Deck)
+
+
+class Deck:
+    """Dense, arithmetic encoding of every card of a given feature configuration.
+
+    Internally, a card is its index in ``range(rows**cols)``: the base-``rows`` digits of that
+    index (most significant first) are the card's 0-based flavors, one digit per feature. The
+    legacy "flavor int" (e.g. ``1123``: each decimal digit a 1-based flavor) is only what the API
+    exchanges with the client -- see :meth:`card_of` and :meth:`index_of`. Index order and legacy
+    int order are the same, so sorting either gives the same result.
+
+    Decks of up to ``_MAX_MATERIALIZED_DECK_SIZE`` cards keep per-card lookup tables. Bigger ones
+    (e.g. 9 flavors x 10 features, over 3 billion cards) are *lazy*: a card is decoded from its
+    index (and back) arithmetically, on demand, so building one takes constant time and memory.
+
+    A Deck never changes once built, so a single instance per feature configuration is shared by
+    every :class:`pyset.modules.game.set.Grid` of the process -- use :func:`get_deck` rather than
+    building one directly.
+    """
+
+    def __init__(self, rows: int, cols: int, lazy: bool | None = None):
+        """Initializes a Deck.
+
+        Args:
+            rows (int): Number of flavors per feature (also the number of cards in a set).
+            cols (int): Number of features per card.
+            lazy (bool | None, optional): Whether to skip the per-card lookup tables. Defaults to
+                None (lazy only if the deck holds more than ``_MAX_MATERIALIZED_DECK_SIZE`` cards).
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows**cols
+        self.lazy = self.size > _MAX_MATERIALIZED_DECK_SIZE if lazy is None else lazy
+        # Smallest unsigned `array` typecode holding every index *and* `size` itself, so that
+        # callers can use `size` as an "empty" marker in index arrays
+        self.typecode = next(code for code, bits in (('B', 8), ('H', 16), ('I', 32), ('Q', 64)) if self.size < 2**bits)
+
+        # Weight of each feature's digit, in the dense index and in the legacy flavor int
+        self._index_weights: tuple[int, ...] = tuple(rows ** (cols - 1 - feature) for feature in range(cols))
+        self._card_weights: tuple[int, ...] = tuple(10 ** (cols - 1 - feature) for feature in range(cols))
+        self._twist = int('1' * cols)  # Turns the 0-based flavors into the 1-based legacy digits
+
+        # digits[feature][index] -> 0-based flavor of card `index` for that feature (empty if lazy)
+        self.digits: tuple[tuple[int, ...], ...] = ()
+        self.cards: tuple[int, ...] = ()  # Legacy flavor int of every card (empty if lazy)
+        self._index_of_card: dict[int, int] = {}
+        if not self.lazy:
+            # Built digit by digit rather than decoded card by card: a 6-flavor deck holds 279936 cards
+            self.digits = tuple(
+                tuple(flavor for flavor in range(rows) for _ in range(weight)) * (self.size // (weight * rows))
+                for weight in self._index_weights
+            )
+            cards = [0]
+            for _ in range(cols):
+                cards = [card * 10 + flavor for card in cards for flavor in range(rows)]
+            self.cards = tuple(card + self._twist for card in cards)
+            self._index_of_card = {card: index for index, card in enumerate(self.cards)}
+
+        # completions[index_a][index_b] -> card completing the set started by cards a and b. Only
+        # meaningful for 3-card sets, and only ever 81 x 81 then (`cols` is always `rows + 1`).
+        self._completions: tuple[tuple[int, ...], ...] = ()
+        if rows == 3:
+            self._completions = tuple(
+                tuple(self._compute_third(index_a, index_b) for index_b in range(self.size))
+                for index_a in range(self.size)
+            )
+
+        self._all_time_sets: tuple[tuple[int, ...], ...] | None = None  # Built on first request only
+        self._all_time_sets_lock = threading.Lock()
+
+    def flavors_of(self, index: int) -> tuple[int, ...]:
+        """Decodes the 0-based flavors of a card, one per feature.
+
+        Args:
+            index (int): Dense card index.
+
+        Returns:
+            tuple[int, ...]: The card's flavors (its base-``rows`` digits).
+        """
+        return tuple(index // weight % self.rows for weight in self._index_weights)
+
+    def _compute_card(self, index: int) -> int:
+        """Computes the legacy flavor int of a card.
+
+        Args:
+            index (int): Dense card index.
+
+        Returns:
+            int: Legacy flavor int (e.g. ``1123``).
+        """
+        flavors = self.flavors_of(index)
+        return sum(flavor * weight for flavor, weight in zip(flavors, self._card_weights, strict=True)) + self._twist
+
+    def card_of(self, index: int) -> int:
+        """Converts a dense card index into its legacy flavor int.
+
+        Args:
+            index (int): Dense card index.
+
+        Returns:
+            int: Legacy flavor int (e.g. ``1123``).
+        """
+        if self.lazy:
+            return self._compute_card(index)
+        return self.cards[index]
+
+    def index_of(self, card: int) -> int | None:
+        """Converts a legacy flavor int into its dense card index.
+
+        Args:
+            card (int): Legacy flavor int (e.g. ``1123``).
+
+        Returns:
+            int | None: Dense card index, or None if `card` isn't part of this deck.
+        """
+        if not self.lazy:
+            return self._index_of_card.get(card)
+
+        if not isinstance(card, int) or not self._twist <= card < 10**self.cols:
+            return None
+
+        index = 0
+        for card_weight, index_weight in zip(self._card_weights, self._index_weights, strict=True):
+            flavor = card // card_weight % 10 - 1
+            if not 0 <= flavor < self.rows:
+                return None
+            index = index + flavor * index_weight
+        return index
+
+    def _compute_third(self, index_a: int, index_b: int) -> int:
+        """Computes the only card completing a 3-card set with the two provided ones (``rows == 3``).
+
+        Per feature, the three flavors of a set always sum to 0 modulo 3 (all the same, or one
+        of each), which pins down the missing flavor.
+
+        Args:
+            index_a (int): Dense index of the first card.
+            index_b (int): Dense index of the second card.
+
+        Returns:
+            int: Dense index of the completing card.
+        """
+        flavors_a, flavors_b = self.flavors_of(index_a), self.flavors_of(index_b)
+        return sum(
+            (-flavor_a - flavor_b) % 3 * weight
+            for flavor_a, flavor_b, weight in zip(flavors_a, flavors_b, self._index_weights, strict=True)
+        )
+
+    def third(self, index_a: int, index_b: int) -> int:
+        """Returns the only card completing a 3-card set with the two provided ones (``rows == 3``).
+
+        A single lookup in the precomputed per-card completion tables (see :meth:`_compute_third`).
+
+        Args:
+            index_a (int): Dense index of the first card.
+            index_b (int): Dense index of the second card.
+
+        Returns:
+            int: Dense index of the completing card.
+        """
+        return self._completions[index_a][index_b]
+
+    def is_valid_set(self, indices: list[int] | tuple[int, ...]) -> bool:
+        """Checks whether the provided cards form a set.
+
+        Each feature must either be the same on every card, or different on every card. With 3
+        flavors, that is simply "the flavors sum to 0 modulo 3".
+
+        Args:
+            indices (list[int] | tuple[int, ...]): Dense indices of the cards.
+
+        Returns:
+            bool: True if valid, False if not.
+        """
+        if len(indices) != self.rows:
+            return False
+
+        if self.rows == 3 and not self.lazy:
+            index_a, index_b, index_c = indices
+            return all((digits[index_a] + digits[index_b] + digits[index_c]) % 3 == 0 for digits in self.digits)
+
+        flavors = [self.flavors_of(index) for index in indices]
+        return all(len(set(feature)) in (1, self.rows) for feature in zip(*flavors, strict=True))
+
+    def _iter_placements(self, indices: Sequence[int], start: int = 0) -> Iterator[tuple[int, ...]]:
+        """Lazily yields the positions (in `indices`) of every valid set, each set exactly once.
+
+        Only the sets using at least one card from ``indices[start:]`` are yielded. For 3-card
+        sets, any two cards fully determine the third one: each card ``c`` from ``indices[start:]``
+        is paired with every card ``a`` placed before it, and the completing card ``b`` is looked
+        up in a position index of `indices` (O(n^2) instead of testing every triple, O(n^3)).
+        Keeping only the ``a < b < c`` placements reports each set exactly once. Larger sets are
+        searched for by :meth:`_iter_placements_backtracking`.
+
+        Args:
+            indices (Sequence[int]): Dense card indices (possibly a playground).
+            start (int, optional): Position in `indices` of the first "new" card. Defaults to 0.
+
+        Yields:
+            tuple[int, ...]: Increasing positions in `indices` of the cards of one set.
+        """
+        if self.rows != 3:
+            yield from self._iter_placements_backtracking(indices, start)
+            return
+
+        completions = self._completions
+        position_of_card = {index: position for position, index in enumerate(indices)}
+
+        for position_c in range(start, len(indices)):
+            completions_c = completions[indices[position_c]]
+            for position_a in range(position_c):
+                position_b = position_of_card.get(completions_c[indices[position_a]], -1)
+                if position_a < position_b < position_c:
+                    yield position_a, position_b, position_c
+
+    def _iter_placements_backtracking(self, indices: Sequence[int], start: int = 0) -> Iterator[tuple[int, ...]]:
+        """Same as :meth:`_iter_placements`, for sets of any size, by growing sets card by card.
+
+        The search runs over the "new" cards (``indices[start:]``) followed by the others, and a
+        partial set only ever grows with cards placed after its last one: each set is met once,
+        rooted at its first new card, so sets made of old cards only are never even started.
+        A partial set keeps growing only while every feature can still end up "all the same" or
+        "all different": per feature, the flavors used so far are kept as a bitmask, which must
+        either hold a single flavor or one flavor per card. Once a feature is "all the same"
+        across 2+ cards, the next card can only come from that flavor's bucket of positions,
+        which prunes most of the search. The last card is fully determined by the others (the
+        shared flavor, or the one flavor not used yet), so it is looked up rather than searched for.
+
+        Args:
+            indices (Sequence[int]): Dense card indices (possibly a playground).
+            start (int, optional): Position in `indices` of the first "new" card. Defaults to 0.
+
+        Yields:
+            tuple[int, ...]: Increasing positions in `indices` of the cards of one set.
+        """
+        nb_new_cards = len(indices) - start
+        search_order = [*indices[start:], *indices[:start]]
+        all_flavors = (1 << self.rows) - 1
+        flavors_at = [self.flavors_of(index) for index in search_order]
+        search_position_of_card = {index: position for position, index in enumerate(search_order)}
+
+        # buckets[feature][flavor] -> increasing search positions of the cards showing that flavor
+        buckets: list[list[list[int]]] = [[[] for _ in range(self.rows)] for _ in range(self.cols)]
+        for position, flavors in enumerate(flavors_at):
+            for feature, flavor in enumerate(flavors):
+                buckets[feature][flavor].append(position)
+
+        def to_placement(search_positions: tuple[int, ...]) -> tuple[int, ...]:
+            return tuple(
+                sorted(
+                    position + start if position < nb_new_cards else position - nb_new_cards
+                    for position in search_positions
+                )
+            )
+
+        def extend(search_positions: tuple[int, ...], used_flavors: list[int]) -> Iterator[tuple[int, ...]]:
+            position_last = search_positions[-1]
+
+            if len(search_positions) == self.rows - 1:
+                if len(search_positions) == 1:  # 2-card sets: any two cards make a set
+                    for position in range(position_last + 1, len(search_order)):
+                        yield to_placement((*search_positions, position))
+                    return
+
+                index = 0
+                for used, weight in zip(used_flavors, self._index_weights, strict=True):
+                    missing = used if used & (used - 1) == 0 else all_flavors & ~used
+                    index = index + (missing.bit_length() - 1) * weight
+                if search_position_of_card.get(index, -1) > position_last:
+                    yield to_placement((*search_positions, search_position_of_card[index]))
+                return
+
+            candidates: Sequence[int] = range(position_last + 1, len(search_order))
+            if len(search_positions) >= 2:
+                for feature, used in enumerate(used_flavors):
+                    if used & (used - 1) == 0:  # All the same so far: the next card must match
+                        bucket = buckets[feature][used.bit_length() - 1]
+                        first = bisect.bisect_right(bucket, position_last)
+                        if len(bucket) - first < len(candidates):
+                            candidates = bucket[first:]
+
+            for position in candidates:
+                next_used_flavors = []
+                for used, flavor in zip(used_flavors, flavors_at[position], strict=True):
+                    bit = 1 << flavor
+                    if used & bit:
+                        if used != bit:  # Repeats a flavor of a feature that was all different
+                            break
+                    elif used.bit_count() != len(search_positions):  # New flavor, but was all the same
+                        break
+                    next_used_flavors.append(used | bit)
+                else:
+                    yield from extend((*search_positions, position), next_used_flavors)
+
+        for position_first in range(nb_new_cards):
+            yield from extend((position_first,), [1 << flavor for flavor in flavors_at[position_first]])
+
+    def find_sets(self, indices: Sequence[int], start: int = 0) -> list[list[int]]:
+        """Returns every valid set that can be made from the provided cards.
+
+        With `start`, only the sets using at least one card from ``indices[start:]`` are returned,
+        which is all it takes to bring a set list up to date after cards were appended to
+        `indices` (e.g. drawn onto the playground).
+
+        Args:
+            indices (Sequence[int]): Dense card indices (possibly a playground).
+            start (int, optional): Position in `indices` of the first "new" card. Defaults to 0.
+
+        Returns:
+            list[list[int]]: Either an empty list or a list of all the valid set found (as sorted
+            dense card indices), in the same order as ``combinations(indices, rows)`` would give.
+        """
+        placements = sorted(self._iter_placements(indices, start))
+        return [sorted(indices[position] for position in placement) for placement in placements]
+
+    def count_sets(self, indices: Sequence[int], start: int = 0) -> int:
+        """Counts the valid sets that can be made from the provided cards, without building them.
+
+        Args:
+            indices (Sequence[int]): Dense card indices (possibly a playground).
+            start (int, optional): Only count the sets using at least one card from
+                ``indices[start:]``. Defaults to 0 (every set).
+
+        Returns:
+            int: Number of valid sets.
+        """
+        return sum(1 for _ in self._iter_placements(indices, start))
+
+    def has_set(self, indices: Sequence[int], start: int = 0) -> bool:
+        """Checks whether at least one valid set can be made from the provided cards.
+
+        Stops at the first set found. For 3-card sets (81-card deck), the bitmask of `indices`
+        (see :meth:`mask_of`) turns "is the completing card there?" into a single bit test, so no
+        position index has to be built.
+
+        Args:
+            indices (Sequence[int]): Dense card indices (possibly a playground).
+            start (int, optional): Only consider the sets using at least one card from
+                ``indices[start:]``. Defaults to 0 (every set).
+
+        Returns:
+            bool: True if at least one valid set exists, False otherwise.
+        """
+        if self.rows != 3:
+            return next(self._iter_placements(indices, start), None) is not None
+
+        completions = self._completions
+        mask = self.mask_of(indices)
+        for position_c in range(start, len(indices)):
+            completions_c = completions[indices[position_c]]
+            for position_a in range(position_c):
+                if mask >> completions_c[indices[position_a]] & 1:
+                    return True
+        return False
+
+    @staticmethod
+    def mask_of(indices: Iterable[int]) -> int:
+        """Builds the bitmask of a group of cards over the whole deck.
+
+        Args:
+            indices (Iterable[int]): Dense card indices.
+
+        Returns:
+            int: Bitmask, bit ``i`` set if card ``i`` is in `indices`.
+        """
+        mask = 0
+        for index in indices:
+            mask = mask | 1 << index
+        return mask
+
+    def get_all_time_sets(self) -> tuple[tuple[int, ...], ...]:
+        """Returns every valid set that can be made from the whole deck.
+
+        Computed once, on first request, then shared (read-only) by every caller. Only sensible for
+        small decks -- see :meth:`iter_all_time_sets` for a streaming alternative.
+
+        Returns:
+            tuple[tuple[int, ...], ...]: Every set, as sorted dense card indices, sorted.
+        """
+        with self._all_time_sets_lock:
+            if self._all_time_sets is None:
+                self._all_time_sets = tuple(sorted(self.iter_all_time_sets()))
+            return self._all_time_sets
+
+    def iter_all_time_sets(self) -> Iterator[tuple[int, ...]]:
+        """Lazily yields every valid set that can be made from the whole deck, each exactly once.
+
+        Sets are built feature by feature rather than searched for: per feature, the flavors of the
+        ``rows`` cards either are all the same (``rows`` choices) or all different (a permutation).
+        Listing the cards by their flavor of the *first* all-different feature (card ``j`` gets
+        flavor ``j``) makes the enumeration canonical, so no set comes out twice, and it also
+        means every set comes out already sorted. Memory use stays flat whatever the deck size.
+
+        Yields:
+            tuple[int, ...]: One set, as sorted dense card indices (sets are not yielded in sorted
+            order, see :meth:`get_all_time_sets` for that).
+        """
+        identity = tuple(range(self.rows))
+        same_columns = [(flavor,) * self.rows for flavor in range(self.rows)]
+        all_columns = same_columns + list(permutations(identity))
+        leading_columns = [*same_columns, identity]  # Up to (and including) the first all-different feature
+
+        def extend(feature: int, partial_set: tuple[int, ...], any_different: bool) -> Iterator[tuple[int, ...]]:
+            if feature == self.cols:
+                if any_different:
+                    yield partial_set
+                return
+
+            weight = self._index_weights[feature]
+            for column in all_columns if any_different else leading_columns:
+                yield from extend(
+                    feature + 1,
+                    tuple(index + flavor * weight for index, flavor in zip(partial_set, column, strict=True)),
+                    any_different or column[0] != column[1],
+                )
+
+        return extend(0, (0,) * self.rows, False)
+
+    def _get_first_different_feature_weights(self) -> list[int]:
+        """Returns how many sets have their first all-different feature at each feature position.
+
+        With that feature at position ``i``, the ``i`` features before it can only be "all the same"
+        (``rows`` choices each), and each feature after it can be anything (``rows`` same-flavor
+        columns plus ``rows!`` permutations) -- see :meth:`iter_all_time_sets`.
+
+        Returns:
+            list[int]: Number of sets, per position of the first all-different feature.
+        """
+        nb_columns = self.rows + math.factorial(self.rows)
+        return [self.rows**feature * nb_columns ** (self.cols - 1 - feature) for feature in range(self.cols)]
+
+    def count_all_time_sets(self) -> int:
+        """Counts the valid sets that can be made from the whole deck, without building any of them.
+
+        Returns:
+            int: Number of sets (1080 for the classic game).
+        """
+        return sum(self._get_first_different_feature_weights())
+
+    def sample_all_time_set(self, rand: random.Random) -> tuple[int, ...]:
+        """Draws one set uniformly at random among every set of the whole deck.
+
+        Follows the same construction as :meth:`iter_all_time_sets`, so no set list is ever built.
+
+        Args:
+            rand (random.Random): Source of randomness.
+
+        Returns:
+            tuple[int, ...]: The set, as sorted dense card indices.
+        """
+        first_different = rand.choices(range(self.cols), weights=self._get_first_different_feature_weights())[0]
+        nb_columns = self.rows + math.factorial(self.rows)
+        partial_set = [0] * self.rows
+
+        for feature, weight in enumerate(self._index_weights):
+            if feature == first_different:
+                column: Sequence[int] = range(self.rows)
+            elif feature < first_different or rand.randrange(nb_columns) < self.rows:
+                column = (rand.randrange(self.rows),) * self.rows
+            else:
+                column = rand.sample(range(self.rows), self.rows)
+
+            partial_set = [index + flavor * weight for index, flavor in zip(partial_set, column, strict=True)]
+
+        return tuple(partial_set)
+
+    def sample_set_with(self, index: int, rand: random.Random) -> tuple[int, ...]:
+        """Draws a random set holding the provided card.
+
+        Per feature, the other cards either all share the card's flavor or each take one of the
+        remaining flavors, in random order; at least one feature is all different, so the cards
+        are distinct. Not uniform over the sets holding the card, which doesn't matter to its
+        only use: putting *some* set on top of the pile (see ``Grid.draw_cards_if_possible``).
+
+        Args:
+            index (int): Dense index of the card the set must hold.
+            rand (random.Random): Source of randomness.
+
+        Returns:
+            tuple[int, ...]: The set, as dense card indices, `index` first.
+        """
+        flavors = self.flavors_of(index)
+        different = [rand.random() < 0.5 for _ in range(self.cols)]
+        if not any(different):
+            different[rand.randrange(self.cols)] = True
+
+        card_set = [index] + [0] * (self.rows - 1)
+        for flavor, weight, is_different in zip(flavors, self._index_weights, different, strict=True):
+            if is_different:
+                others = rand.sample([other for other in range(self.rows) if other != flavor], self.rows - 1)
+            else:
+                others = [flavor] * (self.rows - 1)
+            for card, other in enumerate(others, 1):
+                card_set[card] = card_set[card] + other * weight
+
+        return tuple(card_set)
+
+
+class KeyedPermutation:
+    """A seeded pseudo-random permutation of ``range(size)``, computed one position at a time.
+
+    Stands in for a shuffled list of every card index when that list would not fit in memory
+    (see :attr:`Deck.lazy`): ``permutation[position]`` is the card at that position of the pile.
+    Positions are run through a small balanced Feistel network (a bijection over the
+    ``2 * half_bits``-bit integers, whatever its round function) keyed by the provided randomness;
+    values that land outside ``range(size)`` are fed back in ("cycle walking") until they don't,
+    which keeps it a bijection of ``range(size)``. The domain is less than 4 times `size`, so that
+    takes under 4 rounds of the network on average. Constant memory, constant time per position.
+
+    The network runs backwards too, so a value's position is found just as fast (see :meth:`index`).
+    Values can be moved around like in a list (``permutation[position] = value``, e.g. to swap two
+    of them): moved values are kept in a small overlay, which takes precedence over the network.
+    """
+
+    _nb_rounds = 4
+
+    def __init__(self, size: int, rand: random.Random):
+        """Initializes a KeyedPermutation.
+
+        Args:
+            size (int): Number of values to permute (``range(size)``).
+            rand (random.Random): Source of randomness for the round keys.
+        """
+        self._size = size
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_mask = (1 << self._half_bits) - 1
+        self._keys = tuple(rand.getrandbits(64) for _ in range(self._nb_rounds))
+        self._moved: dict[int, int] = {}  # Position -> value, for the values moved by __setitem__
+        self._position_of_moved: dict[int, int] = {}  # The other way around
+
+    @classmethod
+    def from_keys(cls, size: int, keys: Sequence[int], moves: Sequence[Sequence[int]] = ()) -> 'KeyedPermutation':
+        """Rebuilds a permutation from its :attr:`keys` and :attr:`moves` (e.g. to restore a persisted game).
+
+        Args:
+            size (int): Number of values to permute (``range(size)``).
+            keys (Sequence[int]): Round keys.
+            moves (Sequence[Sequence[int]], optional): ``(position, value)`` pairs of the moved
+                values. Defaults to () (none moved).
+
+        Raises:
+            ValueError: If there isn't one key per round, or a move is out of range.
+
+        Returns:
+            KeyedPermutation: The permutation.
+        """
+        if len(keys) != cls._nb_rounds:
+            raise ValueError(f'Expected {cls._nb_rounds} round keys, got {len(keys)}')
+
+        permutation = cls(size, random.Random(0))
+        permutation._keys = tuple(int(key) & 0xFFFFFFFFFFFFFFFF for key in keys)
+        for position, value in moves:
+            if not 0 <= int(value) < size:
+                raise ValueError(f'Moved value {value} out of range')
+            permutation[int(position)] = int(value)
+        return permutation
+
+    @property
+    def keys(self) -> tuple[int, ...]:
+        """tuple[int, ...]: Round keys: with `size` and :attr:`moves`, all there is to the permutation."""
+        return self._keys
+
+    @property
+    def moves(self) -> tuple[tuple[int, int], ...]:
+        """tuple[tuple[int, int], ...]: ``(position, value)`` pairs of the values moved since built."""
+        return tuple(self._moved.items())
+
+    def __len__(self) -> int:
+        """Returns the number of permuted values.
+
+        Returns:
+            int: `size`.
+        """
+        return self._size
+
+    def __getitem__(self, position: int) -> int:
+        """Returns the value at a position of the permutation.
+
+        Args:
+            position (int): Position, in ``range(size)``.
+
+        Raises:
+            IndexError: If `position` is out of range.
+
+        Returns:
+            int: Value at that position.
+        """
+        if not 0 <= position < self._size:
+            raise IndexError(position)
+
+        value = self._moved.get(position)
+        if value is not None:
+            return value
+
+        value = self._encrypt(position)
+        while value >= self._size:
+            value = self._encrypt(value)
+        return value
+
+    def __setitem__(self, position: int, value: int) -> None:
+        """Puts a value at a position, like in a list.
+
+        The permutation is only a permutation again once the value that was at `position` is put
+        somewhere else too: values are meant to be swapped.
+
+        Args:
+            position (int): Position, in ``range(size)``.
+            value (int): Value, in ``range(size)``.
+
+        Raises:
+            IndexError: If `position` is out of range.
+        """
+        if not 0 <= position < self._size:
+            raise IndexError(position)
+
+        self._moved[position] = value
+        self._position_of_moved[value] = position
+
+    def index(self, value: int, start: int = 0) -> int:
+        """Returns the position of a value, like ``list.index``.
+
+        Args:
+            value (int): Value to look for.
+            start (int, optional): First position to consider. Defaults to 0.
+
+        Raises:
+            ValueError: If `value` isn't in ``range(size)``, or sits before `start`.
+
+        Returns:
+            int: Position of `value`.
+        """
+        if not 0 <= value < self._size:
+            raise ValueError(f'{value} is not in the permutation')
+
+        position = self._position_of_moved.get(value)
+        if position is None:
+            position = self._decrypt(value)
+            while position >= self._size:
+                position = self._decrypt(position)
+
+        if position < start:
+            raise ValueError(f'{value} is before position {start}')
+        return position
+
+    def _encrypt(self, value: int) -> int:
+        """Runs a value through the Feistel network.
+
+        Args:
+            value (int): Value in ``range(2 ** (2 * half_bits))``.
+
+        Returns:
+            int: Its image, in the same range.
+        """
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return left << self._half_bits | right
+
+    def _decrypt(self, value: int) -> int:
+        """Runs a value back through the Feistel network (the inverse of :meth:`_encrypt`).
+
+        Args:
+            value (int): Value in ``range(2 ** (2 * half_bits))``.
+
+        Returns:
+            int: Its preimage, in the same range.
+        """
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in reversed(self._keys):
+            left, right = right ^ self._round(left, key), left
+        return left << self._half_bits | right
+
+    def _round(self, half: int, key: int) -> int:
+        """Feistel round function: the SplitMix64 finalizer of the keyed half, cut to size.
+
+        Args:
+            half (int): Half of the value being encrypted.
+            key (int): Round key.
+
+        Returns:
+            int: Pseudo-random half, in ``range(2 ** half_bits)``.
+        """
+        mixed = (half + key) & 0xFFFFFFFFFFFFFFFF
+        mixed = (mixed ^ mixed >> 30) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+        mixed = (mixed ^ mixed >> 27) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+        return (mixed ^ mixed >> 31) & self._half_mask
+
+
+_decks: dict[tuple[int, int], Deck] = {}
+_decks_lock = threading.Lock()
+
+
+def get_deck(features: Sequence[type[enum.Enum]]) -> Deck:
+    """Returns the process-wide, shared :class:`Deck` of a feature configuration.
+
+    Thread-safe; the Deck is built on the first call for a given configuration and reused by every
+    later one. Cards only depend on the *shape* of the features (flavors per feature, number of
+    features), so that shape is the cache key -- two feature tuples of the same shape share a Deck.
+
+    Args:
+        features (Sequence[type[enum.Enum]]): The card features (already validated by the caller).
+
+    Returns:
+        Deck: The shared Deck.
+    """
+    key = (len(features[0]), len(features))
+    with _decks_lock:
+        deck = _decks.get(key)
+        if deck is None:
+            deck = _decks[key] = Deck(*key)
+        return deck
+
+
+def get_rand_state(rand: random.Random) -> list[Any]:
+    """Returns the state of a generator as plain JSON data (see :func:`rand_from_state`).
+
+    Args:
+        rand (random.Random): Generator.
+
+    Returns:
+        list[Any]: Its state.
+    """
+    version, internal_state, gauss_next = rand.getstate()
+    return [version, list(internal_state), gauss_next]
+
+
+def rand_from_state(state: Sequence[Any]) -> random.Random:
+    """Rebuilds a generator from :func:`get_rand_state`, picking up where it left off.
+
+    Args:
+        state (Sequence[Any]): Its state.
+
+    Raises:
+        ValueError: If `state` isn't a generator state.
+
+    Returns:
+        random.Random: The generator.
+    """
+    version, internal_state, gauss_next = state
+    rand = random.Random()
+    try:
+        rand.setstate((version, tuple(internal_state), gauss_next))
+    except TypeError as error:
+        raise ValueError('Not a generator state') from error
+    return rand
@@ -5,15 +5,23 @@
 @rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
 """
 
+import dataclasses
 import enum
 import random
 import time
+from typing import Any
 from uuid import uuid4
 
+from pyset.modules.game.clock import Clock, WallClock
+from pyset.modules.game.deck import get_rand_state, rand_from_state
 from pyset.modules.game.models import PlayerActionResult, SubmitSetResult
 from pyset.modules.game.player import Player
 from pyset.modules.game.set import Grid
 
+# One generator for every Game (see pyset.modules.game.set._shared_rand)
+_shared_rand = random.Random()
+_wall_clock = WallClock()
+
 
 class GameState(enum.Enum):
     """Lifecycle states a :class:`Game` moves through."""
@@ -28,16 +36,36 @@ class GameState(enum.Enum):
 class Game:
     """Orchestrates players, timers and penalties around a :class:`pyset.modules.game.set.Grid`."""
 
-    def __init__(self, grid: Grid):
+    __slots__ = (
+        '_clock',
+        '_elapsed_time_before_pause',
+        '_elapsed_time_during_pause',
+        '_game_state',
+        '_max_players',
+        '_penalty_time',
+        '_players',
+        '_rand',
+        '_timer',
+        '_timer_paused',
+        'grid',
+    )
+
+    def __init__(self, grid: Grid, rand: random.Random | None = None, clock: Clock | None = None):
         """Initializes a Game.
 
         Args:
             grid (Grid): Playground the game is played on.
+            rand (random.Random | None, optional): Source of randomness (AI picks), e.g. seeded for
+                a reproducible game. Defaults to None (a generator shared by every Game).
+            clock (Clock | None, optional): Time source of the game and of its players' timers and
+                penalties, e.g. a :class:`pyset.modules.game.clock.VirtualClock` in simulations.
+                Defaults to None (wall-clock time).
         """
-        self._rand = random.Random()
+        self._rand = rand if rand is not None else _shared_rand
+        self._clock = clock if clock is not None else _wall_clock
 
         self._timer = 0.0
-        self._timer_paused = 0.0
+        self._timer_paused: float | None = None  # Time the game was paused at, if paused
         self._elapsed_time_before_pause = 0.0
         self._elapsed_time_during_pause = 0.0
 
@@ -49,6 +77,58 @@ class Game:
 
         self.grid = grid
 
+    def get_state(self) -> dict[str, Any]:
+        """Returns the game's state as plain JSON data (e.g. to persist a session).
+
+        Timestamps (the timer, the pause, the players' penalties) are kept as ages, read against a
+        single reading of the clock: the state doesn't depend on the clock it was read from (e.g.
+        ``time.monotonic``, which starts over on every boot). The shared generator stays shared.
+
+        Returns:
+            dict[str, Any]: The state (see :meth:`from_state`).
+        """
+        now = self._clock.now()
+        return {
+            'grid': self.grid.get_state(),
+            'rand': None if self._rand is _shared_rand else get_rand_state(self._rand),
+            'game_state': self._game_state.name,
+            'max_players': self._max_players,
+            'penalty_time': self._penalty_time,
+            'timer_age': now - self._timer,
+            'pause_age': None if self._timer_paused is None else now - self._timer_paused,
+            'elapsed_time_before_pause': self._elapsed_time_before_pause,
+            'elapsed_time_during_pause': self._elapsed_time_during_pause,
+            'players': [player.get_state(now) for player in self._players],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any], clock: Clock | None = None, elapsed: float = 0.0) -> 'Game':
+        """Rebuilds a game from :meth:`get_state`, its timestamps rebased against `clock`.
+
+        Args:
+            state (dict[str, Any]): The state.
+            clock (Clock | None, optional): Time source of the game (see :meth:`__init__`).
+                Defaults to None (wall-clock time).
+            elapsed (float, optional): Seconds that passed since the state was read (e.g. while it
+                was persisted): its timers, pause and penalties age by as much. Defaults to 0.0.
+
+        Returns:
+            Game: The game.
+        """
+        rand = None if state['rand'] is None else rand_from_state(state['rand'])
+        game = cls(Grid.from_state(state['grid']), rand=rand, clock=clock)
+        now = game._clock.now() - elapsed
+
+        game._game_state = GameState[state['game_state']]
+        game._max_players = int(state['max_players'])
+        game._penalty_time = int(state['penalty_time'])
+        game._timer = now - float(state['timer_age'])
+        game._timer_paused = None if state['pause_age'] is None else now - float(state['pause_age'])
+        game._elapsed_time_before_pause = float(state['elapsed_time_before_pause'])
+        game._elapsed_time_during_pause = float(state['elapsed_time_during_pause'])
+        game._players = [Player.from_state(player, now, clock=game._clock) for player in state['players']]
+        return game
+
     def _select_player_from_name(self, player_name: str) -> tuple[Player | None, int]:
         """Finds a live player by name.
 
@@ -126,7 +206,7 @@ class Game:
         if player is not None:
             return PlayerActionResult(status=False, error='PLAYER_NAME_ALREADY_EXISTS')
 
-        self._players.append(Player(player_name, player_color, is_ai, difficulty))
+        self._players.append(Player(player_name, player_color, is_ai, difficulty, clock=self._clock))
 
         return PlayerActionResult(status=True)
 
@@ -174,7 +254,7 @@ class Game:
             possible_sets = self.grid.get_unique_sets_on_grid()
             card_set = self._rand.choice(possible_sets)
 
-        if int(time.time() - player.get_last_penalty()) <= self._penalty_time:
+        if player.is_under_penalty(self._penalty_time):
             player_name_upper = player.name.upper()
             return SubmitSetResult(
                 status=False, cards_set=card_set, error=f'PLAYER_{player_name_upper}_STILL_UNDER_PENALTY'
@@ -212,16 +292,14 @@ class Game:
         Args:
             enable_pause (bool, optional): Whether to pause the game. Defaults to False.
         """
-        self.grid.update_unique_sets_on_grid()
-
+        # The grid keeps its set list up to date on its own (see Grid.update_unique_sets_on_grid),
+        # so an unchanged grid (e.g. a pure pause/resume toggle) costs nothing here.
         if self.grid.is_missing_cards_on_grid():
             _ = self.grid.draw_cards_if_possible()
-            self.grid.update_unique_sets_on_grid()
 
         while not self.grid.has_unique_sets_on_grid():
             if not self.grid.draw_cards_if_possible():
                 break
-            self.grid.update_unique_sets_on_grid()
 
         self.toggle_timer(enable_pause)
 
@@ -239,7 +317,7 @@ class Game:
         Args:
             enable_pause (bool, optional): Whether to pause the game. Defaults to False.
         """
-        current_time = time.time()
+        current_time = self._clock.now()
 
         if enable_pause:
             self._game_state = GameState.PAUSED
@@ -249,7 +327,7 @@ class Game:
 
             return
 
-        if self._timer_paused != 0:
+        if self._timer_paused is not None:
             self._elapsed_time_during_pause = self._elapsed_time_during_pause + current_time - self._timer_paused
 
         self._game_state = GameState.RUNNING
@@ -257,12 +335,12 @@ class Game:
         self.resume_players_penalty()
 
         self._timer = current_time
-        self._timer_paused = 0
+        self._timer_paused = None
 
     def reset_timer(self) -> None:
         """Resets the round timer and pause bookkeeping."""
-        self._timer = time.time()
-        self._timer_paused = 0
+        self._timer = self._clock.now()
+        self._timer_paused = None
         self._elapsed_time_before_pause = 0
         self._elapsed_time_during_pause = 0
 
@@ -320,7 +398,7 @@ def main() -> None:
 
     if ai_player is not None:
         print(f'\nPlayer {ai_player_name} stats:')
-        for key, value in ai_player.get_stats().model_dump().items():
+        for key, value in dataclasses.asdict(ai_player.get_stats()).items():
             print(f'{key}: {value}')
 
 
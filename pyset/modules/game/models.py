@@ -3,12 +3,16 @@
 
 @author: Luraminaki
 @rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+
+Plain result records returned by the game engine. The engine doesn't depend on pydantic: the web
+layer turns these into wire models (see :mod:`pyset.modules.web.models`).
 """
 
-from pydantic import BaseModel
+import dataclasses
 
 
-class PlayerStats(BaseModel):
+@dataclasses.dataclass(slots=True, kw_only=True)
+class PlayerStats:
     """Snapshot of a single player's identity and performance for the current game."""
 
     name: str
@@ -18,21 +22,23 @@ class PlayerStats(BaseModel):
     calls: int = 0
     number_invalid_sets: int = 0
     number_valid_sets: int = 0
-    valid_sets: list[list[int]] = []
+    valid_sets: list[list[int]] = dataclasses.field(default_factory=list)
     average_answers_time: int = 0
-    answers_time: list[int] = []
+    answers_time: list[int] = dataclasses.field(default_factory=list)
 
 
-class PlayerActionResult(BaseModel):
+@dataclasses.dataclass(slots=True, kw_only=True)
+class PlayerActionResult:
     """Outcome of a roster-changing or penalty action (add/remove player, apply penalty)."""
 
     status: bool
     error: str = ''
 
 
-class SubmitSetResult(BaseModel):
+@dataclasses.dataclass(slots=True, kw_only=True)
+class SubmitSetResult:
     """Outcome of a player attempting to submit a set."""
 
     status: bool
-    cards_set: list[int] = []
+    cards_set: list[int] = dataclasses.field(default_factory=list)
     error: str = ''
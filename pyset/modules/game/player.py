@@ -5,17 +5,50 @@
 @rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
 """
 
-import time
+from array import array
 from collections.abc import Callable
+from typing import Any
 
+from pyset.modules.game.clock import Clock, WallClock
 from pyset.modules.game.models import PlayerStats
 
+_wall_clock = WallClock()
+
 
 class Player:
-    """A single participant (human or AI) in a :class:`pyset.modules.game.game.Game`."""
+    """A single participant (human or AI) in a :class:`pyset.modules.game.game.Game`.
+
+    Slotted, and found sets / answer times are kept in flat ``array`` buffers rather than lists of
+    boxed ints: a server holds one Player per seat of every running game. Those buffers are ring
+    buffers holding the last :attr:`history_size` found sets only, while counts and the average
+    answer time come from running totals -- so neither memory nor :meth:`get_stats` grow with the
+    length of the game.
+    """
+
+    history_size = 64  # Found sets (and answer times) kept for the stats
+
+    __slots__ = (
+        '_clock',
+        '_color',
+        '_difficulty',
+        '_found_cards',
+        '_is_ai',
+        '_last_penalty',
+        '_name',
+        '_nb_found_sets',
+        '_set_called',
+        '_set_found_elapsed_time',
+        '_stats',
+        '_total_answers_time',
+    )
 
     def __init__(
-        self, player_name: str = '', player_color: str = '#000000', is_ai: bool = False, difficulty: str | None = None
+        self,
+        player_name: str = '',
+        player_color: str = '#000000',
+        is_ai: bool = False,
+        difficulty: str | None = None,
+        clock: Clock | None = None,
     ):
         """Initializes a Player.
 
@@ -24,23 +57,78 @@ class Player:
             player_color (str, optional): Hex color used by the frontend. Defaults to '#000000'.
             is_ai (bool, optional): Whether this player is bot-controlled. Defaults to False.
             difficulty (str | None, optional): AI difficulty tier, if any. Defaults to None.
+            clock (Clock | None, optional): Time source of answer times and penalties (the game's,
+                see :class:`pyset.modules.game.game.Game`). Defaults to None (wall-clock time).
         """
+        self._clock = clock if clock is not None else _wall_clock
         self._name = player_name
         self._color = player_color
         self._is_ai = is_ai
         self._difficulty = difficulty
 
-        self._found_sets: list[list[int]] = []
+        # Ring buffers: cards of the last found sets (one set after the other), and their answer time
+        self._found_cards = array('Q')
+        self._set_found_elapsed_time = array('q')  # Seconds
+
+        self._nb_found_sets = 0
+        self._total_answers_time = 0  # Seconds, over every found set
         self._set_called = 0
-        self._set_found_elapsed_time: list[int] = []
-        self._last_penalty = 0.0  # Timestamp
+        self._last_penalty: float | None = None  # Timestamp, None if never penalized
+
+        self._stats: PlayerStats | None = None  # Last snapshot built, until the stats change
+
+    def get_state(self, now: float) -> dict[str, Any]:
+        """Returns the player's state as plain JSON data (e.g. to persist a session), stats cache aside.
+
+        The penalty timestamp is kept as an age: the state doesn't depend on the clock it was read from.
+
+        Args:
+            now (float): Current time of this player's clock.
+
+        Returns:
+            dict[str, Any]: The state (see :meth:`from_state`).
+        """
+        return {
+            'name': self._name,
+            'color': self._color,
+            'is_ai': self._is_ai,
+            'difficulty': self._difficulty,
+            'found_cards': self._found_cards.tolist(),
+            'answers_time': self._set_found_elapsed_time.tolist(),
+            'nb_found_sets': self._nb_found_sets,
+            'total_answers_time': self._total_answers_time,
+            'set_called': self._set_called,
+            'penalty_age': None if self._last_penalty is None else now - self._last_penalty,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any], now: float, clock: Clock | None = None) -> 'Player':
+        """Rebuilds a player from :meth:`get_state`.
+
+        Args:
+            state (dict[str, Any]): The state.
+            now (float): Time of `clock` the state's ages are relative to.
+            clock (Clock | None, optional): Time source of the player (see :meth:`__init__`).
+                Defaults to None (wall-clock time).
+
+        Returns:
+            Player: The player.
+        """
+        player = cls(state['name'], state['color'], bool(state['is_ai']), state['difficulty'], clock=clock)
+        player._found_cards = array('Q', state['found_cards'])
+        player._set_found_elapsed_time = array('q', state['answers_time'])
+        player._nb_found_sets = int(state['nb_found_sets'])
+        player._total_answers_time = int(state['total_answers_time'])
+        player._set_called = int(state['set_called'])
+        player._last_penalty = None if state['penalty_age'] is None else now - float(state['penalty_age'])
+        return player
 
     @property
     def name(self) -> str:
         """str: This player's display name.
 
         A plain attribute read; prefer this over ``get_stats().name`` when only the name is
-        needed, since building a full ``PlayerStats`` snapshot copies every stat list for nothing.
+        needed, since ``get_stats()`` may have to build a full ``PlayerStats`` snapshot for nothing.
         """
         return self._name
 
@@ -66,9 +154,20 @@ class Player:
         """
         found_valid = fold_cards_if_possible(card_set)
         if found_valid:
-            self._found_sets.append(card_set)
+            elapsed_time = int(self._clock.now() - timer)
+
+            if self._nb_found_sets < self.history_size:
+                self._found_cards.extend(card_set)
+                self._set_found_elapsed_time.append(elapsed_time)
+            else:  # Full: overwrite the oldest found set
+                oldest = self._nb_found_sets % self.history_size
+                self._found_cards[oldest * len(card_set) : (oldest + 1) * len(card_set)] = array('Q', card_set)
+                self._set_found_elapsed_time[oldest] = elapsed_time
+
+            self._nb_found_sets = self._nb_found_sets + 1
+            self._total_answers_time = self._total_answers_time + elapsed_time
             self._set_called = self._set_called + 1
-            self._set_found_elapsed_time.append(int(time.time() - timer))
+            self._stats = None
 
         else:
             _ = self.apply_penalty()
@@ -81,7 +180,18 @@ class Player:
         Returns:
             float: Timestamp, or 0 if no penalty has ever been applied.
         """
-        return self._last_penalty
+        return 0.0 if self._last_penalty is None else self._last_penalty
+
+    def is_under_penalty(self, penalty_time: float) -> bool:
+        """Checks whether this player's last penalty is still running.
+
+        Args:
+            penalty_time (float): Penalty duration, in seconds.
+
+        Returns:
+            bool: True if penalized less than `penalty_time` seconds ago (whole seconds), False otherwise.
+        """
+        return self._last_penalty is not None and int(self._clock.now() - self._last_penalty) <= penalty_time
 
     def apply_penalty(self) -> float:
         """Applies a penalty to this player, starting the penalty timeout clock.
@@ -89,8 +199,9 @@ class Player:
         Returns:
             float: Timestamp the penalty was applied at.
         """
-        self._last_penalty = time.time()
+        self._last_penalty = self._clock.now()
         self._set_called = self._set_called + 1
+        self._stats = None
         return self._last_penalty
 
     def resume_penalty(self, elapsed_time_during_pause: float) -> float:
@@ -102,29 +213,51 @@ class Player:
         Returns:
             float: Updated penalty timestamp.
         """
-        self._last_penalty = self._last_penalty + elapsed_time_during_pause if self._last_penalty != 0 else 0
-        return self._last_penalty
+        if self._last_penalty is not None:
+            self._last_penalty = self._last_penalty + elapsed_time_during_pause
+        return self.get_last_penalty()
 
     def get_stats(self) -> PlayerStats:
-        """Builds a snapshot of this player's current statistics.
+        """Returns a snapshot of this player's current statistics.
+
+        The snapshot is built once, then handed out as-is until :meth:`submit_set` or
+        :meth:`apply_penalty` change the stats (penalty timestamps aren't part of them) -- it is
+        shared, so callers must not modify it. Valid sets and answer times only cover the last
+        :attr:`history_size` found sets, oldest first; counts and the average cover the whole game.
 
         Returns:
             PlayerStats: Identity and performance snapshot.
         """
+        if self._stats is not None:
+            return self._stats
+
         average_answers_time = 0
+        if self._nb_found_sets:
+            average_answers_time = int(self._total_answers_time / self._nb_found_sets)
+
+        # Once the ring buffers are full, the oldest found set is the next one to be overwritten
+        oldest = self._nb_found_sets % self.history_size if self._nb_found_sets > self.history_size else 0
+        answers_time = self._set_found_elapsed_time[oldest:].tolist() + self._set_found_elapsed_time[:oldest].tolist()
 
-        if self._set_found_elapsed_time:
-            average_answers_time = int(sum(self._set_found_elapsed_time) / len(self._set_found_elapsed_time))
+        valid_sets: list[list[int]] = []
+        if answers_time:
+            set_size = len(self._found_cards) // len(answers_time)
+            valid_sets = [
+                self._found_cards[start : start + set_size].tolist()
+                for start in range(0, len(self._found_cards), set_size)
+            ]
+            valid_sets = valid_sets[oldest:] + valid_sets[:oldest]
 
-        return PlayerStats(
+        self._stats = PlayerStats(
             name=self._name,
             color=self._color,
             is_ai=self._is_ai,
             difficulty=self._difficulty,
             calls=self._set_called,
-            number_invalid_sets=self._set_called - len(self._found_sets),
-            number_valid_sets=len(self._found_sets),
-            valid_sets=self._found_sets,
+            number_invalid_sets=self._set_called - self._nb_found_sets,
+            number_valid_sets=self._nb_found_sets,
+            valid_sets=valid_sets,
             average_answers_time=average_answers_time,
-            answers_time=self._set_found_elapsed_time,
+            answers_time=answers_time,
         )
+        return self._stats
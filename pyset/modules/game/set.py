@@ -6,19 +6,74 @@
 """
 
 import enum
-import math
 import random
 import time
-from itertools import combinations
+from array import array
+from collections.abc import Iterator
+from typing import Any, cast
 
+from pyset.modules.game.deck import KeyedPermutation, get_deck, get_rand_state, rand_from_state
 from pyset.modules.game.features import Amount, Color, Shading, Shape
-from pyset.modules.misc.helpers import int2base, most_frequent_flavor
+
+# One generator for every Grid: a Random instance carries ~2.5 KB of state, more than the rest of a grid
+_shared_rand = random.Random()
+
+# Random sets tried by Grid._stack_set_on_pile before giving up (each try fails if a card of the set left the pile)
+_NB_STACKING_TRIES = 64
+
+_standard_features = {feature.__name__: feature for feature in (Shape, Color, Shading, Amount)}
+
+
+def _feature_from_state(name: str, flavors: list[str]) -> type[enum.Enum]:
+    """Returns the feature a grid state names (see :meth:`Grid.get_state`).
+
+    Args:
+        name (str): Name of the feature.
+        flavors (list[str]): Names of its flavors.
+
+    Returns:
+        type[enum.Enum]: The standard feature of that name if it has those flavors, otherwise a
+        new feature (only their number matters to a grid, see :func:`get_deck`).
+    """
+    feature = _standard_features.get(name)
+    if feature is not None and [flavor.name for flavor in feature] == flavors:
+        return feature
+    return cast(type[enum.Enum], enum.Enum(str(name), [str(flavor) for flavor in flavors]))
 
 
 class Grid:
-    """The playground: card deck, current display and the valid sets that can be made from it."""
+    """The playground: card deck, current display and the valid sets that can be made from it.
+
+    Cards are handled internally as dense indices into a :class:`pyset.modules.game.deck.Deck`;
+    they are only converted to (and from) the legacy flavor ints (e.g. ``1123``) by the public
+    methods below, so the API wire format is unchanged.
+    """
 
-    def __init__(self, features: list[type[enum.Enum]] | None = None, find_all_unique_sets: bool = False):
+    __slots__ = (
+        '_cols',
+        '_deck_cursor',
+        '_empty_slot',
+        '_features',
+        '_full_deck',
+        '_grid_slots',
+        '_max_nb_cards_on_grid',
+        '_nb_cards_on_grid',
+        '_pending_mask',
+        '_rand',
+        '_rows',
+        '_shuffled_cards_id_in_deck',
+        '_slot_of_card',
+        '_standard_nb_cards_on_grid',
+        '_unique_sets',
+        '_unique_sets_on_grid',
+    )
+
+    def __init__(
+        self,
+        features: list[type[enum.Enum]] | None = None,
+        find_all_unique_sets: bool = False,
+        rand: random.Random | None = None,
+    ):
         """Initializes a Grid.
 
         Args:
@@ -27,11 +82,13 @@ class Grid:
             find_all_unique_sets (bool, optional): Sanity check, makes the grid initialisation
                 slower, but gives an exhaustive list of all the valid set if all the cards were on
                 the playground. Defaults to False.
+            rand (random.Random | None, optional): Source of randomness (shuffles, samples), e.g.
+                seeded for a reproducible game. Defaults to None (a generator shared by every Grid).
 
         Raises:
             ValueError: If the provided features are not valid (see :meth:`_is_valid_features`).
         """
-        self._rand = random.Random()
+        self._rand = rand if rand is not None else _shared_rand
 
         self._features = features if features is not None else [Shape, Color, Shading, Amount]
 
@@ -41,18 +98,103 @@ class Grid:
         self._rows = len(self._features[0])  # 3
         self._cols = len(self._features)  # 4
         self._standard_nb_cards_on_grid = self._rows * self._cols  # 12
-        self._twist = int('1' * self._cols)  # Constant added to every flavor-to-int conversion
-        self._cards_on_grid: list[int] = []  # Default Game is played on a 4 x 3 grid
-
-        self._shuffled_cards_id_in_deck: list[int] = []  # Deck of random integers (default range 0~80, 81 values)
-        self._full_deck: list[int] = []  # Default deck has a total of 81 cards
-
-        self._unique_sets: list[list[int]] = []  # Default game has a total of 1080 unique sets
+        # Variants only (3-card sets always show up within 21 cards, 2-card sets right away): past that
+        # many cards, the search for a set would make the grid too slow to deal and to hint on
+        self._max_nb_cards_on_grid = self._standard_nb_cards_on_grid + self._rows if self._rows > 3 else None
+        self._full_deck = get_deck(self._features)  # Default deck has a total of 81 cards (shared, read-only)
+
+        # Default Game is played on a 4 x 3 grid. Each displayed card keeps its slot until folded,
+        # and a drawn card fills the first empty slot (marked by `_empty_slot`) before a new one
+        # is appended -- just like on a real table.
+        self._empty_slot = self._full_deck.size
+        self._grid_slots = array(self._full_deck.typecode)  # Card index per slot
+        self._slot_of_card: dict[int, int] = {}  # Slot per displayed card index, kept along `_grid_slots`
+        self._nb_cards_on_grid = 0
+
+        # Deck of card indices (default range 0~80, 81 values), read from `_deck_cursor` onward. It's
+        # shuffled as it's drawn (see _draw_cards): a variant deck holds up to 279936 cards, too many
+        # to shuffle upfront on every deal. Lazy decks are too big to be listed at all: they are
+        # drawn through a keyed permutation of the card indices instead.
+        self._shuffled_cards_id_in_deck: array[int] | KeyedPermutation = array(self._full_deck.typecode)
+        self._deck_cursor = 0
+
+        self._unique_sets: tuple[tuple[int, ...], ...] = ()  # Default game has a total of 1080 unique sets
         self._unique_sets_on_grid: list[list[int]] = []
+        # Slots (bit s for slot s) holding a card drawn since _unique_sets_on_grid was last brought up to date
+        self._pending_mask = 0
 
-        self._init_all_cards()
         self.init_grid(find_all_unique_sets)
 
+    def get_state(self) -> dict[str, Any]:
+        """Returns the grid's state as plain JSON data (e.g. to persist a session).
+
+        The deck and the all-time sets are process-wide and rebuilt from the features by
+        :meth:`from_state`, and the shared generator stays shared: only this grid's own state is kept.
+
+        Returns:
+            dict[str, Any]: The state (see :meth:`from_state`).
+        """
+        shuffled = self._shuffled_cards_id_in_deck
+        return {
+            'features': [[feature.__name__, [flavor.name for flavor in feature]] for feature in self._features],
+            'rand': None if self._rand is _shared_rand else get_rand_state(self._rand),
+            'deck': shuffled.tolist() if isinstance(shuffled, array) else None,
+            'deck_keys': list(shuffled.keys) if isinstance(shuffled, KeyedPermutation) else None,
+            'deck_moves': [list(move) for move in shuffled.moves] if isinstance(shuffled, KeyedPermutation) else None,
+            'deck_cursor': self._deck_cursor,
+            'slots': self._grid_slots.tolist(),
+            'nb_cards_on_grid': self._nb_cards_on_grid,
+            'sets_on_grid': self._unique_sets_on_grid,
+            'pending_mask': self._pending_mask,
+            'all_time_sets': bool(self._unique_sets),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> 'Grid':
+        """Rebuilds a grid from :meth:`get_state`.
+
+        Args:
+            state (dict[str, Any]): The state.
+
+        Raises:
+            ValueError: If the features are not valid, or the cards don't fit them.
+
+        Returns:
+            Grid: The grid.
+        """
+        grid = cls.__new__(cls)
+        grid._rand = _shared_rand if state['rand'] is None else rand_from_state(state['rand'])
+        grid._features = [_feature_from_state(name, flavors) for name, flavors in state['features']]
+        if not grid._is_valid_features():
+            raise ValueError
+
+        grid._rows = len(grid._features[0])
+        grid._cols = len(grid._features)
+        grid._standard_nb_cards_on_grid = grid._rows * grid._cols
+        grid._max_nb_cards_on_grid = grid._standard_nb_cards_on_grid + grid._rows if grid._rows > 3 else None
+        grid._full_deck = get_deck(grid._features)
+        grid._empty_slot = grid._full_deck.size
+
+        if state['deck'] is not None:
+            grid._shuffled_cards_id_in_deck = array(grid._full_deck.typecode, state['deck'])
+        else:
+            grid._shuffled_cards_id_in_deck = KeyedPermutation.from_keys(
+                grid._full_deck.size, state['deck_keys'], state['deck_moves']
+            )
+        grid._deck_cursor = int(state['deck_cursor'])
+        grid._grid_slots = array(grid._full_deck.typecode, state['slots'])
+        grid._slot_of_card = {index: slot for slot, index in enumerate(grid._grid_slots) if index != grid._empty_slot}
+        grid._nb_cards_on_grid = int(state['nb_cards_on_grid'])
+        grid._unique_sets_on_grid = [[int(index) for index in card_set] for card_set in state['sets_on_grid']]
+        grid._pending_mask = int(state['pending_mask'])
+        grid._unique_sets = grid._full_deck.get_all_time_sets() if state['all_time_sets'] else ()
+
+        if len(grid._shuffled_cards_id_in_deck) != grid._full_deck.size or any(
+            card > grid._empty_slot for card in grid._grid_slots
+        ):
+            raise ValueError('Cards do not fit the features')
+        return grid
+
     #
     # INITIALISATION
     #
@@ -67,12 +209,6 @@ class Grid:
             return all(len(self._features[0]) == len(feature) for feature in self._features)
         return False
 
-    def _init_all_cards(self) -> None:
-        """Creates the cards of the deck."""
-        self._full_deck = sorted(
-            self._get_int_from_flavors(int2base(pos, self._rows)) for pos in range(self._rows**self._cols)
-        )
-
     def init_grid(self, find_all_unique_sets: bool = False) -> None:
         """Creates the playground: Card distribution, possible sets on the playground.
 
@@ -81,88 +217,161 @@ class Grid:
                 slower, but gives an exhaustive list of all the valid set if all the cards were on
                 the playground. Defaults to False.
         """
-        # Shuffle deck
-        self._shuffled_cards_id_in_deck = list(range(len(self._full_deck)))
-        self._rand.shuffle(self._shuffled_cards_id_in_deck)
+        # Shuffle deck (a listed one is shuffled as it's drawn)
+        if self._full_deck.lazy:
+            self._shuffled_cards_id_in_deck = KeyedPermutation(self._full_deck.size, self._rand)
+        else:
+            self._shuffled_cards_id_in_deck = array(self._full_deck.typecode, range(self._full_deck.size))
+        self._deck_cursor = 0
 
         # Create the grid
-        self._cards_on_grid = [
-            self._full_deck[card_id] for card_id in self._shuffled_cards_id_in_deck[: self._standard_nb_cards_on_grid]
-        ]
-        del self._shuffled_cards_id_in_deck[: self._standard_nb_cards_on_grid]
+        self._grid_slots = array(self._full_deck.typecode)
+        self._slot_of_card = {}
+        self._nb_cards_on_grid = 0
+        self._unique_sets_on_grid = []
+        self._pending_mask = 0
+        self._draw_cards(self._standard_nb_cards_on_grid)
 
         # Find all the possible valid set
         if find_all_unique_sets:
-            self._unique_sets = self._find_all_valid_set_from(self._full_deck)
-
-        # Find all possible valid set from the current grid
-        self._unique_sets_on_grid = self._find_all_valid_set_from(self._cards_on_grid)
+            self._unique_sets = self._full_deck.get_all_time_sets()
 
         # Draw 3 more cards as long as no set are found in the current grid
-        while not self._unique_sets_on_grid:
-            _ = self.draw_cards_if_possible()
-            self._unique_sets_on_grid = self._find_all_valid_set_from(self._cards_on_grid)
+        while not self.has_unique_sets_on_grid():
+            if not self.draw_cards_if_possible():
+                break
 
     #
     # TOOLS
     #
 
-    def _get_int_from_flavors(self, flavors: str) -> int:
-        """Converts a string of numbers (base 2~9) into an integer (same base with a twist).
+    def _to_indices(self, card_set: list[int]) -> list[int] | None:
+        """Converts legacy flavor ints (API side) into dense card indices.
 
-        This function is necessary as it uses a convenient trick to avoid the loss of the
-        0-padded values. Each unit represents a flavor.
+        Args:
+            card_set (list[int]): Legacy flavor ints.
+
+        Returns:
+            list[int] | None: Dense card indices, or None if any card isn't part of the deck.
+        """
+        indices = []
+        for card in card_set:
+            index = self._full_deck.index_of(card)
+            if index is None:
+                return None
+            indices.append(index)
+        return indices
+
+    def _to_cards(self, indices: list[int]) -> list[int]:
+        """Converts dense card indices into legacy flavor ints (API side).
 
         Args:
-            flavors (str): Flavors.
+            indices (list[int]): Dense card indices.
 
         Returns:
-            int: Flavors to integer.
+            list[int]: Legacy flavor ints.
         """
-        return int(flavors) + self._twist
+        return [self._full_deck.card_of(index) for index in indices]
 
-    def _is_valid_set(self, card_set: list[int]) -> bool:
-        """Sanity check for a set.
+    def _draw_cards(self, nb_cards: int, stacked: bool = False) -> int:
+        """Moves cards from the top of the pile onto the playground, filling empty slots first.
 
-        Abides by the following rule: If you can sort a group of X cards into "X - 1 of ____ and
-        1 of ____", then it is not a set.
+        A listed pile is shuffled one card at a time: each drawn card is first swapped with a random
+        card still in the pile (a Fisher-Yates shuffle spread over the draws).
 
         Args:
-            card_set (list[int]): List of integers which represents a card's flavor.
+            nb_cards (int): How many cards to draw (fewer are drawn if the pile runs out).
+            stacked (bool, optional): Whether to draw the top cards as they are, e.g. a set stacked
+                on the pile (see :meth:`_stack_set_on_pile`). Defaults to False.
 
         Returns:
-            bool: True if valid, False if not.
+            int: Number of cards actually drawn.
         """
-        grouped_flavors = []
-        any_sub_valid = False
+        pile = self._shuffled_cards_id_in_deck
+        nb_drawn = min(nb_cards, len(pile) - self._deck_cursor)
+        slot = 0
+
+        for _ in range(nb_drawn):
+            if not stacked and isinstance(pile, array):
+                swap = self._rand.randrange(self._deck_cursor, len(pile))
+                pile[self._deck_cursor], pile[swap] = pile[swap], pile[self._deck_cursor]
+            index = pile[self._deck_cursor]
+            self._deck_cursor = self._deck_cursor + 1
+
+            while slot < len(self._grid_slots) and self._grid_slots[slot] != self._empty_slot:
+                slot = slot + 1
+            if slot < len(self._grid_slots):
+                self._grid_slots[slot] = index
+            else:
+                self._grid_slots.append(index)
+            self._slot_of_card[index] = slot
 
-        for card in card_set:
-            grouped_flavors.append([*str(card)])
+            self._nb_cards_on_grid = self._nb_cards_on_grid + 1
+            self._pending_mask = self._pending_mask | 1 << slot
 
-        # Equivalent to np.transpose(grouped_flavors)
-        grouped_flavors = [[row[i] for row in grouped_flavors] for i in range(len(grouped_flavors[0]))]
-        for flavor in grouped_flavors:
-            flavor_count = list(flavor).count(most_frequent_flavor(list(flavor)))
-            any_sub_valid = any_sub_valid or flavor_count not in (1, self._rows)
+        return nb_drawn
 
-        return not any_sub_valid
+    def _split_pending_cards(self) -> tuple[list[int], list[int]]:
+        """Splits the displayed cards into the ones already accounted for and the pending ones.
 
-    def _find_all_valid_set_from(self, card_list: list[int]) -> list[list[int]]:
-        """Returns a list of all the valid set from a list of cards.
+        Returns:
+            tuple[list[int], list[int]]: Cards already reflected in ``_unique_sets_on_grid``, then
+            cards drawn since (see :attr:`_pending_mask`), both in slot order.
+        """
+        settled_cards: list[int] = []
+        pending_cards: list[int] = []
+
+        for slot, index in enumerate(self._grid_slots):
+            if index == self._empty_slot:
+                continue
+            if self._pending_mask >> slot & 1:
+                pending_cards.append(index)
+            else:
+                settled_cards.append(index)
+
+        return settled_cards, pending_cards
+
+    def _are_indices_on_grid(self, indices: list[int]) -> bool:
+        """Checks that the provided cards are exactly one set's worth of distinct, displayed cards.
 
         Args:
-            card_list (list[int]): List of cards (possibly a playground).
+            indices (list[int]): Dense card indices.
 
         Returns:
-            list[list[int]]: Either an empty list or a list of all the valid set found.
+            bool: True if playable, False if not (wrong length, duplicates, or any card not displayed).
         """
-        all_valid_sets = []
+        if len(indices) != self._rows or len(set(indices)) != self._rows:
+            return False
 
-        for card_set in combinations(card_list, self._rows):
-            if self._is_valid_set(list(card_set)):
-                all_valid_sets.append(sorted(card_set))
+        return all(index in self._slot_of_card for index in indices)
 
-        return all_valid_sets
+    def _is_valid_set(self, card_set: list[int]) -> bool:
+        """Sanity check for a set.
+
+        Abides by the following rule: If you can sort a group of X cards into "X - 1 of ____ and
+        1 of ____", then it is not a set -- see :meth:`pyset.modules.game.deck.Deck.is_valid_set`.
+
+        Args:
+            card_set (list[int]): List of dense card indices.
+
+        Returns:
+            bool: True if valid, False if not.
+        """
+        return self._full_deck.is_valid_set(card_set)
+
+    def _find_all_valid_set_from(self, card_list: list[int], start: int = 0) -> list[list[int]]:
+        """Returns a list of all the valid set from a list of cards.
+
+        Args:
+            card_list (list[int]): List of dense card indices (possibly a playground).
+            start (int, optional): Only return the sets using at least one card from
+                ``card_list[start:]``. Defaults to 0 (every set).
+
+        Returns:
+            list[list[int]]: Either an empty list or a list of all the valid set found (as sorted
+            dense card indices).
+        """
+        return self._full_deck.find_sets(card_list, start)
 
     def _split_list(self, list_to_split: list[int], chunk_size: int) -> list[list[int]]:
         """Returns a list of list of a desired lenght.
@@ -194,23 +403,34 @@ class Grid:
         Returns:
             list[int]: List of cards.
         """
-        return list(self._cards_on_grid)
+        return [self._full_deck.card_of(index) for index in self._grid_slots if index != self._empty_slot]
+
+    def are_cards_on_grid(self, card_set: list[int]) -> bool:
+        """Checks, in constant time, whether `card_set` is a playable selection of displayed cards.
+
+        Playable means: exactly as many cards as a set holds, no card twice, and every card currently
+        on the playground. Whether the cards actually form a set is *not* checked here.
+
+        Args:
+            card_set (list[int]): Cards to look for.
+
+        Returns:
+            bool: True if playable, False if not.
+        """
+        indices = self._to_indices(card_set)
+        return indices is not None and self._are_indices_on_grid(indices)
 
     def get_size_all_time_unique_sets(self) -> int:
         """Returns the number of possible sets one can make from the whole deck.
 
+        Counted straight from the structure of a set (see
+        :meth:`pyset.modules.game.deck.Deck.count_all_time_sets`), so it is exact for every variant
+        and never builds a single set.
+
         Returns:
             int: Number of possible sets from the whole deck.
         """
-        n = self._rows**self._cols
-        sub_valid = 0
-
-        cptr = self._rows - 1
-        while cptr >= 2:
-            sub_valid = sub_valid + math.comb(n, cptr)
-            cptr = cptr - 1
-
-        return int(sub_valid / self._rows)
+        return self._full_deck.count_all_time_sets()
 
     def get_all_time_unique_sets(self) -> list[list[int]]:
         """Returns all the unique set(s) that can be made from the whole deck.
@@ -218,7 +438,31 @@ class Grid:
         Returns:
             list[list[int]]: List of all the unique set(s) that can be made from the whole deck.
         """
-        return [card_set[:] for card_set in self._unique_sets]
+        return [self._to_cards(list(card_set)) for card_set in self._unique_sets]
+
+    def iter_all_time_unique_sets(self) -> Iterator[list[int]]:
+        """Lazily yields all the unique set(s) that can be made from the whole deck.
+
+        Streaming counterpart of :meth:`get_all_time_unique_sets` that works whether or not the
+        grid was built with ``find_all_unique_sets``, and in constant memory -- use it for the
+        larger variants, whose full set list would not fit in memory.
+
+        Yields:
+            list[int]: One unique set (sets come in no particular order).
+        """
+        for card_set in self._full_deck.iter_all_time_sets():
+            yield self._to_cards(list(card_set))
+
+    def sample_all_time_unique_sets(self, nb_sets: int) -> list[list[int]]:
+        """Draws unique sets uniformly at random (with replacement) among the whole deck's sets.
+
+        Args:
+            nb_sets (int): How many sets to draw.
+
+        Returns:
+            list[list[int]]: The drawn sets.
+        """
+        return [self._to_cards(list(self._full_deck.sample_all_time_set(self._rand))) for _ in range(nb_sets)]
 
     def get_unique_sets_on_grid(self) -> list[list[int]]:
         """Returns the unique set(s) found from the playground.
@@ -226,18 +470,47 @@ class Grid:
         Returns:
             list[list[int]]: List of the unique set(s) found from the playground.
         """
-        return [card_set[:] for card_set in self._unique_sets_on_grid]
+        self.update_unique_sets_on_grid()
+        return [self._to_cards(card_set) for card_set in self._unique_sets_on_grid]
 
     def has_unique_sets_on_grid(self) -> bool:
         """Cheaply checks whether at least one valid set exists on the playground.
 
         Prefer this over ``bool(get_unique_sets_on_grid())`` when the actual sets aren't needed --
-        it skips copying the (potentially large) list of sets just to test for emptiness.
+        it never builds any set list: a set already known on the grid answers straight away,
+        otherwise only the cards drawn since the last update are checked, stopping at the first set
+        found (see :meth:`pyset.modules.game.deck.Deck.has_set`).
 
         Returns:
             bool: True if at least one valid set is on the grid, False otherwise.
         """
-        return bool(self._unique_sets_on_grid)
+        if self._unique_sets_on_grid:
+            return True
+
+        if not self._pending_mask:
+            return False
+
+        settled_cards, pending_cards = self._split_pending_cards()
+        if self._full_deck.has_set(settled_cards + pending_cards, len(settled_cards)):
+            return True
+
+        # No set at all on the grid: the (empty) list is exact again, no need to look twice
+        self._pending_mask = 0
+        return False
+
+    def count_unique_sets_on_grid(self) -> int:
+        """Counts the unique set(s) on the playground without copying (or building) the set lists.
+
+        Returns:
+            int: Number of valid sets on the grid.
+        """
+        if not self._pending_mask:
+            return len(self._unique_sets_on_grid)
+
+        settled_cards, pending_cards = self._split_pending_cards()
+        return len(self._unique_sets_on_grid) + self._full_deck.count_sets(
+            settled_cards + pending_cards, len(settled_cards)
+        )
 
     def get_number_cards_left_in_deck(self) -> int:
         """Returns the amount of cards left in the drawing pile.
@@ -245,11 +518,28 @@ class Grid:
         Returns:
             int: Cards left.
         """
-        return len(self._shuffled_cards_id_in_deck)
+        return len(self._shuffled_cards_id_in_deck) - self._deck_cursor
 
     def update_unique_sets_on_grid(self) -> None:
-        """Update the list of unique set(s) found from the playground."""
-        self._unique_sets_on_grid = self._find_all_valid_set_from(self._cards_on_grid)
+        """Update the list of unique set(s) found from the playground.
+
+        The list is maintained incrementally: a fold already dropped the sets that used the folded
+        cards (see :meth:`fold_cards_if_possible`), so only the sets involving a card drawn since
+        the last update are left to find. A no-op if no card was drawn in the meantime. Readers
+        (:meth:`get_unique_sets_on_grid`, :meth:`has_unique_sets_on_grid`) call this themselves.
+        """
+        if not self._pending_mask:
+            return
+
+        settled_cards, pending_cards = self._split_pending_cards()
+        new_sets = self._find_all_valid_set_from(settled_cards + pending_cards, len(settled_cards))
+        self._pending_mask = 0
+
+        # Keep the same order a full scan of the displayed cards would give (see Deck.find_sets)
+        self._unique_sets_on_grid = sorted(
+            self._unique_sets_on_grid + new_sets,
+            key=lambda card_set: sorted(self._slot_of_card[index] for index in card_set),
+        )
 
     def is_missing_cards_on_grid(self) -> bool:
         """Checks if the default amount of cards to be expected on the grid is met.
@@ -257,42 +547,88 @@ class Grid:
         Returns:
             bool: True if cards should be added, False if not.
         """
-        return len(self._cards_on_grid) < self._standard_nb_cards_on_grid
+        return self._nb_cards_on_grid < self._standard_nb_cards_on_grid
 
     def draw_cards_if_possible(self) -> bool:
         """Draws cards from the pile if any card are left in the pile.
 
+        The drawn cards take the empty slots left by the last fold first (see :meth:`_draw_cards`).
+
+        On variants, a grid with no set doesn't keep growing until one shows up: once this draw
+        would take it to ``_max_nb_cards_on_grid`` cards, a set is stacked on top of the pile first
+        (see :meth:`_stack_set_on_pile`), so the drawn cards make one.
+
         Returns:
             bool: True if successful, False if not.
         """
-        if self._shuffled_cards_id_in_deck:
-            self._cards_on_grid = self._cards_on_grid + [
-                self._full_deck[card_id] for card_id in self._shuffled_cards_id_in_deck[: self._rows]
-            ]
-            del self._shuffled_cards_id_in_deck[: self._rows]
+        stacked = (
+            self._max_nb_cards_on_grid is not None
+            and self._nb_cards_on_grid + self._rows >= self._max_nb_cards_on_grid
+            and not self.has_unique_sets_on_grid()
+            and self._stack_set_on_pile()
+        )
+        return self._draw_cards(self._rows, stacked) > 0
+
+    def _stack_set_on_pile(self) -> bool:
+        """Moves the cards of a random set to the top of the pile, for the next draw to show them.
+
+        The set is built around a random card of the pile (see
+        :meth:`pyset.modules.game.deck.Deck.sample_set_with`), and only kept if every one of its
+        cards is still in the pile. Near the end of the pile, where most sets have a card already
+        drawn, this may give up after ``_NB_STACKING_TRIES`` tries. A lazy pile finds the position
+        of a card and swaps cards just like a listed one (see :class:`KeyedPermutation`).
+
+        Returns:
+            bool: True if a set was stacked, False if not.
+        """
+        pile = self._shuffled_cards_id_in_deck
+        if len(pile) - self._deck_cursor < self._rows:
+            return False
+
+        for _ in range(_NB_STACKING_TRIES):
+            anchor = pile[self._rand.randrange(self._deck_cursor, len(pile))]
+            card_set = self._full_deck.sample_set_with(anchor, self._rand)
+            try:
+                for top, index in enumerate(card_set, self._deck_cursor):
+                    position = pile.index(index, self._deck_cursor)
+                    pile[top], pile[position] = pile[position], pile[top]
+            except ValueError:
+                continue  # Already drawn (the cards swapped so far are still in the pile: no harm done)
             return True
+
         return False
 
     def fold_cards_if_possible(self, card_set: list[int]) -> bool:
         """Folds cards in the provided set from the playground if the set is valid.
 
+        The sets that used any of the folded cards are dropped from the on-grid set list right away;
+        the others are still valid, so nothing needs to be recomputed.
+
         Args:
             card_set (list[int]): Supposedly valid set.
 
         Returns:
             bool: True if successful, False if not.
         """
-        # Ordered from cheapest to most expensive so an obviously-invalid card_set (empty, wrong
-        # length, not a real set) short-circuits before the O(len(card_set) * len(grid)) membership
-        # scan below.
-        if (
-            card_set
-            and self._cards_on_grid
-            and self._is_valid_set(card_set)
-            and all(card in self._cards_on_grid for card in card_set)
-        ):
-            for card in card_set:
-                self._cards_on_grid.remove(card)
+        indices = self._to_indices(card_set)
+
+        # Ordered from cheapest to most expensive: a card_set that can't even be played (unknown
+        # card, wrong length, duplicates, not displayed) short-circuits before the set validation.
+        if indices is not None and self._are_indices_on_grid(indices) and self._is_valid_set(indices):
+            for index in indices:
+                slot = self._slot_of_card.pop(index)
+                self._grid_slots[slot] = self._empty_slot
+                self._pending_mask = self._pending_mask & ~(1 << slot)
+            self._nb_cards_on_grid = self._nb_cards_on_grid - len(indices)
+
+            # Trailing empty slots have nothing left to keep in place
+            while self._grid_slots and self._grid_slots[-1] == self._empty_slot:
+                _ = self._grid_slots.pop()
+
+            folded_cards = set(indices)
+            self._unique_sets_on_grid = [
+                card_set for card_set in self._unique_sets_on_grid if folded_cards.isdisjoint(card_set)
+            ]
             return True
         return False
 
@@ -332,7 +668,7 @@ def main(full_init_start: bool = False) -> None:
 
     # This is the main loop. The game keeps going as long as there are cards to draw and sets that can be made
     while set_grid.get_number_cards_left_in_deck() != 0 or set_grid.has_unique_sets_on_grid():
-        print(f'Found {len(set_grid.get_unique_sets_on_grid())} possible set')
+        print(f'Found {set_grid.count_unique_sets_on_grid()} possible set')
         print(f'There are {set_grid.get_number_cards_left_in_deck()} cards left to draw')
 
         # Time to check if there is at least a set that can be made from the cards laid one the playground
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+
+Headless simulator: plays complete games between AI players, as fast as the engine allows (no
+sleep, no print), and streams one :class:`GameRecord` per game. Games are spread over a process
+pool; each game is seeded from the simulation seed and its own index, so a simulation is
+reproducible whatever the number of workers.
+
+Usage: ``python -m pyset.modules.game.simulator --games 100000 --workers 8 --seed 42``
+"""
+
+import argparse
+import collections
+import dataclasses
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from pyset.modules.game.clock import VirtualClock
+from pyset.modules.game.game import Game, GameState
+from pyset.modules.game.set import Grid
+
+
+@dataclasses.dataclass(slots=True, kw_only=True)
+class GameRecord:
+    """Outcome of one simulated game."""
+
+    game_index: int
+    sets_found: int = 0
+    extra_draws: int = 0  # Draws made while the grid already held its standard number of cards
+    max_cards_on_grid: int = 0
+    cards_left_on_grid: int = 0  # End-of-game leftovers
+    virtual_duration: float = 0.0  # Seconds of (simulated) AI thinking time
+    grid_time: dict[str, float] = dataclasses.field(default_factory=dict)  # Seconds spent per Grid method
+
+
+class TimedGrid(Grid):
+    """A :class:`pyset.modules.game.set.Grid` that times its public methods and counts extra draws.
+
+    Times are wall-clock and inclusive: a method calling another one (e.g.
+    :meth:`get_unique_sets_on_grid` bringing the set list up to date) also accounts for it.
+    """
+
+    __slots__ = ('extra_draws', 'max_cards_on_grid', 'timings')
+
+    timed_methods = (
+        'init_grid',
+        'draw_cards_if_possible',
+        'fold_cards_if_possible',
+        'get_unique_sets_on_grid',
+        'has_unique_sets_on_grid',
+        'update_unique_sets_on_grid',
+    )
+
+    def __init__(self, rand: random.Random):
+        """Initializes a TimedGrid (standard features).
+
+        Args:
+            rand (random.Random): Source of randomness of the game.
+        """
+        self.timings = dict.fromkeys(self.timed_methods, 0.0)
+        self.extra_draws = 0
+        self.max_cards_on_grid = 0
+        super().__init__(rand=rand)
+
+    def _timed[**P, R](self, name: str, method: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        """Runs a method, adding its duration to :attr:`timings`.
+
+        Args:
+            name (str): Timed method name.
+            method (Callable[P, R]): Bound method to run.
+            *args (P.args): Positional arguments of the method.
+            **kwargs (P.kwargs): Keyword arguments of the method.
+
+        Returns:
+            R: What the method returned.
+        """
+        tic = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.timings[name] = self.timings[name] + time.perf_counter() - tic
+
+    def init_grid(self, find_all_unique_sets: bool = False) -> None:
+        """Timed :meth:`pyset.modules.game.set.Grid.init_grid`."""
+        self._timed('init_grid', super().init_grid, find_all_unique_sets)
+
+    def draw_cards_if_possible(self) -> bool:
+        """Timed :meth:`pyset.modules.game.set.Grid.draw_cards_if_possible`."""
+        if not self.is_missing_cards_on_grid():
+            self.extra_draws = self.extra_draws + 1
+        drawn = self._timed('draw_cards_if_possible', super().draw_cards_if_possible)
+        self.max_cards_on_grid = max(self.max_cards_on_grid, self._nb_cards_on_grid)
+        return drawn
+
+    def fold_cards_if_possible(self, card_set: list[int]) -> bool:
+        """Timed :meth:`pyset.modules.game.set.Grid.fold_cards_if_possible`."""
+        return self._timed('fold_cards_if_possible', super().fold_cards_if_possible, card_set)
+
+    def get_unique_sets_on_grid(self) -> list[list[int]]:
+        """Timed :meth:`pyset.modules.game.set.Grid.get_unique_sets_on_grid`."""
+        return self._timed('get_unique_sets_on_grid', super().get_unique_sets_on_grid)
+
+    def has_unique_sets_on_grid(self) -> bool:
+        """Timed :meth:`pyset.modules.game.set.Grid.has_unique_sets_on_grid`."""
+        return self._timed('has_unique_sets_on_grid', super().has_unique_sets_on_grid)
+
+    def update_unique_sets_on_grid(self) -> None:
+        """Timed :meth:`pyset.modules.game.set.Grid.update_unique_sets_on_grid`."""
+        self._timed('update_unique_sets_on_grid', super().update_unique_sets_on_grid)
+
+
+def play_game(
+    seed: int, game_index: int, nb_players: int = 2, think_time: tuple[float, float] = (3.0, 5.0)
+) -> GameRecord:
+    """Plays one complete game between AI players.
+
+    Each turn, a random AI player finds a set after a random thinking time, then the game draws
+    cards as needed -- until the game ends. The game runs on a
+    :class:`pyset.modules.game.clock.VirtualClock`: thinking times are skipped, never slept, yet
+    answer times and penalties behave as in a real game.
+
+    Args:
+        seed (int): Simulation seed.
+        game_index (int): Index of the game in the simulation (the game's seed derives from both).
+        nb_players (int, optional): Number of AI players. Defaults to 2.
+        think_time (tuple[float, float], optional): Min/max thinking time per turn, in seconds.
+            Defaults to (3.0, 5.0).
+
+    Returns:
+        GameRecord: Outcome of the game.
+    """
+    rand = random.Random(f'{seed}-{game_index}')
+    grid = TimedGrid(rand)
+    clock = VirtualClock()
+    game = Game(grid, rand=rand, clock=clock)
+    for player_id in range(nb_players):
+        _ = game.add_player(f'bot-{player_id}', is_ai=True)
+    player_names = [player.name for player in game.get_players()]
+
+    record = GameRecord(game_index=game_index)
+    game.update_game()
+    while game.get_game_state() != GameState.ENDED.name:
+        _ = clock.advance(rand.uniform(*think_time))
+        if game.submit_set_from_player_name(rand.choice(player_names)).status:
+            record.sets_found = record.sets_found + 1
+        game.update_game()
+
+    record.virtual_duration = clock.now()
+    record.extra_draws = grid.extra_draws
+    record.max_cards_on_grid = grid.max_cards_on_grid
+    record.cards_left_on_grid = len(grid.get_displayed_cards())
+    record.grid_time = grid.timings
+    return record
+
+
+def _play_games(seed: int, game_indices: range, nb_players: int) -> list[GameRecord]:
+    """Plays a batch of games, in a worker process.
+
+    Args:
+        seed (int): Simulation seed.
+        game_indices (range): Indices of the games to play.
+        nb_players (int): Number of AI players per game.
+
+    Returns:
+        list[GameRecord]: Outcome of each game, in order.
+    """
+    return [play_game(seed, game_index, nb_players) for game_index in game_indices]
+
+
+def simulate(
+    nb_games: int, seed: int = 0, nb_workers: int | None = None, nb_players: int = 2, batch_size: int = 100
+) -> Iterator[GameRecord]:
+    """Plays `nb_games` complete games over a process pool, streaming their records in game order.
+
+    Games are handed out to the workers by batches, and only a couple of batches per worker are
+    in flight at any time: memory stays flat whatever `nb_games`.
+
+    Args:
+        nb_games (int): Number of games to play.
+        seed (int, optional): Simulation seed. Defaults to 0.
+        nb_workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+        nb_players (int, optional): Number of AI players per game. Defaults to 2.
+        batch_size (int, optional): Number of games per task sent to a worker. Defaults to 100.
+
+    Yields:
+        GameRecord: Outcome of each game.
+    """
+    batches = (range(start, min(start + batch_size, nb_games)) for start in range(0, nb_games, batch_size))
+
+    with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+        max_in_flight = 2 * (nb_workers or os.cpu_count() or 1)
+        in_flight: collections.deque[Future[list[GameRecord]]] = collections.deque()
+
+        for batch in batches:
+            in_flight.append(executor.submit(_play_games, seed, batch, nb_players))
+            if len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def main() -> None:
+    """Runs a simulation from the command line, printing one JSON record per game."""
+    parser = argparse.ArgumentParser(description='Plays complete AI-only games, headless, as fast as possible.')
+    _ = parser.add_argument('-n', '--games', type=int, default=1000, help='Number of games to play')
+    _ = parser.add_argument('-s', '--seed', type=int, default=0, help='Simulation seed')
+    _ = parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    _ = parser.add_argument('-p', '--players', type=int, default=2, help='AI players per game')
+    args = parser.parse_args()
+
+    for record in simulate(args.games, args.seed, args.workers, args.players):
+        _ = sys.stdout.write(json.dumps(dataclasses.asdict(record)) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@
 """
 
 import importlib.metadata
+from typing import Literal
 
 from pydantic import AliasChoices, BaseModel, Field
 from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
@@ -43,6 +44,17 @@ class AppConfig(BaseSettings):
     max_sessions: int = Field(default=10, alias='MAX_SESSIONS')
     session_name_max_chars: int = Field(default=36, alias='SESSION_NAME_MAX_CHARS')
     session_ttl_seconds: int = Field(default=1800, alias='SESSION_TTL_SECONDS')
+    # 'lru': once full, admit a new session by evicting the least recently used one, if idle for
+    # at least `session_lru_idle_seconds`. 'ttl': only expired sessions ever make room.
+    session_eviction_policy: Literal['ttl', 'lru'] = Field(default='ttl', alias='SESSION_EVICTION_POLICY')
+    session_lru_idle_seconds: int = Field(default=300, alias='SESSION_LRU_IDLE_SECONDS')
+    # How long a request waits for a busy session before giving up with SESSION_BUSY (negative: forever)
+    session_lock_timeout_seconds: float = Field(default=5.0, alias='SESSION_LOCK_TIMEOUT_SECONDS')
+    # 'sqlite': sessions survive restarts, persisted (write-behind) to `session_db_path`.
+    # 'redis': sessions live in the Redis server at `session_redis_url`, shared by every worker
+    session_backend: Literal['memory', 'sqlite', 'redis'] = Field(default='memory', alias='SESSION_BACKEND')
+    session_db_path: str = Field(default='pyset_sessions.sqlite3', alias='SESSION_DB_PATH')
+    session_redis_url: str = Field(default='redis://127.0.0.1:6379/0', alias='SESSION_REDIS_URL')
     max_players: int = Field(default=4, alias='MAX_PLAYERS')
     player_name_max_chars: int = Field(default=12, alias='PLAYER_NAME_MAX_CHARS')
     submit_timeout_seconds: int = Field(default=10, alias='SUBMIT_TIMEOUT_SECONDS')
@@ -6,10 +6,11 @@
 """
 
 import enum
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field, RootModel
 
-from pyset.modules.game.models import PlayerStats
+from pyset.modules.game import models as game_models
 
 
 class ApiError(enum.StrEnum):
@@ -30,6 +31,7 @@ class ApiError(enum.StrEnum):
     SET_NOT_FOUND = 'SET_NOT_FOUND'
     CARDS_NOT_FOUND = 'CARDS_NOT_FOUND'
     INVALID_SECRET = 'INVALID_SECRET'
+    SESSION_BUSY = 'SESSION_BUSY'
     INTERNAL_ERROR = 'INTERNAL_ERROR'
 
 
@@ -53,11 +55,18 @@ class DeleteRunningGamesRequest(BaseModel):
     secret: str = ''
 
 
+class LockMetricsRequest(BaseModel):
+    """Payload for the admin ``get_lock_metrics`` endpoint."""
+
+    secret: str = ''
+
+
 class AddPlayerRequest(BaseGameRequest):
-    """Payload for ``add_player``."""
+    """Payload for ``add_player``. Setting a ``difficulty`` adds an AI player, played by the server."""
 
     name: str = ''
     color: str = '#000000'
+    difficulty: Literal['easy', 'normal', 'hard'] | None = None
 
 
 class RemovePlayerRequest(BaseGameRequest):
@@ -115,6 +124,12 @@ class VersionResponse(ApiResponse):
     version: str = ''
 
 
+class LockMetricsResponse(ApiResponse):
+    """Response for ``get_lock_metrics``: session lock contention, overall and per hot session."""
+
+    metrics: dict[str, Any] = {}
+
+
 class RunningGameInfo(BaseModel):
     """Public summary of a single running game session."""
 
@@ -128,6 +143,44 @@ class RunningGamesResponse(ApiResponse):
     games: list[RunningGameInfo] = []
 
 
+class PlayerStats(BaseModel):
+    """Wire shape of :class:`pyset.modules.game.models.PlayerStats`."""
+
+    name: str
+    color: str = '#000000'
+    is_ai: bool = False
+    difficulty: str | None = None
+    calls: int = 0
+    number_invalid_sets: int = 0
+    number_valid_sets: int = 0
+    valid_sets: list[list[int]] = []
+    average_answers_time: int = 0
+    answers_time: list[int] = []
+
+    @classmethod
+    def from_stats(cls, stats: game_models.PlayerStats) -> 'PlayerStats':
+        """Wraps an engine stats snapshot, without validation (the engine built it, types hold).
+
+        Args:
+            stats (game_models.PlayerStats): Engine-side snapshot.
+
+        Returns:
+            PlayerStats: Wire model, sharing the snapshot's lists.
+        """
+        return cls.model_construct(
+            name=stats.name,
+            color=stats.color,
+            is_ai=stats.is_ai,
+            difficulty=stats.difficulty,
+            calls=stats.calls,
+            number_invalid_sets=stats.number_invalid_sets,
+            number_valid_sets=stats.number_valid_sets,
+            valid_sets=stats.valid_sets,
+            average_answers_time=stats.average_answers_time,
+            answers_time=stats.answers_time,
+        )
+
+
 class PlayersInfosResponse(ApiResponse):
     """Response for ``get_players_infos``, and the shape returned by add/remove player."""
 
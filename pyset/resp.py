@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+
+Just enough of the Redis protocol (RESP2) for :class:`pyset.session_backend.RedisBackend`: a
+pipelining client.
+"""
+
+import socket
+from collections.abc import Sequence
+from typing import Any, BinaryIO
+
+type RespArg = str | bytes | int | float
+
+
+class RespError(Exception):
+    """Error reply of the server (e.g. ``ERR unknown command``)."""
+
+
+def encode_command(args: Sequence[RespArg]) -> bytes:
+    """Encodes a command as a RESP array of bulk strings.
+
+    Args:
+        args (Sequence[RespArg]): Command name and arguments.
+
+    Returns:
+        bytes: The encoded command.
+    """
+    parts = [f'*{len(args)}\r\n'.encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%b\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+def read_reply(reader: BinaryIO) -> Any:
+    """Reads one RESP value.
+
+    Error replies are returned (not raised), so a pipeline can read every reply it's owed.
+
+    Args:
+        reader (BinaryIO): Buffered stream to read from.
+
+    Returns:
+        Any: str (status), bytes (bulk string), int, None (null), :class:`RespError`, or a list of those.
+
+    Raises:
+        ConnectionError: If the stream ended, or doesn't speak RESP.
+    """
+    line = reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed')
+
+    kind, value = line[:1], line[1:-2]
+    if kind == b'+':
+        return value.decode()
+    if kind == b'-':
+        return RespError(value.decode())
+    if kind == b':':
+        return int(value)
+    if kind == b'$':
+        if int(value) < 0:
+            return None
+        data = reader.read(int(value) + 2)
+        if len(data) != int(value) + 2:
+            raise ConnectionError('Connection closed')
+        return data[:-2]
+    if kind == b'*':
+        if int(value) < 0:
+            return None
+        return [read_reply(reader) for _ in range(int(value))]
+    raise ConnectionError(f'Not a RESP reply: {line!r}')
+
+
+class RespConnection:
+    """A connection to a Redis(-protocol) server. Not thread-safe: one per thread."""
+
+    def __init__(self, host: str, port: int, db: int = 0, timeout: float = 5.0):
+        """Initializes the RespConnection, connecting to the server.
+
+        Args:
+            host (str): Server host.
+            port (int): Server port.
+            db (int, optional): Database to select. Defaults to 0.
+            timeout (float, optional): Seconds to wait for the server, on every call. Defaults to 5.0.
+        """
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile('rb')
+        if db:
+            _ = self.execute('SELECT', db)
+
+    def execute(self, *args: RespArg) -> Any:
+        """Runs a single command.
+
+        Args:
+            *args (RespArg): Command name and arguments.
+
+        Returns:
+            Any: Its reply (see :func:`read_reply`).
+        """
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands: Sequence[Sequence[RespArg]]) -> list[Any]:
+        """Runs commands in one round trip: all are sent at once, then all replies are read.
+
+        Args:
+            commands (Sequence[Sequence[RespArg]]): Commands to run, in order.
+
+        Returns:
+            list[Any]: Their replies, in order.
+
+        Raises:
+            RespError: The first error reply, once every reply was read.
+        """
+        self._socket.sendall(b''.join(encode_command(command) for command in commands))
+        replies = [read_reply(self._reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self._reader.close()
+        self._socket.close()
@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+
+Session-affinity front process: owns the listening socket and forwards every request to one of
+several :mod:`pyset.server_app` worker processes, each keeping its sessions in its own
+:class:`pyset.session_store.SessionStore`. Requests are routed by the ``gameID`` of their body,
+on a consistent hash ring, so a session always lives in exactly one worker. Unless the workers share
+their sessions through Redis, each one gets a share of ``MAX_SESSIONS`` and, with SQLite, its own
+database file (see :func:`worker_settings`).
+
+Usage: ``python -m pyset.router -c config.json --workers 4 --port 10000``
+"""
+
+import argparse
+import bisect
+import dataclasses
+import hashlib
+import http.client
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+from pyset.modules.misc.helpers import StatusFunction
+from pyset.modules.misc.models import AppConfig
+from pyset.modules.web.models import ApiError, ApiResponse
+
+logger = logging.getLogger('Router')
+
+_API_PREFIX = '/api/app/'
+
+# Headers that only make sense for one connection (or that http.client/werkzeug set), never forwarded
+_UNFORWARDED_HEADERS = frozenset(
+    (
+        'connection',
+        'keep-alive',
+        'proxy-authenticate',
+        'proxy-authorization',
+        'te',
+        'trailers',
+        'transfer-encoding',
+        'upgrade',
+        'host',
+        'content-length',
+    )
+)
+
+
+class HashRing:
+    """Consistent hash ring: maps keys onto nodes, moving as few keys as possible when nodes come and go.
+
+    Every node is placed on the ring at `nb_replicas` points (hashes of ``<node>#<i>``); a key goes to
+    the node at the first point at or after the key's own hash, wrapping around. Removing a node only
+    moves its own keys, spread over the remaining nodes; adding it back moves exactly those back.
+
+    Hashes are BLAKE2b, not ``hash``: they have to agree across processes and restarts.
+    """
+
+    __slots__ = ('_nb_replicas', '_nodes', '_points')
+
+    def __init__(self, nodes: Iterable[str] = (), nb_replicas: int = 64):
+        """Initializes the HashRing.
+
+        Args:
+            nodes (Iterable[str], optional): Initial nodes. Defaults to ().
+            nb_replicas (int, optional): Points per node: more spread the keys more evenly.
+                Defaults to 64.
+        """
+        self._nb_replicas = nb_replicas
+        self._points: list[tuple[int, str]] = []  # (hash, node), sorted
+        self._nodes: set[str] = set()
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """Returns the position of a key on the ring.
+
+        Args:
+            key (str): Key to place.
+
+        Returns:
+            int: Its position.
+        """
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+    @property
+    def nodes(self) -> list[str]:
+        """Nodes on the ring, sorted."""
+        return sorted(self._nodes)
+
+    def add(self, node: str) -> None:
+        """Places a node on the ring (no-op if already there).
+
+        Args:
+            node (str): Node to add.
+        """
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self._nb_replicas):
+            bisect.insort(self._points, (self._hash(f'{node}#{replica}'), node))
+
+    def remove(self, node: str) -> None:
+        """Takes a node off the ring (no-op if not there).
+
+        Args:
+            node (str): Node to remove.
+        """
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: str) -> str | None:
+        """Returns the node a key maps to.
+
+        Args:
+            key (str): Key to map.
+
+        Returns:
+            str | None: Its node, or None if the ring is empty.
+        """
+        if not self._points:
+            return None
+        index = bisect.bisect_left(self._points, (self._hash(key), ''))
+        return self._points[index % len(self._points)][1]
+
+
+class Router:
+    """WSGI application forwarding every request to the worker owning its session.
+
+    Session-scoped requests go to the worker ``gameID`` maps to on a :class:`HashRing` of the live
+    workers; requests without a ``gameID`` (static files, config...) go to any live worker, in turn.
+    Requests about every session -- listing, wiping them, lock metrics -- go to every live worker,
+    and their answers are merged.
+
+    A worker marked down (see :meth:`mark_down`) is taken off the ring: its sessions are lost with
+    it, and new ones are created on the worker next on the ring. Once it's back (see :meth:`mark_up`),
+    the sessions it owned map to it again -- while sessions created elsewhere meanwhile are left
+    behind, unreachable until they expire.
+    """
+
+    fan_out_endpoints = ('get_running_games', 'delete_running_games', 'get_lock_metrics')
+
+    def __init__(self, workers: Iterable[str], session_name_max_chars: int = 36, timeout: float = 30.0):
+        """Initializes the Router. Workers start marked up.
+
+        Args:
+            workers (Iterable[str]): ``host:port`` address of every worker.
+            session_name_max_chars (int, optional): Length workers truncate game ids to (see
+                :class:`pyset.modules.misc.models.AppConfig`): routing uses the same prefix.
+                Defaults to 36.
+            timeout (float, optional): Seconds to wait for a worker's answer. Defaults to 30.0.
+        """
+        self._ring = HashRing(workers)
+        self._ring_lock = threading.Lock()
+        self._session_name_max_chars = session_name_max_chars
+        self._timeout = timeout
+        self._counter = itertools.count()
+        self._local = threading.local()  # Per-thread keep-alive connections, by worker
+        self._executor = ThreadPoolExecutor(thread_name_prefix='router-fan-out')
+
+    @property
+    def live_workers(self) -> list[str]:
+        """Workers currently on the ring, sorted."""
+        with self._ring_lock:
+            return self._ring.nodes
+
+    def mark_up(self, worker: str) -> None:
+        """Puts a worker (back) on the ring.
+
+        Args:
+            worker (str): Worker address.
+        """
+        with self._ring_lock:
+            self._ring.add(worker)
+
+    def mark_down(self, worker: str) -> None:
+        """Takes a worker off the ring: its sessions are routed to the next workers on the ring.
+
+        Args:
+            worker (str): Worker address.
+        """
+        with self._ring_lock:
+            self._ring.remove(worker)
+
+    def worker_for(self, game_id: str) -> str | None:
+        """Returns the worker a session lives in.
+
+        Args:
+            game_id (str): Session id ('' for requests not about a session).
+
+        Returns:
+            str | None: Worker address, or None if no worker is up.
+        """
+        with self._ring_lock:
+            if game_id:
+                return self._ring.node_for(game_id[: self._session_name_max_chars])
+            nodes = self._ring.nodes
+        return nodes[next(self._counter) % len(nodes)] if nodes else None
+
+    def __call__(self, environ: dict[str, Any], start_response: Any) -> Iterable[bytes]:
+        """Serves one request (WSGI entry point).
+
+        Args:
+            environ (dict[str, Any]): WSGI environment.
+            start_response (Any): WSGI callback.
+
+        Returns:
+            Iterable[bytes]: Response body.
+        """
+        request = Request(environ)
+        body = request.get_data()
+
+        endpoint = request.path.removeprefix(_API_PREFIX).strip('/') if request.path.startswith(_API_PREFIX) else ''
+        if endpoint in self.fan_out_endpoints:
+            response = self._fan_out(endpoint, request, body)
+        else:
+            worker = self.worker_for(_game_id_of(request, body))
+            response = self._forward(worker, request, body) if worker is not None else _unavailable()
+        return response(environ, start_response)
+
+    def _connection(self, worker: str) -> http.client.HTTPConnection:
+        """Returns the calling thread's connection to a worker, opening it on first use.
+
+        Args:
+            worker (str): Worker address.
+
+        Returns:
+            http.client.HTTPConnection: The connection.
+        """
+        connections: dict[str, http.client.HTTPConnection] = self._local.__dict__.setdefault('connections', {})
+        if worker not in connections:
+            host, port = worker.rsplit(':', 1)
+            connections[worker] = http.client.HTTPConnection(host, int(port), timeout=self._timeout)
+        return connections[worker]
+
+    def _send(self, worker: str, request: Request, body: bytes) -> tuple[int, list[tuple[str, str]], bytes]:
+        """Sends a request to a worker, retrying once on a fresh connection (e.g. after a restart).
+
+        Args:
+            worker (str): Worker address.
+            request (Request): Request to forward.
+            body (bytes): Its body.
+
+        Returns:
+            tuple[int, list[tuple[str, str]], bytes]: Status, headers and body of the answer.
+
+        Raises:
+            OSError: If the worker couldn't be reached.
+        """
+        url = request.full_path if request.query_string else request.path
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _UNFORWARDED_HEADERS}
+
+        try:
+            return self._send_once(worker, request.method, url, body, headers)
+        except (OSError, http.client.HTTPException):
+            pass  # Most likely a keep-alive connection the worker closed: once more, on a fresh one
+
+        try:
+            return self._send_once(worker, request.method, url, body, headers)
+        except (OSError, http.client.HTTPException) as err:
+            raise OSError(f'Worker {worker} unreachable') from err
+
+    def _send_once(
+        self, worker: str, method: str, url: str, body: bytes, headers: dict[str, str]
+    ) -> tuple[int, list[tuple[str, str]], bytes]:
+        """Sends a request to a worker, dropping the connection if that fails.
+
+        Args:
+            worker (str): Worker address.
+            method (str): HTTP method.
+            url (str): Path and query string.
+            body (bytes): Request body.
+            headers (dict[str, str]): Request headers.
+
+        Returns:
+            tuple[int, list[tuple[str, str]], bytes]: Status, headers and body of the answer.
+        """
+        connection = self._connection(worker)
+        try:
+            connection.request(method, url, body=body, headers=headers)
+            answer = connection.getresponse()
+            return answer.status, answer.getheaders(), answer.read()
+        except Exception:
+            connection.close()
+            del self._local.connections[worker]
+            raise
+
+    def _forward(self, worker: str, request: Request, body: bytes) -> Response:
+        """Forwards a request to a worker, passing its answer on as is.
+
+        Args:
+            worker (str): Worker address.
+            request (Request): Request to forward.
+            body (bytes): Its body.
+
+        Returns:
+            Response: The worker's answer, or a 503 if it couldn't be reached.
+        """
+        try:
+            status, headers, payload = self._send(worker, request, body)
+        except OSError:
+            logger.exception('%s %s -- Forwarding failed', request.method, request.path)
+            return _unavailable()
+
+        return Response(
+            payload, status=status, headers=[item for item in headers if item[0].lower() not in _UNFORWARDED_HEADERS]
+        )
+
+    def _fan_out(self, endpoint: str, request: Request, body: bytes) -> Response:
+        """Sends a request to every live worker at once, merging their answers.
+
+        Args:
+            endpoint (str): One of :attr:`fan_out_endpoints`.
+            request (Request): Request to forward.
+            body (bytes): Its body.
+
+        Returns:
+            Response: The merged answer -- or the first error answered, if any worker refused
+            (e.g. a wrong admin secret), or a 503 if a worker couldn't be reached or answered garbage.
+        """
+        workers = self.live_workers
+        if not workers:
+            return _unavailable()
+
+        try:
+            answers = list(self._executor.map(lambda worker: self._send(worker, request, body), workers))
+        except OSError:
+            logger.exception('%s %s -- Forwarding failed', request.method, request.path)
+            return _unavailable()
+
+        payloads: list[dict[str, Any]] = []
+        for status, _, payload in answers:
+            try:
+                data = json.loads(payload) if status == 200 else None
+            except ValueError:
+                logger.exception('%s %s -- Unreadable answer from a worker', request.method, request.path)
+                return _unavailable()
+            if not isinstance(data, dict) or data.get('status') != StatusFunction.SUCCESS.name:
+                return Response(payload, status=status, mimetype='application/json')
+            payloads.append(data)
+
+        merged = payloads[0]
+        if endpoint == 'get_running_games':
+            merged['games'] = [game for data in payloads for game in data.get('games', [])]
+        elif endpoint == 'get_lock_metrics':
+            merged['metrics'] = _merge_lock_metrics([data.get('metrics', {}) for data in payloads])
+        return Response(json.dumps(merged), mimetype='application/json')
+
+
+def _game_id_of(request: Request, body: bytes) -> str:
+    """Extracts the game id of a request, the way the workers parse it (JSON body, or form).
+
+    Args:
+        request (Request): The request.
+        body (bytes): Its body.
+
+    Returns:
+        str: Its game id, '' if it has none.
+    """
+    data: Any = None
+    if request.mimetype == 'application/x-www-form-urlencoded':
+        data = {name: values[0] for name, values in parse_qs(body.decode(errors='replace')).items()}
+    elif body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return ''
+
+    if not isinstance(data, dict):
+        return ''
+    game_id = data.get('gameID', data.get('game_id', ''))
+    return game_id if isinstance(game_id, str) else ''
+
+
+def _merge_lock_metrics(metrics: list[dict[str, Any]]) -> dict[str, Any]:
+    """Merges the lock metrics of several workers (see :meth:`pyset.session_store.SessionStore.lock_metrics`).
+
+    Args:
+        metrics (list[dict[str, Any]]): Every worker's metrics.
+
+    Returns:
+        dict[str, Any]: Overall histograms and timeouts summed up, per-session metrics put together.
+    """
+
+    def merge_histograms(histograms: list[dict[str, Any]]) -> dict[str, Any]:
+        buckets: dict[str, int] = {}
+        for histogram in histograms:
+            for label, count in histogram.get('buckets', {}).items():
+                buckets[label] = buckets.get(label, 0) + count
+        return {
+            'count': sum(histogram.get('count', 0) for histogram in histograms),
+            'total_seconds': sum(histogram.get('total_seconds', 0.0) for histogram in histograms),
+            'buckets': buckets,
+        }
+
+    overall = [worker_metrics.get('global', {}) for worker_metrics in metrics]
+    return {
+        'global': {
+            'wait': merge_histograms([stats.get('wait', {}) for stats in overall]),
+            'hold': merge_histograms([stats.get('hold', {}) for stats in overall]),
+            'timeouts': sum(stats.get('timeouts', 0) for stats in overall),
+        },
+        'sessions': {
+            game_id: stats
+            for worker_metrics in metrics
+            for game_id, stats in worker_metrics.get('sessions', {}).items()
+        },
+    }
+
+
+def _unavailable() -> Response:
+    """Returns the answer to a request no worker could serve.
+
+    Returns:
+        Response: A 503, with an INTERNAL_ERROR envelope.
+    """
+    payload = ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.INTERNAL_ERROR)
+    return Response(payload.model_dump_json(by_alias=True), status=503, mimetype='application/json')
+
+
+@dataclasses.dataclass(slots=True, kw_only=True)
+class _Worker:
+    """One worker process slot: restarted workers keep their slot's port."""
+
+    address: str
+    port: int
+    settings: dict[str, str]  # Configuration overrides, see worker_settings
+    process: subprocess.Popen[bytes] | None = None
+    up: bool = False
+
+
+def worker_settings(conf: AppConfig, nb_workers: int) -> list[dict[str, str]]:
+    """Returns the configuration overrides of every worker, as environment variables (see AppConfig).
+
+    Workers don't share sessions, except through Redis, where ``MAX_SESSIONS`` already caps every
+    worker's sessions together. Otherwise, each worker gets its share of ``MAX_SESSIONS`` (at least
+    one session), and with SQLite, its own database file: ``SESSION_DB_PATH`` with the worker's
+    number before the extension. A restarted worker keeps its number, so it reloads its own sessions.
+
+    Args:
+        conf (AppConfig): Configuration the workers run with.
+        nb_workers (int): Number of workers.
+
+    Returns:
+        list[dict[str, str]]: Overrides of every worker, in order (none with a single worker).
+    """
+    if nb_workers == 1 or conf.session_backend == 'redis':
+        return [{} for _ in range(nb_workers)]
+
+    settings: list[dict[str, str]] = []
+    db_path = Path(conf.session_db_path)
+    for index in range(nb_workers):
+        share = conf.max_sessions // nb_workers + (index < conf.max_sessions % nb_workers)
+        overrides = {'MAX_SESSIONS': str(max(1, share))}
+        if conf.session_backend == 'sqlite':
+            overrides['SESSION_DB_PATH'] = str(db_path.with_name(f'{db_path.stem}.worker{index}{db_path.suffix}'))
+        settings.append(overrides)
+    return settings
+
+
+class WorkerPool:
+    """Runs the :mod:`pyset.server_app` worker processes of a :class:`Router`, restarting them as they die.
+
+    A background thread checks every worker each `check_interval` seconds: a worker that exited is
+    marked down on the router and started again; a worker that isn't marked up yet is once it answers
+    ``get_version``.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        config: str,
+        ports: Iterable[int],
+        settings: Iterable[dict[str, str]] | None = None,
+        check_interval: float = 1.0,
+    ):
+        """Initializes the WorkerPool. Workers only start with :meth:`start`.
+
+        Args:
+            router (Router): Router the workers serve, built for their addresses (``127.0.0.1:<port>``).
+            config (str): Path to the JSON configuration file the workers run with.
+            ports (Iterable[int]): Port of every worker.
+            settings (Iterable[dict[str, str]] | None, optional): Configuration overrides of every
+                worker, in the order of `ports` (see :func:`worker_settings`). Defaults to None (none).
+            check_interval (float, optional): Seconds between two checks of the workers. Defaults to 1.0.
+        """
+        ports = list(ports)
+        settings = list(settings) if settings is not None else [{} for _ in ports]
+        self._router = router
+        self._config = config
+        self._workers = [
+            _Worker(address=f'127.0.0.1:{port}', port=port, settings=overrides)
+            for port, overrides in zip(ports, settings, strict=True)
+        ]
+        self._check_interval = check_interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._supervise, name='worker-pool', daemon=True)
+
+    def start(self) -> None:
+        """Starts every worker, and the thread supervising them."""
+        for worker in self._workers:
+            self._router.mark_down(worker.address)  # Until it answers
+            self._spawn(worker)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops supervising, and terminates every worker."""
+        self._stopped.set()
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.terminate()
+        for worker in self._workers:
+            if worker.process is not None:
+                _ = worker.process.wait()
+
+    def _spawn(self, worker: _Worker) -> None:
+        """Starts a worker's process.
+
+        Args:
+            worker (_Worker): Worker to start.
+        """
+        command = [
+            sys.executable,
+            '-m',
+            'pyset.server_app',
+            '-c',
+            self._config,
+            '--host',
+            '127.0.0.1',
+            '--port',
+            str(worker.port),
+        ]
+        worker.process = subprocess.Popen(command, env={**os.environ, **worker.settings})
+        worker.up = False
+        logger.info('Worker %s started (pid %d)', worker.address, worker.process.pid)
+
+    def _supervise(self) -> None:
+        """Supervising thread body: restarts dead workers, marks started ones up, until stopped."""
+        while not self._stopped.wait(self._check_interval):
+            for worker in self._workers:
+                if worker.process is not None and worker.process.poll() is not None:
+                    logger.warning('Worker %s exited (%s): restarting it', worker.address, worker.process.returncode)
+                    self._router.mark_down(worker.address)
+                    self._spawn(worker)
+                elif not worker.up and _answers(worker.address):
+                    worker.up = True
+                    self._router.mark_up(worker.address)
+                    logger.info('Worker %s up', worker.address)
+
+
+def _answers(address: str) -> bool:
+    """Checks whether a worker answers requests.
+
+    Args:
+        address (str): Worker address.
+
+    Returns:
+        bool: True if it answered ``get_version``.
+    """
+    host, port = address.rsplit(':', 1)
+    connection = http.client.HTTPConnection(host, int(port), timeout=1)
+    try:
+        connection.request('GET', f'{_API_PREFIX}get_version/')
+        return connection.getresponse().status == 200
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    """Runs the router and its workers from the command line, until interrupted."""
+    parser = argparse.ArgumentParser(description='Routes requests to pySET worker processes by game id.')
+    _ = parser.add_argument('-c', '--configuration', help='Configuration file location', required=True)
+    _ = parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    _ = parser.add_argument('--host', default='0.0.0.0', help='Host to listen on')
+    _ = parser.add_argument('--port', type=int, default=10000, help='Port to listen on')
+    _ = parser.add_argument('--worker-port', type=int, default=10001, help='Port of the first worker')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with Path(args.configuration).expanduser().open('r', encoding='utf-8') as f:
+        conf = AppConfig.model_validate(json.load(f))
+
+    if args.workers > 1 and conf.session_backend != 'redis' and conf.max_sessions < args.workers:
+        logger.warning('MAX_SESSIONS (%d) is split between %d workers: each takes 1', conf.max_sessions, args.workers)
+
+    ports = range(args.worker_port, args.worker_port + args.workers)
+    router = Router((f'127.0.0.1:{port}' for port in ports), conf.session_name_max_chars)
+    pool = WorkerPool(router, args.configuration, ports, worker_settings(conf, args.workers))
+    pool.start()
+
+    server = make_server(args.host, args.port, router, threaded=True)
+    logger.info('Routing %s:%d to %d worker(s)', args.host, args.port, args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@
 """
 
 import argparse
+import atexit
 import json
 import logging
 import os
@@ -70,6 +71,7 @@ def create_app(
     TemplateView.register(app)
     AppView.api_class = ViewModel(conf, scheme, subdomain)
     AppView.register(app, route_prefix='/api/app')
+    atexit.register(AppView.api_class.close)
 
     return app
 
@@ -78,7 +80,9 @@ if __name__ == '__main__':
     # Parse arguments
     parser = argparse.ArgumentParser()
     _ = parser.add_argument('-c', '--configuration', help='Configuration file location', required=True)
+    _ = parser.add_argument('--host', default='0.0.0.0', help='Host to listen on')
+    _ = parser.add_argument('--port', type=int, default=10000, help='Port to listen on')
     args = parser.parse_args()
 
-    APP = create_app(args.configuration, scheme='http://', subdomain='0.0.0.0')
-    APP.run(host='0.0.0.0', port=10000, threaded=True)
+    APP = create_app(args.configuration, scheme='http://', subdomain=args.host)
+    APP.run(host=args.host, port=args.port, threaded=True)
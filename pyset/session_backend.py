@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""Created on Wed Jan 25 11:17:51 2023.
+
+@author: Luraminaki
+@rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
+
+Persistent :class:`pyset.session_store.SessionBackend` implementations, and the session
+serialization they share: :class:`SQLiteBackend` for a single server process,
+:class:`RedisBackend` for sessions shared by several of them.
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+from collections.abc import Sequence
+from typing import Any
+
+from pyset.modules.game.clock import Clock
+from pyset.modules.game.game import Game
+from pyset.resp import RespArg, RespConnection
+from pyset.session_store import GameSession, StoredSession
+
+SESSION_FORMAT_VERSION = 2  # Bumped by every change of what dump_session writes
+
+
+def dump_session(session: GameSession) -> bytes:
+    """Serializes a session's state: its game (see ``Game.get_state``) and bookkeeping.
+
+    Compressed JSON, stamped with :data:`SESSION_FORMAT_VERSION` and the ``time.time`` it was
+    written at. The lock, its metrics and the snapshot aren't state: they're rebuilt by
+    :func:`load_session`.
+
+    Args:
+        session (GameSession): Session to serialize. Caller must hold ``session.lock``, in any mode.
+
+    Returns:
+        bytes: The serialized session, about 1 KB for a standard game.
+    """
+    state = {
+        'format': SESSION_FORMAT_VERSION,
+        'saved_at': time.time(),
+        'game': session.game.get_state(),
+        'secret': session.game_secret,
+        'created': session.created,
+        'last_accessed': session.last_accessed,
+        'ttl': session.ttl,
+    }
+    return zlib.compress(json.dumps(state, separators=(',', ':')).encode(), 1)
+
+
+def load_session(blob: bytes, clock: Clock | None = None) -> GameSession:
+    """Rebuilds a session serialized by :func:`dump_session`.
+
+    The game's timestamps are rebased against `clock`, counting the time spent stored as time
+    that passed (according to ``time.time``): a penalty doesn't outlive a restart, nor answer
+    times go negative on another host.
+
+    Args:
+        blob (bytes): Serialized session.
+        clock (Clock | None, optional): Time source of the game (see ``Game.__init__``). Defaults
+            to None (wall-clock time).
+
+    Raises:
+        ValueError: If `blob` isn't a session serialized in the current format.
+
+    Returns:
+        GameSession: The session.
+    """
+    try:
+        state = json.loads(zlib.decompress(blob))
+    except (zlib.error, ValueError) as error:
+        raise ValueError('Not a serialized session') from error
+    if not isinstance(state, dict) or state.get('format') != SESSION_FORMAT_VERSION:
+        found = state.get('format') if isinstance(state, dict) else None
+        raise ValueError(f'Unsupported session format {found!r}, expected {SESSION_FORMAT_VERSION}')
+
+    try:
+        elapsed = max(0.0, time.time() - float(state['saved_at']))
+        return GameSession(
+            game=Game.from_state(state['game'], clock=clock, elapsed=elapsed),
+            game_secret=str(state['secret']),
+            created=int(state['created']),
+            last_accessed=int(state['last_accessed']),
+            ttl=int(state['ttl']),
+        )
+    except (KeyError, TypeError, IndexError, OverflowError) as error:
+        raise ValueError(f'Malformed session: {error!r}') from error
+
+
+class SQLiteBackend:
+    """Sessions persisted to an SQLite database, written behind the requests.
+
+    :meth:`save` and :meth:`delete` only note the change: a background thread collects the
+    changes for `flush_interval` seconds, serializes the changed sessions (holding their lock in
+    shared mode, so requests reading them aren't held up) and writes the whole batch in a single
+    transaction. Repeated changes to a session within a batch are written once.
+
+    The database runs in WAL mode: readers (e.g. another server process starting up) don't block
+    the writer, nor the writer them, and commits don't wait for a full fsync.
+    """
+
+    def __init__(self, path: str, logger: logging.Logger, flush_interval: float = 0.5, clock: Clock | None = None):
+        """Initializes the SQLiteBackend, creating the database if needed.
+
+        Args:
+            path (str): Database file.
+            logger (logging.Logger): Logger used for write failures.
+            flush_interval (float, optional): Seconds changes are collected for before being
+                written. Defaults to 0.5.
+            clock (Clock | None, optional): Time source of the loaded games (see
+                :func:`load_session`). Defaults to None (wall-clock time).
+        """
+        self._path = path
+        self._logger = logger
+        self._flush_interval = flush_interval
+        self._clock = clock
+
+        # Changed sessions to write (None: to delete)
+        self._pending: dict[str, GameSession | None] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+
+        connection = self._connect()
+        try:
+            with connection:
+                _ = connection.execute(
+                    'CREATE TABLE IF NOT EXISTS sessions '
+                    '(game_id TEXT PRIMARY KEY, state BLOB NOT NULL, updated REAL NOT NULL)'
+                )
+        finally:
+            connection.close()
+
+        self._writer = threading.Thread(target=self._write_behind, name='session-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection to the database, in WAL mode.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        connection = sqlite3.connect(self._path, timeout=30)
+        _ = connection.execute('PRAGMA journal_mode=WAL')
+        _ = connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def load_all(self) -> list[tuple[str, GameSession]]:
+        """Returns every persisted session, skipping (and logging) those that can't be loaded.
+
+        Returns:
+            list[tuple[str, GameSession]]: (game_id, session) pairs.
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute('SELECT game_id, state FROM sessions').fetchall()
+        finally:
+            connection.close()
+
+        sessions: list[tuple[str, GameSession]] = []
+        for game_id, blob in rows:
+            try:
+                sessions.append((game_id, load_session(blob, self._clock)))
+            except Exception:
+                self._logger.exception('Could not load session %s', game_id)
+        return sessions
+
+    def save(self, game_id: str, session: GameSession) -> bool:
+        """Notes a new or changed session, to be written with the next batch.
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession): Session to persist.
+
+        Returns:
+            bool: Always True.
+        """
+        self._note(game_id, session)
+        return True
+
+    def delete(self, game_id: str) -> None:
+        """Notes a removed session, to be deleted with the next batch.
+
+        Args:
+            game_id (str): Session id.
+        """
+        self._note(game_id, None)
+
+    def _note(self, game_id: str, session: GameSession | None) -> None:
+        """Adds a change to the next batch, waking the writer up.
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession | None): Session to write, or None to delete it.
+        """
+        with self._condition:
+            self._pending[game_id] = session
+            self._condition.notify()
+
+    def flush(self) -> None:
+        """Writes the pending changes right away, on the calling thread."""
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        self._write(pending)
+
+    def close(self) -> None:
+        """Stops the writer thread once it has written every pending change. Idempotent."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+
+    def _write_behind(self) -> None:
+        """Writer thread body: writes the changes by batches, until closed."""
+        while True:
+            with self._condition:
+                _ = self._condition.wait_for(lambda: self._pending or self._closed)
+                closed = self._closed
+
+            if not closed:
+                time.sleep(self._flush_interval)  # Let the batch fill up
+
+            self.flush()
+            if closed:
+                return
+
+    def _write(self, pending: dict[str, GameSession | None]) -> None:
+        """Writes a batch of changes, in a single transaction.
+
+        Args:
+            pending (dict[str, GameSession | None]): Sessions to write (None: to delete).
+        """
+        if not pending:
+            return
+
+        now = time.time()
+        upserts: list[tuple[str, bytes, float]] = []
+        deletes: list[tuple[str]] = []
+        for game_id, session in pending.items():
+            if session is None:
+                deletes.append((game_id,))
+                continue
+            with session.lock.shared():
+                upserts.append((game_id, dump_session(session), now))
+
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    _ = connection.executemany('DELETE FROM sessions WHERE game_id = ?', deletes)
+                    _ = connection.executemany(
+                        'INSERT OR REPLACE INTO sessions (game_id, state, updated) VALUES (?, ?, ?)', upserts
+                    )
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            self._logger.exception('Could not write %d session change(s)', len(pending))
+
+
+class RedisBackend:
+    """Sessions shared by every server process, in a Redis(-protocol) key-value store.
+
+    A :class:`pyset.session_store.SharedSessionBackend`: the processes never lock each other out,
+    they run their requests against their own copy of a session and save the change with an
+    optimistic transaction -- WATCH the session's version, check it's still the one the copy was
+    loaded at, then MULTI/EXEC the new state and version. EXEC fails if the version key was
+    written in between, so of two processes changing the same session at once, exactly one wins.
+
+    Every session takes three keys: ``<prefix>:session:<id>:state`` (see :func:`dump_session`),
+    ``:version`` and ``:seen`` (last access), and its id is in the ``<prefix>:sessions`` set. States
+    of another format (e.g. written by an older server) are skipped, like any that can't be loaded.
+    Each call is a single round trip (two for a save, or a fetch that has to load sessions): its
+    commands are pipelined, and sessions are read by batches with MGET.
+
+    Connections are per thread, opened on first use, and reopened after a network error.
+    """
+
+    def __init__(self, url: str, logger: logging.Logger, key_prefix: str = 'pyset', clock: Clock | None = None):
+        """Initializes the RedisBackend. Connections are opened on first use.
+
+        Args:
+            url (str): Server URL, ``redis://host[:port][/db]``.
+            logger (logging.Logger): Logger used for sessions that can't be loaded.
+            key_prefix (str, optional): Prefix of every key, so several deployments can share a
+                server. Defaults to 'pyset'.
+            clock (Clock | None, optional): Time source of the loaded games (see
+                :func:`load_session`). Defaults to None (wall-clock time).
+
+        Raises:
+            ValueError: If `url` isn't a ``redis://`` URL.
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f'Not a redis:// URL: {url!r}')
+
+        self._host = parts.hostname or '127.0.0.1'
+        self._port = parts.port or 6379
+        self._db = int(parts.path.strip('/') or 0)
+        self._logger = logger
+        self._prefix = key_prefix
+        self._clock = clock
+
+        self._local = threading.local()
+        self._connections: list[RespConnection] = []
+        self._connections_lock = threading.Lock()
+
+    def _key(self, game_id: str, field: str) -> str:
+        """Returns the key of a session's field.
+
+        Args:
+            game_id (str): Session id.
+            field (str): 'state', 'version' or 'seen'.
+
+        Returns:
+            str: The key.
+        """
+        return f'{self._prefix}:session:{game_id}:{field}'
+
+    @property
+    def _ids_key(self) -> str:
+        """Key of the set of every session id."""
+        return f'{self._prefix}:sessions'
+
+    def _pipeline(self, commands: Sequence[Sequence[RespArg]]) -> list[Any]:
+        """Runs commands in one round trip, on the calling thread's connection.
+
+        Args:
+            commands (Sequence[Sequence[RespArg]]): Commands to run.
+
+        Returns:
+            list[Any]: Their replies.
+        """
+        connection: RespConnection | None = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = RespConnection(self._host, self._port, self._db)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+
+        try:
+            return connection.pipeline(commands)
+        except OSError:
+            # Replies may be left half-read: start over with a new connection next time
+            self._local.connection = None
+            with self._connections_lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            connection.close()
+            raise
+
+    def load_all(self) -> list[tuple[str, GameSession]]:
+        """Returns every session, skipping (and logging) those that can't be loaded.
+
+        Returns:
+            list[tuple[str, GameSession]]: (game_id, session) pairs.
+        """
+        game_ids = self.game_ids()
+        stored = self.fetch(game_ids, [0] * len(game_ids))
+        return [
+            (game_id, latest.session)
+            for game_id, latest in zip(game_ids, stored, strict=True)
+            if latest is not None and latest.session is not None
+        ]
+
+    def fetch(self, game_ids: list[str], known_versions: list[int]) -> list[StoredSession | None]:
+        """Returns the state of sessions, loading only those whose version changed.
+
+        Args:
+            game_ids (list[str]): Sessions to fetch.
+            known_versions (list[int]): Version of each session the caller holds (0: none).
+
+        Returns:
+            list[StoredSession | None]: State of each session, None if it doesn't exist.
+        """
+        if not game_ids:
+            return []
+
+        keys = [self._key(game_id, field) for game_id in game_ids for field in ('version', 'seen')]
+        (values,) = self._pipeline([('MGET', *keys)])
+
+        stored: list[StoredSession | None] = []
+        outdated: list[int] = []
+        for index, known_version in enumerate(known_versions):
+            version, seen = values[2 * index], values[2 * index + 1]
+            if version is None:
+                stored.append(None)
+                continue
+            stored.append(StoredSession(version=int(version), last_accessed=int(seen or 0), session=None))
+            if int(version) != known_version:
+                outdated.append(index)
+
+        if outdated:
+            # Read each state along with its version: a save may have happened since the first read
+            keys = [self._key(game_ids[index], field) for index in outdated for field in ('version', 'state')]
+            (values,) = self._pipeline([('MGET', *keys)])
+            for position, index in enumerate(outdated):
+                version, blob = values[2 * position], values[2 * position + 1]
+                stored[index] = self._load(game_ids[index], version, blob, stored[index])
+
+        return stored
+
+    def _load(
+        self, game_id: str, version: bytes | None, blob: bytes | None, stored: StoredSession | None
+    ) -> StoredSession | None:
+        """Rebuilds a fetched session.
+
+        Args:
+            game_id (str): Session id.
+            version (bytes | None): Its version, None if it was removed meanwhile.
+            blob (bytes | None): Its state.
+            stored (StoredSession | None): What the first read of the fetch returned.
+
+        Returns:
+            StoredSession | None: The session's state, None if it doesn't exist (or can't be loaded).
+        """
+        if version is None or blob is None or stored is None:
+            return None
+
+        try:
+            session = load_session(blob, self._clock)
+        except Exception:
+            self._logger.exception('Could not load session %s', game_id)
+            return None
+
+        session.stored_version = int(version)
+        return StoredSession(version=int(version), last_accessed=stored.last_accessed, session=session)
+
+    def save(self, game_id: str, session: GameSession) -> bool:
+        """Saves a session, if nobody else saved it since it was loaded (version compare-and-set).
+
+        On success, the session's ``stored_version`` is bumped to the new version.
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession): Session to save (``stored_version`` 0: a new session). Caller
+                must hold ``session.lock``, in any mode.
+
+        Returns:
+            bool: True if saved, False if the session was changed (or created) elsewhere first.
+        """
+        version_key = self._key(game_id, 'version')
+        _, version = self._pipeline([('WATCH', version_key), ('GET', version_key)])
+        if int(version or 0) != session.stored_version:
+            _ = self._pipeline([('UNWATCH',)])
+            return False
+
+        new_version = session.stored_version + 1
+        replies = self._pipeline(
+            [
+                ('MULTI',),
+                ('SET', self._key(game_id, 'state'), dump_session(session)),
+                ('SET', version_key, new_version),
+                ('SET', self._key(game_id, 'seen'), session.last_accessed),
+                ('SADD', self._ids_key, game_id),
+                ('EXEC',),
+            ]
+        )
+        if replies[-1] is None:
+            return False  # Version key written since WATCH
+
+        session.stored_version = new_version
+        return True
+
+    def delete(self, game_id: str) -> None:
+        """Deletes a session.
+
+        Args:
+            game_id (str): Session id.
+        """
+        _ = self._pipeline(
+            [
+                ('DEL', *(self._key(game_id, field) for field in ('state', 'version', 'seen'))),
+                ('SREM', self._ids_key, game_id),
+            ]
+        )
+
+    def touch(self, game_id: str, last_accessed: int) -> None:
+        """Records an access to a session, without changing its version.
+
+        Args:
+            game_id (str): Session id.
+            last_accessed (int): ``time.time`` second of the access.
+        """
+        _ = self._pipeline([('SET', self._key(game_id, 'seen'), last_accessed)])
+
+    def game_ids(self) -> list[str]:
+        """Returns the id of every session.
+
+        Returns:
+            list[str]: Session ids.
+        """
+        (members,) = self._pipeline([('SMEMBERS', self._ids_key)])
+        return [member.decode() for member in members]
+
+    def count(self) -> int:
+        """Returns the number of sessions.
+
+        Returns:
+            int: Session count.
+        """
+        (count,) = self._pipeline([('SCARD', self._ids_key)])
+        return int(count)
+
+    def close(self) -> None:
+        """Closes every connection. Threads calling the backend afterwards open new ones."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
@@ -5,36 +5,405 @@
 @rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
 """
 
+import bisect
+import collections
 import contextlib
+import dataclasses
 import enum
+import heapq
 import logging
 import threading
 import time
 from collections.abc import Callable, Generator
-
-from pydantic import BaseModel, ConfigDict, Field, SkipValidation
+from typing import Any, Protocol, runtime_checkable
 
 from pyset.modules.game.game import Game
 from pyset.modules.misc.models import AppConfig
+from pyset.modules.web.models import PlayerStats
 
 
-class GameSession(BaseModel):
-    """A single running :class:`~pyset.modules.game.game.Game` plus its session bookkeeping.
+class SessionBusyError(TimeoutError):
+    """Raised by :meth:`SessionStore.locked` when a session's lock isn't acquired in time."""
+
+
+class SessionConflictError(Exception):
+    """Raised by :meth:`SessionStore.publish` when the session was changed elsewhere first.
 
-    ``lock`` serializes access to this specific session's mutable state (the ``Game``/``Grid``/
-    ``Player`` objects reachable through ``game``) so that concurrent requests against *different*
-    sessions can run in parallel, while requests against the *same* session still serialize
-    safely. It isn't session data -- it's excluded from serialization.
+    Only with a shared backend (see :class:`SharedSessionBackend`): another server process saved
+    the session since this one loaded it. The change is lost; the request may be retried, against
+    the latest state of the session.
     """
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+class LatencyHistogram:
+    """Count of durations per order of magnitude, from 100 microseconds to 10 seconds."""
+
+    __slots__ = ('counts', 'total')
+
+    bounds = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)  # Upper bound of each bucket (seconds), but the last
+
+    def __init__(self) -> None:
+        """Initializes an empty LatencyHistogram."""
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Adds a duration.
+
+        Args:
+            seconds (float): Duration to add.
+        """
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total = self.total + seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the histogram in a JSON-friendly shape.
+
+        Returns:
+            dict[str, Any]: Count, total (seconds), and count per bucket (keyed by upper bound).
+        """
+        labels = [f'<={bound:g}s' for bound in self.bounds] + [f'>{self.bounds[-1]:g}s']
+        return {
+            'count': sum(self.counts),
+            'total_seconds': self.total,
+            'buckets': dict(zip(labels, self.counts, strict=True)),
+        }
+
+
+class LockStats:
+    """Contention metrics of one lock (or of every session lock): wait and hold times, timeouts.
+
+    Updates take a tiny lock of their own: requests against different sessions update the store-wide stats at once.
+    """
+
+    __slots__ = ('_lock', 'hold', 'timeouts', 'wait')
+
+    def __init__(self) -> None:
+        """Initializes empty LockStats."""
+        self._lock = threading.Lock()
+        self.wait = LatencyHistogram()
+        self.hold = LatencyHistogram()
+        self.timeouts = 0
+
+    def record_wait(self, seconds: float) -> None:
+        """Records how long an acquisition waited.
+
+        Args:
+            seconds (float): Time waited.
+        """
+        with self._lock:
+            self.wait.record(seconds)
+
+    def record_hold(self, seconds: float) -> None:
+        """Records how long the lock was held.
+
+        Args:
+            seconds (float): Time held.
+        """
+        with self._lock:
+            self.hold.record(seconds)
+
+    def record_timeout(self) -> None:
+        """Records an acquisition given up on."""
+        with self._lock:
+            self.timeouts = self.timeouts + 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the metrics in a JSON-friendly shape.
+
+        Returns:
+            dict[str, Any]: Wait and hold histograms, and timeout count.
+        """
+        with self._lock:
+            return {'wait': self.wait.as_dict(), 'hold': self.hold.as_dict(), 'timeouts': self.timeouts}
+
+
+class RWLock:
+    """Writer-preferring reader-writer lock.
+
+    Exclusive (write) mode has the same interface as :class:`threading.Lock` -- ``acquire`` /
+    ``release`` / ``with`` -- while shared (read) mode goes through :meth:`acquire_shared` /
+    :meth:`release_shared` or :meth:`shared`. Any number of readers may hold the lock together, a
+    writer holds it alone. As soon as a writer is waiting, new readers queue up behind it, so a
+    steady stream of readers can't starve writers. Not reentrant, in either mode.
+    """
+
+    __slots__ = ('_condition', '_nb_readers', '_nb_waiting_writers', '_writing')
+
+    def __init__(self) -> None:
+        """Initializes an unlocked RWLock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._nb_readers = 0
+        self._nb_waiting_writers = 0
+        self._writing = False
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquires the lock in exclusive mode.
+
+        Args:
+            blocking (bool, optional): Whether to wait for the lock. Defaults to True.
+            timeout (float, optional): Max seconds to wait, -1 for no limit. Defaults to -1.
+
+        Returns:
+            bool: True if acquired, False otherwise.
+        """
+        with self._condition:
+            if not blocking:
+                if self._writing or self._nb_readers:
+                    return False
+                self._writing = True
+                return True
+
+            self._nb_waiting_writers = self._nb_waiting_writers + 1
+            try:
+                acquired = self._condition.wait_for(
+                    lambda: not self._writing and not self._nb_readers, None if timeout < 0 else timeout
+                )
+            finally:
+                self._nb_waiting_writers = self._nb_waiting_writers - 1
+
+            if not acquired:
+                self._condition.notify_all()  # Readers held back by this writer may go now
+                return False
+
+            self._writing = True
+            return True
+
+    def release(self) -> None:
+        """Releases the lock, held in exclusive mode."""
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    def acquire_shared(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquires the lock in shared mode.
+
+        Args:
+            blocking (bool, optional): Whether to wait for the lock. Defaults to True.
+            timeout (float, optional): Max seconds to wait, -1 for no limit. Defaults to -1.
+
+        Returns:
+            bool: True if acquired, False otherwise.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: not self._writing and not self._nb_waiting_writers,
+                (None if timeout < 0 else timeout) if blocking else 0,
+            ):
+                return False
+
+            self._nb_readers = self._nb_readers + 1
+            return True
+
+    def release_shared(self) -> None:
+        """Releases the lock, held in shared mode."""
+        with self._condition:
+            self._nb_readers = self._nb_readers - 1
+            if not self._nb_readers:
+                self._condition.notify_all()
+
+    def __enter__(self) -> bool:
+        """Acquires the lock in exclusive mode."""
+        return self.acquire()
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Releases the lock, held in exclusive mode."""
+        self.release()
+
+    @contextlib.contextmanager
+    def shared(self) -> Generator[None]:
+        """Holds the lock in shared mode for the duration of the ``with`` block."""
+        _ = self.acquire_shared()
+        try:
+            yield
+        finally:
+            self.release_shared()
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class SessionSnapshot:
+    """Immutable view of a session's game, as of its latest change.
+
+    Published by the writer that made the change (see :meth:`GameSession.publish`) and read with
+    a single attribute read: read-only requests serve it without taking ``session.lock`` nor
+    touching the live ``Game``. Shared by every reader -- nothing in it may be modified.
+    """
+
+    version: int  # Bumped by every published change of the session
+    game_state: str
+    grid: tuple[tuple[int, ...], ...]
+    draw_pile: int
+    players_stats: tuple[PlayerStats, ...]
+    hints: tuple[tuple[int, ...], ...]  # Valid sets on the grid
+
+
+@dataclasses.dataclass(slots=True, kw_only=True)
+class GameSession:
+    """A single running :class:`~pyset.modules.game.game.Game` plus its session bookkeeping.
+
+    ``lock`` guards this specific session's mutable state (the ``Game``/``Grid``/``Player``
+    objects reachable through ``game``) so that concurrent requests against *different* sessions
+    can run in parallel, while requests against the *same* session serialize safely (the SQLite
+    writer, which only reads the game, shares it, see :class:`RWLock`). It isn't session data -- it's left
+    out of ``repr`` and comparisons.
+
+    Read-only requests don't take ``lock`` at all: they serve ``snapshot``, so every change to
+    ``game`` must be followed by :meth:`SessionStore.publish`, while still holding ``lock``.
+
+    A plain slotted record rather than a pydantic model: it's never (de)serialized, only built
+    server-side, and the store holds one per running game.
+    """
 
     game: Game
     game_secret: str = ''
     created: int
     last_accessed: int
     ttl: int
-    lock: SkipValidation[threading.Lock] = Field(default_factory=threading.Lock, exclude=True, repr=False)
+    stored_version: int = dataclasses.field(default=0, repr=False, compare=False)  # See SharedSessionBackend
+    lock: RWLock = dataclasses.field(default_factory=RWLock, repr=False, compare=False)
+    lock_stats: LockStats = dataclasses.field(default_factory=LockStats, repr=False, compare=False)
+    snapshot: SessionSnapshot = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Publishes the first snapshot of the session."""
+        self.publish()
+
+    def publish(self) -> None:
+        """Publishes a new snapshot of the game. Caller must hold ``lock`` in exclusive mode.
+
+        Lists the valid sets on the grid too: that writes to the grid (see
+        :meth:`~pyset.modules.game.set.Grid.get_unique_sets_on_grid`), which only a writer may do.
+        """
+        grid = self.game.grid
+        previous = getattr(self, 'snapshot', None)
+        self.snapshot = SessionSnapshot(
+            version=1 if previous is None else previous.version + 1,
+            game_state=self.game.get_game_state(),
+            grid=tuple(tuple(row) for row in grid.arrange_cards_to_grid()),
+            draw_pile=grid.get_number_cards_left_in_deck(),
+            players_stats=tuple(PlayerStats.from_stats(player.get_stats()) for player in self.game.get_players()),
+            hints=tuple(tuple(card_set) for card_set in grid.get_unique_sets_on_grid()),
+        )
+
+
+class SessionBackend(Protocol):
+    """Persistence of the sessions of a :class:`pyset.session_store.SessionStore`."""
+
+    def load_all(self) -> list[tuple[str, GameSession]]:
+        """Returns every persisted session, to start the store with.
+
+        Returns:
+            list[tuple[str, GameSession]]: (game_id, session) pairs.
+        """
+        ...
+
+    def save(self, game_id: str, session: GameSession) -> bool:
+        """Persists a new or changed session (now or later: the session stays reachable).
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession): Session to persist.
+
+        Returns:
+            bool: False if the session was changed elsewhere since it was loaded (shared backends
+            only), in which case nothing was saved. True otherwise.
+        """
+        ...
+
+    def delete(self, game_id: str) -> None:
+        """Forgets a removed session.
+
+        Args:
+            game_id (str): Session id.
+        """
+        ...
+
+    def close(self) -> None:
+        """Persists whatever is still pending, and releases the backend's resources."""
+        ...
+
+
+@dataclasses.dataclass(slots=True, kw_only=True)
+class StoredSession:
+    """State of a session in a :class:`SharedSessionBackend`, as returned by its ``fetch``."""
+
+    version: int
+    last_accessed: int
+    session: GameSession | None  # None if the caller already holds this version
+
+
+@runtime_checkable
+class SharedSessionBackend(SessionBackend, Protocol):
+    """A backend shared by several server processes: the sessions live there, not in the store.
+
+    Every saved change gives the session a new version. A process keeps a copy of the sessions it
+    serves, tagged with the version it loaded (``GameSession.stored_version``), and ``save`` is a
+    compare-and-set on that version: a change made to an outdated copy is refused, never written
+    over the latest one. ``fetch`` tells the processes when their copies are outdated.
+    """
+
+    def fetch(self, game_ids: list[str], known_versions: list[int]) -> list[StoredSession | None]:
+        """Returns the state of sessions, loading only those whose version changed.
+
+        Args:
+            game_ids (list[str]): Sessions to fetch.
+            known_versions (list[int]): Version of each session the caller holds (0: none).
+
+        Returns:
+            list[StoredSession | None]: State of each session, None if it doesn't exist.
+        """
+        ...
+
+    def touch(self, game_id: str, last_accessed: int) -> None:
+        """Records an access to a session, without changing its version.
+
+        Args:
+            game_id (str): Session id.
+            last_accessed (int): ``time.time`` second of the access.
+        """
+        ...
+
+    def game_ids(self) -> list[str]:
+        """Returns the id of every session.
+
+        Returns:
+            list[str]: Session ids.
+        """
+        ...
+
+    def count(self) -> int:
+        """Returns the number of sessions.
+
+        Returns:
+            int: Session count.
+        """
+        ...
+
+
+class MemoryBackend:
+    """No persistence at all: sessions only live in the store's memory (the default)."""
+
+    def load_all(self) -> list[tuple[str, GameSession]]:
+        """Returns no session.
+
+        Returns:
+            list[tuple[str, GameSession]]: Nothing.
+        """
+        return []
+
+    def save(self, game_id: str, session: GameSession) -> bool:
+        """Does nothing.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+
+    def delete(self, game_id: str) -> None:
+        """Does nothing."""
+
+    def close(self) -> None:
+        """Does nothing."""
 
 
 class LogEvent(enum.StrEnum):
@@ -43,31 +412,98 @@ class LogEvent(enum.StrEnum):
     DATA_RECEIVED = 'DATA_RECEIVED'
     DELETING_GAME = 'DELETING_GAME'
     DELETING_GAME_TTL_REACHED = 'DELETING_GAME_TTL_REACHED'
+    DELETING_GAME_LRU = 'DELETING_GAME_LRU'
     ORDER_66 = 'ORDER_66'
 
 
+@dataclasses.dataclass(slots=True)
+class _Shard:
+    """One independently locked slice of the session table."""
+
+    sessions: dict[str, GameSession] = dataclasses.field(default_factory=dict)
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, repr=False)
+
+
 class SessionStore:
     """Thread-safe storage for the running :class:`GameSession` objects, keyed by game id.
 
-    Two-tier locking: an internal table lock guards structural changes to the session table
-    itself (insert/delete/replace/iterate); each ``GameSession``'s own lock (acquired via
-    :meth:`locked`) guards that session's gameplay state. Requests against different sessions can
-    therefore proceed concurrently, while requests against the same session still serialize.
+    Two-tier locking: the session table is split into shards picked by game-id hash, each with its
+    own lock guarding structural changes to that shard (insert/delete/iterate); each
+    ``GameSession``'s own lock (acquired via :meth:`locked`) guards that session's gameplay state.
+    Lookups of sessions living in different shards never contend, and requests against different
+    sessions proceed concurrently, while requests against the same session still serialize.
+
+    Whole-table operations (:meth:`items`, :meth:`clear`) take every shard lock, always in shard
+    order, so they see -- or wipe -- one consistent state of the table.
+
+    Expiry runs off the request path: a background reaper thread keeps every session in a heap
+    ordered by its expiry (``last_accessed + ttl``, the session's own ``ttl``) and sleeps until the
+    earliest one. The heap is updated lazily -- :meth:`touch` only bumps ``last_accessed`` -- so
+    when an entry comes due, the reaper re-reads the session and either removes it or queues it
+    again at its actual expiry.
+
+    With the ``'lru'`` eviction policy, the store also keeps its sessions in least-recently-used
+    order (an ``OrderedDict`` :meth:`touch` moves a session to the end of, in O(1)), so a full
+    table can admit a new session by evicting the least recently used one (see :meth:`make_room`).
+
+    Sessions are always served from memory; a :class:`SessionBackend` is told about every created,
+    changed (see :meth:`publish`) and removed session, and hands the sessions back on startup.
+
+    With a :class:`SharedSessionBackend`, the store is only a cache of the sessions the process
+    serves: lookups (:meth:`get`, :meth:`items`) bring the cached copies up to date first, and
+    :meth:`publish` raises :class:`SessionConflictError` -- dropping the outdated copy -- when another
+    process changed the session first. Session locks then only order this process' own requests:
+    across processes, the backend's compare-and-set takes their place.
     """
 
-    def __init__(self, config: AppConfig, logger: logging.Logger):
+    def __init__(
+        self,
+        config: AppConfig,
+        logger: logging.Logger,
+        on_remove: Callable[[str], None] | None = None,
+        nb_shards: int = 16,
+        backend: SessionBackend | None = None,
+    ):
         """Initializes the SessionStore.
 
         Args:
-            config (AppConfig): Application configuration. `max_sessions` and
-                `session_ttl_seconds` are read live off this object on every call (not snapshotted
-                here), so changing them on the config takes effect immediately.
+            config (AppConfig): Application configuration. `max_sessions`, `session_lru_idle_seconds`
+                and `session_lock_timeout_seconds` are read live off this object on every call (not
+                snapshotted here), so changing them on the config takes effect immediately.
+                `session_eviction_policy` is read once, here: the LRU order has to be kept from the
+                first session on.
             logger (logging.Logger): Logger used for session lifecycle events.
+            on_remove (Callable[[str], None] | None, optional): Called with the game id of every
+                session removed by :meth:`clear`, :meth:`make_room` or the reaper, once the
+                shard locks are released (e.g. to stop its AI players). Defaults to None.
+            nb_shards (int, optional): Number of independently locked shards. Defaults to 16.
+            backend (SessionBackend | None, optional): Persistence of the sessions; the store
+                starts with the sessions it holds. Defaults to None (a :class:`MemoryBackend`).
         """
-        self._sessions: dict[str, GameSession] = {}
-        self._table_lock = threading.Lock()
+        self._shards = tuple(_Shard() for _ in range(max(1, nb_shards)))
         self._config: AppConfig = config
         self._logger = logger
+        self._on_remove = on_remove
+
+        self._expiries: list[tuple[int, str]] = []  # Heap of (expiry, game_id), possibly outdated
+        self._expiry_of: dict[str, int] = {}  # Expiry each game_id is currently queued at
+        self._reaper_condition = threading.Condition()
+        self._reaper: threading.Thread | None = None
+        self._closed = False  # Stops the reaper
+
+        self._lru: collections.OrderedDict[str, GameSession] | None = None  # Least recently used first
+        if config.session_eviction_policy == 'lru':
+            self._lru = collections.OrderedDict()
+        self._lru_lock = threading.Lock()
+
+        self.lock_stats = LockStats()  # Every session lock, all together
+
+        self._backend: SessionBackend = backend if backend is not None else MemoryBackend()
+        self._shared = self._backend if isinstance(self._backend, SharedSessionBackend) else None
+        for game_id, session in self._backend.load_all():
+            shard = self._shard_of(game_id)
+            with shard.lock:
+                self._add(shard, game_id, session)
 
     def __len__(self) -> int:
         """Returns the number of currently tracked sessions.
@@ -75,7 +511,9 @@ class SessionStore:
         Returns:
             int: Session count.
         """
-        return len(self._sessions)
+        if self._shared is not None:
+            return self._shared.count()
+        return sum(len(shard.sessions) for shard in self._shards)
 
     def is_full(self) -> bool:
         """Checks whether the table has reached its configured capacity.
@@ -83,7 +521,26 @@ class SessionStore:
         Returns:
             bool: True if at capacity, False otherwise.
         """
-        return len(self._sessions) >= self._config.max_sessions
+        return len(self) >= self._config.max_sessions
+
+    def _shard_of(self, game_id: str) -> _Shard:
+        """Returns the shard a session lives in.
+
+        Args:
+            game_id (str): Session id.
+
+        Returns:
+            _Shard: Its shard.
+        """
+        return self._shards[hash(game_id) % len(self._shards)]
+
+    @contextlib.contextmanager
+    def _all_shards_locked(self) -> Generator[None]:
+        """Holds every shard lock (taken in shard order, so two callers can't deadlock)."""
+        with contextlib.ExitStack() as stack:
+            for shard in self._shards:
+                _ = stack.enter_context(shard.lock)
+            yield
 
     def get(self, game_id: str) -> GameSession | None:
         """Thread-safe lookup of a session by id.
@@ -94,34 +551,189 @@ class SessionStore:
         Returns:
             GameSession | None: The session, or None if it doesn't (or no longer) exist.
         """
-        with self._table_lock:
-            return self._sessions.get(game_id)
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            session = shard.sessions.get(game_id)
+
+        if self._shared is None:
+            return session
+        return self._sync(self._shared, [(game_id, session)])[0]
 
     def items(self) -> list[tuple[str, GameSession]]:
         """Thread-safe snapshot of every (game_id, session) pair currently tracked.
 
         Unlike ``dict.items()``, this returns a copy rather than a live view, so it's safe to
-        iterate without holding any lock (and without racing a concurrent insert/delete).
+        iterate without holding any lock (and without racing a concurrent insert/delete). All
+        shards are copied at once, so the snapshot is consistent across them -- except with a
+        shared backend, where every session of the backend is brought up to date, one by one.
 
         Returns:
             list[tuple[str, GameSession]]: The snapshot.
         """
-        with self._table_lock:
-            return list(self._sessions.items())
+        with self._all_shards_locked():
+            items = [item for shard in self._shards for item in shard.sessions.items()]
+
+        if self._shared is None:
+            return items
+
+        cached: dict[str, GameSession | None] = dict.fromkeys(self._shared.game_ids())
+        cached.update(items)
+        synced = self._sync(self._shared, list(cached.items()))
+        return [(game_id, session) for game_id, session in zip(cached, synced, strict=True) if session is not None]
+
+    def _sync(
+        self, backend: SharedSessionBackend, cached: list[tuple[str, GameSession | None]]
+    ) -> list[GameSession | None]:
+        """Brings cached sessions up to date with a shared backend, in one ``fetch``.
+
+        An outdated session is replaced by the latest one, which takes over its lock (requests
+        of this process still holding the outdated one then fail to publish, see
+        :meth:`publish`); a session gone from the backend is dropped.
+
+        Args:
+            backend (SharedSessionBackend): The store's backend.
+            cached (list[tuple[str, GameSession | None]]): (game_id, cached session or None) pairs.
+
+        Returns:
+            list[GameSession | None]: The up-to-date session of every pair, None if it doesn't exist.
+        """
+        stored = backend.fetch(
+            [game_id for game_id, _ in cached],
+            [session.stored_version if session is not None else 0 for _, session in cached],
+        )
+
+        synced: list[GameSession | None] = []
+        removed_games: list[str] = []
+        for (game_id, session), latest in zip(cached, stored, strict=True):
+            if latest is None:
+                if session is not None and self._discard(game_id, session):
+                    removed_games.append(game_id)
+                synced.append(None)
+                continue
+
+            if latest.session is not None:
+                session = self._install(game_id, session, latest.session)
+            if session is not None:
+                session.last_accessed = max(session.last_accessed, latest.last_accessed)
+            synced.append(session)
+
+        self._forget_lru(removed_games)
+        self._notify_removed(removed_games, delete=False)
+        return synced
+
+    def _install(self, game_id: str, outdated: GameSession | None, latest: GameSession) -> GameSession:
+        """Replaces a cached session by its latest version, unless another thread already did.
+
+        Args:
+            game_id (str): Session id.
+            outdated (GameSession | None): Cached session (None: not cached yet).
+            latest (GameSession): Latest version of the session.
+
+        Returns:
+            GameSession: The session now cached.
+        """
+        if outdated is not None:
+            latest.lock = outdated.lock
+            latest.lock_stats = outdated.lock_stats
+
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            current = shard.sessions.get(game_id)
+            if current is not outdated:
+                return current if current is not None else latest
+            self._add(shard, game_id, latest)
+        return latest
+
+    def _discard(self, game_id: str, session: GameSession) -> bool:
+        """Drops a session from the cache, unless it was replaced or removed meanwhile.
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession): Session to drop.
+
+        Returns:
+            bool: True if dropped.
+        """
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            if shard.sessions.get(game_id) is not session:
+                return False
+            del shard.sessions[game_id]
+        return True
 
     def create_if_missing(self, game_id: str, factory: Callable[[], GameSession]) -> None:
         """Atomically creates a session if (and only if) one doesn't already exist for `game_id`.
 
-        `factory` runs while the table lock is held, so it's only ever invoked once per `game_id`
-        even under concurrent calls -- keep it fast (it's just building a fresh Game/Grid here).
+        `factory` runs while the session's shard lock is held, so it's only ever invoked once per
+        `game_id` even under concurrent calls -- keep it fast (it's just building a fresh
+        Game/Grid here). With a shared backend, it runs without any lock: processes racing to
+        create the same session may each build one, but only the first one saved is kept.
 
         Args:
             game_id (str): Session to create.
             factory (Callable[[], GameSession]): Builds the session; only called if needed.
         """
-        with self._table_lock:
-            if game_id not in self._sessions:
-                self._sessions[game_id] = factory()
+        if self._shared is not None:
+            if self.get(game_id) is None:
+                session = factory()
+                if not self._backend.save(game_id, session):
+                    _ = self.get(game_id)  # Created elsewhere meanwhile: cache that one instead
+                    return
+                shard = self._shard_of(game_id)
+                with shard.lock:
+                    self._add(shard, game_id, session)
+            return
+
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            if game_id not in shard.sessions:
+                session = factory()
+                self._add(shard, game_id, session)
+                _ = self._backend.save(game_id, session)
+
+    def _add(self, shard: _Shard, game_id: str, session: GameSession) -> None:
+        """Adds a session to its shard, its expiry queue and the LRU order (if kept).
+
+        Args:
+            shard (_Shard): The session's shard. Caller must hold its lock.
+            game_id (str): Session id.
+            session (GameSession): Session to add.
+        """
+        shard.sessions[game_id] = session
+        self._queue_expiry(game_id, session.last_accessed + session.ttl)
+        if self._lru is not None:
+            with self._lru_lock:
+                self._lru[game_id] = session
+
+    def publish(self, game_id: str, session: GameSession) -> None:
+        """Publishes a changed session: to the backend, and a new snapshot (see :meth:`GameSession.publish`).
+
+        Args:
+            game_id (str): Session id.
+            session (GameSession): Changed session. Caller must hold ``session.lock`` in exclusive mode.
+
+        Raises:
+            SessionConflictError: If the backend refused the change (see :class:`SharedSessionBackend`).
+                The session is dropped from the cache: the next lookup loads its latest version.
+        """
+        if not self._backend.save(game_id, session):
+            _ = self._discard(game_id, session)
+            raise SessionConflictError(game_id)
+        session.publish()
+
+    def close(self) -> None:
+        """Stops the reaper, then closes the backend once it has persisted every pending change. Idempotent.
+
+        Sessions are left as they are: nothing expires them anymore.
+        """
+        with self._reaper_condition:
+            self._closed = True
+            self._reaper_condition.notify()
+            reaper = self._reaper
+
+        if reaper is not None and reaper is not threading.current_thread():
+            reaper.join()
+        self._backend.close()
 
     def clear(self) -> None:
         """Removes every tracked session.
@@ -130,58 +742,274 @@ class SessionStore:
         that session's own lock) simply finishes on its own, now-orphaned ``GameSession`` -- its
         result won't be visible here anymore, which is fine for a rare admin wipe.
         """
-        with self._table_lock:
-            self._sessions = {}
-
-    def evict_inactive(self) -> None:
-        """Evicts sessions that have been inactive for longer than their TTL."""
-        if self.is_full():
-            now = int(time.time())
-            with self._table_lock:
-                inactive_games = [
-                    game_id
-                    for game_id, session in self._sessions.items()
-                    if (now - session.last_accessed) >= self._config.session_ttl_seconds
-                ]
-
-                for game_id in inactive_games:
-                    last_accessed = time.strftime(
-                        '%Y-%m-%d %H:%M:%S', time.localtime(self._sessions[game_id].last_accessed)
-                    )
-                    self._logger.info(
-                        '%s: %s -- last_accessed: %s', LogEvent.DELETING_GAME_TTL_REACHED.value, game_id, last_accessed
-                    )
-                    del self._sessions[game_id]
+        shared_games = self._shared.game_ids() if self._shared is not None else []
+        with self._all_shards_locked():
+            removed_games = [game_id for shard in self._shards for game_id in shard.sessions]
+            removed_games.extend(set(shared_games).difference(removed_games))
+            for shard in self._shards:
+                shard.sessions = {}
+
+            with self._reaper_condition:
+                self._expiries = []
+                self._expiry_of = {}
+
+            if self._lru is not None:
+                with self._lru_lock:
+                    self._lru.clear()
+
+        self._notify_removed(removed_games)
+
+    def make_room(self) -> bool:
+        """Makes sure a new session can be admitted.
+
+        With the ``'lru'`` policy, a full table evicts its least recently used session -- unless
+        that session was active less than `session_lru_idle_seconds` ago, in which case every
+        other session was too, and nothing is evicted. A session in use (its lock held by a
+        request) isn't evicted either.
+
+        Returns:
+            bool: True if the table has room for a new session, False otherwise.
+        """
+        if not self.is_full():
+            return True
+
+        if self._lru is None:
+            return False
+
+        with self._lru_lock:
+            if not self._lru:
+                return False
+            game_id, session = next(iter(self._lru.items()))
+
+        if self._shared is not None:
+            latest = self.get(game_id)  # Accesses made through other processes count too
+            if latest is None:
+                return not self.is_full()
+            session = latest
+
+        if int(time.time()) - session.last_accessed < self._config.session_lru_idle_seconds:
+            return False
+
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            if shard.sessions.get(game_id) is not session or not session.lock.acquire(blocking=False):
+                return False
+
+            try:
+                del shard.sessions[game_id]
+            finally:
+                session.lock.release()
+
+        self._logger.info('%s: %s', LogEvent.DELETING_GAME_LRU.value, game_id)
+        self._forget_lru([game_id])
+        self._notify_removed([game_id])
+        return not self.is_full()
+
+    def _forget_lru(self, game_ids: list[str]) -> None:
+        """Drops removed sessions from the LRU order (if kept).
+
+        Args:
+            game_ids (list[str]): Removed sessions.
+        """
+        if self._lru is not None:
+            with self._lru_lock:
+                for game_id in game_ids:
+                    _ = self._lru.pop(game_id, None)
+
+    def _queue_expiry(self, game_id: str, expiry: int) -> None:
+        """(Re)queues a session in the reaper's heap, starting the reaper with the first session.
+
+        Queuing a session again supersedes its previous entry, which the reaper then skips.
+
+        Args:
+            game_id (str): Session to queue.
+            expiry (int): ``time.time`` second the session expires at, if not touched by then.
+        """
+        with self._reaper_condition:
+            self._expiry_of[game_id] = expiry
+            heapq.heappush(self._expiries, (expiry, game_id))
+            if self._expiries[0][1] == game_id:
+                self._reaper_condition.notify()
+
+            if self._reaper is None and not self._closed:
+                self._reaper = threading.Thread(target=self._reap, name='session-reaper', daemon=True)
+                self._reaper.start()
+
+    def _reap(self) -> None:
+        """Reaper thread body: expires the sessions as they come due, until closed."""
+        while True:
+            with self._reaper_condition:
+                while not self._closed and (not self._expiries or self._expiries[0][0] > time.time()):
+                    timeout = self._expiries[0][0] - time.time() if self._expiries else None
+                    _ = self._reaper_condition.wait(timeout)
+                if self._closed:
+                    return
+                expiry, game_id = heapq.heappop(self._expiries)
+                if self._expiry_of.get(game_id) != expiry:
+                    continue  # Superseded entry
+                del self._expiry_of[game_id]
+
+            try:
+                next_expiry: int | None = self._expire(game_id)
+            except Exception:
+                self._logger.exception('Could not expire session %s', game_id)
+                next_expiry = int(time.time()) + 60  # e.g. shared backend unreachable
+            if next_expiry is not None:
+                self._queue_expiry(game_id, next_expiry)
+
+    def _expire(self, game_id: str) -> int | None:
+        """Removes a session if it has really expired.
+
+        A session in use (its lock held by a request) is left alone: it's being accessed, so it
+        will be touched anyway.
+
+        Args:
+            game_id (str): Session whose queued expiry came due.
+
+        Returns:
+            int | None: When to check the session again, or None if it's gone.
+        """
+        if self._shared is not None and self.get(game_id) is None:
+            return None  # Removed by another process (and the cache with it)
+
+        now = int(time.time())
+        shard = self._shard_of(game_id)
+        with shard.lock:
+            session = shard.sessions.get(game_id)
+            if session is None:
+                return None
+
+            expiry = session.last_accessed + session.ttl
+            if expiry > now:
+                return expiry  # Touched since it was queued
+
+            if not session.lock.acquire(blocking=False):
+                return now + 1
+
+            try:
+                self._log_expired(game_id, shard.sessions.pop(game_id))
+            finally:
+                session.lock.release()
+
+        self._forget_lru([game_id])
+        self._notify_removed([game_id])
+        return None
+
+    def _log_expired(self, game_id: str, session: GameSession) -> None:
+        """Logs the removal of an inactive session.
+
+        Args:
+            game_id (str): Removed session id.
+            session (GameSession): Removed session.
+        """
+        last_accessed = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(session.last_accessed))
+        self._logger.info(
+            '%s: %s -- last_accessed: %s', LogEvent.DELETING_GAME_TTL_REACHED.value, game_id, last_accessed
+        )
+
+    def _notify_removed(self, game_ids: list[str], delete: bool = True) -> None:
+        """Tells the backend and the `on_remove` hook about removed sessions.
+
+        Caller must not hold any shard lock.
+
+        Args:
+            game_ids (list[str]): Removed sessions.
+            delete (bool, optional): Whether to delete them from the backend, False if they're
+                already gone from there. Defaults to True.
+        """
+        if delete:
+            for game_id in game_ids:
+                self._backend.delete(game_id)
+
+        if self._on_remove is not None:
+            for game_id in game_ids:
+                self._on_remove(game_id)
 
     @contextlib.contextmanager
     def locked(self, game_id: str) -> Generator[GameSession | None]:
-        """Thread-safe, exclusive access to one session's mutable game state.
+        """Thread-safe access to one session's mutable game state.
 
-        Looks the session up -- it may have been removed concurrently by :meth:`clear` or
-        :meth:`evict_inactive`, in which case this yields None -- and, if found, holds that
-        session's own lock for the duration of the ``with`` block. A concurrent call against the
+        Looks the session up -- it may have been removed concurrently by :meth:`clear` or the
+        reaper, in which case this yields None -- and, if found, holds that session's own lock, in
+        exclusive mode, for the duration of the ``with`` block. A concurrent call against the
         *same* session waits; calls against other sessions are unaffected.
 
+        Waiting is capped by `session_lock_timeout_seconds` (negative: no limit), so a slow request
+        or a burst against one session can't tie worker threads up indefinitely. Wait and hold
+        times, and timeouts, go to the session's and the store's :class:`LockStats`.
+
         Args:
             game_id (str): Session to access.
 
         Yields:
             GameSession | None: The locked session, or None if it doesn't (or no longer) exist.
+
+        Raises:
+            SessionBusyError: If the lock wasn't acquired before the deadline.
         """
         session = self.get(game_id)
         if session is None:
             yield None
             return
 
-        with session.lock:
+        timeout = self._config.session_lock_timeout_seconds
+        tic = time.perf_counter()
+        if not session.lock.acquire(timeout=timeout if timeout >= 0 else -1):
+            session.lock_stats.record_timeout()
+            self.lock_stats.record_timeout()
+            raise SessionBusyError(game_id)
+
+        acquired = time.perf_counter()
+        session.lock_stats.record_wait(acquired - tic)
+        self.lock_stats.record_wait(acquired - tic)
+        try:
             yield session
+        finally:
+            session.lock.release()
+            held = time.perf_counter() - acquired
+            session.lock_stats.record_hold(held)
+            self.lock_stats.record_hold(held)
 
-    @staticmethod
-    def touch(session: GameSession) -> None:
+    def lock_metrics(self, nb_hottest: int = 10) -> dict[str, Any]:
+        """Returns the lock contention metrics, overall and for the most contended sessions.
+
+        Args:
+            nb_hottest (int, optional): Number of sessions to report, the ones that waited the
+                longest in total first. Defaults to 10.
+
+        Returns:
+            dict[str, Any]: ``{'global': ..., 'sessions': {game_id: ...}}``, in a JSON-friendly shape.
+        """
+        hottest = sorted(
+            self.items(),
+            key=lambda item: (item[1].lock_stats.wait.total, item[1].lock_stats.timeouts),
+            reverse=True,
+        )[:nb_hottest]
+        return {
+            'global': self.lock_stats.as_dict(),
+            'sessions': {game_id: session.lock_stats.as_dict() for game_id, session in hottest},
+        }
+
+    def touch(self, game_id: str, session: GameSession) -> None:
         """Bumps a session's last-accessed timestamp.
 
+        With the ``'lru'`` policy, this also makes it the most recently used session. The reaper's
+        heap isn't updated here: the reaper re-reads this timestamp when the session's previous
+        expiry comes due.
+
+        With a shared backend, the access is recorded there too (at most once a second), for the
+        other processes' reapers to see.
+
         Args:
-            session (GameSession): Session to update. Caller must already hold ``session.lock``
-                (see :meth:`locked`).
+            game_id (str): Id of the session.
+            session (GameSession): Session to update. Lock-free readers of its snapshot may call
+                this without holding ``session.lock``: the timestamp is a single attribute write.
         """
-        session.last_accessed = int(time.time())
+        now = int(time.time())
+        if self._shared is not None and now != session.last_accessed:
+            self._shared.touch(game_id, now)
+        session.last_accessed = now
+        if self._lru is not None:
+            with self._lru_lock:
+                if self._lru.get(game_id) is session:
+                    self._lru.move_to_end(game_id)
@@ -5,11 +5,16 @@
 @rules: https://en.wikipedia.org/wiki/Set_(card_game)#Games
 """
 
+import functools
 import logging
+import random
 import time
+from collections.abc import Callable
 
 from pydantic import BaseModel, ValidationError
 
+from pyset.ai_scheduler import AIScheduler
+from pyset.modules.game.clock import WallClock
 from pyset.modules.game.game import Game, GameState
 from pyset.modules.game.set import Grid
 from pyset.modules.misc.helpers import StatusFunction
@@ -26,6 +31,8 @@ from pyset.modules.web.models import (
     GameGridResponse,
     GameStateResponse,
     HintsResponse,
+    LockMetricsRequest,
+    LockMetricsResponse,
     PlayersInfosResponse,
     PublicConfigResponse,
     RemovePlayerRequest,
@@ -39,10 +46,53 @@ from pyset.modules.web.models import (
     SubmitSetResponse,
     VersionResponse,
 )
-from pyset.session_store import GameSession, LogEvent, SessionStore
+from pyset.session_backend import RedisBackend, SQLiteBackend
+from pyset.session_store import (
+    GameSession,
+    LogEvent,
+    SessionBackend,
+    SessionBusyError,
+    SessionConflictError,
+    SessionStore,
+)
 
 __version__ = '0.1.0'
 
+# Games only measure durations (rounds, pauses, penalties): immune to wall-clock jumps
+_game_clock = WallClock(monotonic=True)
+
+# Attempts of a change that keeps losing its session to other workers (see SessionConflictError)
+_MAX_CONFLICT_ATTEMPTS = 3
+
+
+def _busy_session_as_error[**P](func: Callable[P, ApiResponse]) -> Callable[P, ApiResponse]:
+    """Turns a session lock given up on (see :meth:`SessionStore.locked`) into a SESSION_BUSY response.
+
+    A change refused because another worker changed the session first (see
+    :class:`SessionConflictError`) is retried from scratch, against the session's latest state --
+    the refused attempt only ever changed a copy, now dropped. Past a few attempts, the session is
+    busy too.
+
+    Args:
+        func (Callable[P, ApiResponse]): Endpoint locking a session.
+
+    Returns:
+        Callable[P, ApiResponse]: Wrapped endpoint.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> ApiResponse:
+        for _ in range(_MAX_CONFLICT_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except SessionBusyError:
+                break
+            except SessionConflictError:
+                continue
+        return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.SESSION_BUSY)
+
+    return wrapper
+
 
 class ViewModelApp:
     """Bridges the Flask API (see :mod:`pyset.modules.web.app_factory`) and the game engine."""
@@ -65,7 +115,28 @@ class ViewModelApp:
 
         self.logger.info('%s version %s', self.__class__.__name__, __version__)
 
-        self.sessions = SessionStore(config=conf, logger=self.logger)
+        self._rand = random.Random()
+        self.ai_scheduler = AIScheduler(play_turn=self._play_ai_turn, logger=self.logger)
+        backend: SessionBackend | None = None
+        if conf.session_backend == 'sqlite':
+            backend = SQLiteBackend(conf.session_db_path, logger=self.logger, clock=_game_clock)
+        elif conf.session_backend == 'redis':
+            backend = RedisBackend(conf.session_redis_url, logger=self.logger, clock=_game_clock)
+        self.sessions = SessionStore(
+            config=conf, logger=self.logger, on_remove=self.ai_scheduler.cancel, backend=backend
+        )
+
+        # Sessions reloaded from the backend: their bots pick up where they left off. Shared
+        # sessions' bots are played by the worker that started them, not by every worker starting.
+        if conf.session_backend != 'redis':
+            for game_id, session in self.sessions.items():
+                if session.game.get_game_state() == GameState.RUNNING.name:
+                    self._schedule_ai_players(game_id, session.game)
+
+    def close(self) -> None:
+        """Stops the AI players, then closes the session store (see :meth:`SessionStore.close`)."""
+        self.ai_scheduler.close()
+        self.sessions.close()
 
     ################################################
     #              PRIVATE  FUNCTIONS              #
@@ -89,7 +160,8 @@ class ViewModelApp:
             ignore_empty_game_id (bool, optional): Skip the "game_id must be set" check. Defaults to False.
             ignore_empty_game_secret (bool, optional): Skip the "game_secret must match" check. Defaults to False.
             ignore_missing_game (bool, optional): Skip the "game must exist" check. Defaults to False.
-            check_max_sessions (bool, optional): Reject once the session table is full. Only meaningful
+            check_max_sessions (bool, optional): Reject once the session table is full (and no
+                session can be evicted to make room, see :meth:`SessionStore.make_room`). Only meaningful
                 for requests that are about to create a new session (i.e. combined with
                 `ignore_missing_game=True`) -- otherwise a missing game already fails above with
                 `GAME_ID_DOES_NOT_EXIST` regardless of this flag. Defaults to False.
@@ -123,11 +195,70 @@ class ViewModelApp:
         if not ignore_empty_game_secret and session is not None and session.game_secret != game_secret:
             return SanityCheckFailure(error=ApiError.INVALID_SECRET)
 
-        if check_max_sessions and self.sessions.is_full() and session is None:
+        if check_max_sessions and session is None and not self.sessions.make_room():
             return SanityCheckFailure(error=ApiError.MAX_SESSIONS_REACHED)
 
         return SanityCheckSuccess(game_id=game_id, game_secret=game_secret, request=data)
 
+    def _get_ai_think_time(self, difficulty: str | None) -> float:
+        """Draws how long an AI player thinks before its next move, from the configured window.
+
+        Args:
+            difficulty (str | None): AI difficulty tier (see :class:`AIDifficultyConfig`).
+
+        Returns:
+            float: Thinking time, in seconds.
+        """
+        min_time, max_time = getattr(self.config.ai, difficulty or 'normal', self.config.ai.normal)
+        return self._rand.uniform(min_time, max_time) / 1000
+
+    def _schedule_ai_players(self, game_id: str, game: Game) -> None:
+        """(Re)starts the turns of every AI player of a game, dropping any pending one first.
+
+        Args:
+            game_id (str): Session of the game.
+            game (Game): The game. Caller must hold the session's lock.
+        """
+        self.ai_scheduler.cancel(game_id)
+        for player in game.get_players():
+            if player.is_ai:
+                self.ai_scheduler.schedule(game_id, player.name, self._get_ai_think_time(player.get_stats().difficulty))
+
+    def _play_ai_turn(self, game_id: str, player_name: str) -> float | None:
+        """Plays one turn of an AI player: submits a valid set on its behalf (see :class:`AIScheduler`).
+
+        Bot moves don't count as session activity: a game left to its bots still expires.
+
+        Args:
+            game_id (str): Session the player is in.
+            player_name (str): AI player to play.
+
+        Returns:
+            float | None: Seconds until the player's next turn, or None if it shouldn't play anymore
+            (session gone, game not running, player removed).
+        """
+        try:
+            with self.sessions.locked(game_id) as session:
+                if session is None:
+                    return None
+
+                game = session.game
+                player = next((player for player in game.get_players() if player.name == player_name), None)
+
+                if game.get_game_state() != GameState.RUNNING.name or player is None or not player.is_ai:
+                    return None
+
+                result = game.submit_set_from_player_name(player_name)
+                game.update_game(enable_pause=False)
+                self.sessions.publish(game_id, session)
+                self.logger.info('AI %s in %s: %s %s', player_name, game_id, result.status, result.cards_set)
+
+                if game.get_game_state() != GameState.RUNNING.name:
+                    return None
+                return self._get_ai_think_time(player.get_stats().difficulty)
+        except (SessionBusyError, SessionConflictError):
+            return self._get_ai_think_time(None)  # Session swamped (or changed by another worker): try again later
+
     ################################################
     #                  BASIC  API                  #
     ################################################
@@ -166,8 +297,6 @@ class ViewModelApp:
         Returns:
             RunningGamesResponse: Running sessions summary.
         """
-        self.sessions.evict_inactive()
-
         games = [
             RunningGameInfo(game_id=game_id, has_secret=session.game_secret != '')
             for game_id, session in self.sessions.items()
@@ -194,7 +323,7 @@ class ViewModelApp:
 
         def build_session() -> GameSession:
             now = int(time.time())
-            game = Game(Grid())
+            game = Game(Grid(), clock=_game_clock)
             _ = game.set_penalty_time(self.config.penalty_timeout_seconds)
             _ = game.set_max_player(self.config.max_players)
             return GameSession(
@@ -215,8 +344,6 @@ class ViewModelApp:
         Returns:
             ApiResponse: Outcome of the operation.
         """
-        self.sessions.evict_inactive()
-
         sanity_check = self._sanity_check(
             DeleteRunningGamesRequest,
             params,
@@ -240,11 +367,42 @@ class ViewModelApp:
 
         return ApiResponse(status=StatusFunction.SUCCESS.name)
 
+    @export
+    def get_lock_metrics(self, params: bytes | str | None = None) -> ApiResponse:
+        """Returns the session lock contention metrics, overall and per hot session. Requires the admin secret.
+
+        Args:
+            params (bytes | str | None, optional): Raw JSON payload. Defaults to None.
+
+        Returns:
+            ApiResponse: Outcome of the operation.
+        """
+        sanity_check = self._sanity_check(
+            LockMetricsRequest,
+            params,
+            ignore_empty_game_id=True,
+            ignore_empty_game_secret=True,
+            ignore_missing_game=True,
+        )
+        if isinstance(sanity_check, SanityCheckFailure):
+            return ApiResponse(status=StatusFunction.ERROR.name, error=sanity_check.error)
+
+        secret = sanity_check.request.secret
+
+        if secret == '':
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.PARAMS_ERROR)
+
+        if secret != self.config.secret:
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.NOT_ALLOWED)
+
+        return LockMetricsResponse(status=StatusFunction.SUCCESS.name, metrics=self.sessions.lock_metrics())
+
     ################################################
     #                 PLAYER  API                  #
     ################################################
 
     @export
+    @_busy_session_as_error
     def remove_player(self, params: bytes | str | None = None) -> ApiResponse:
         """Removes a player from a game session.
 
@@ -269,15 +427,17 @@ class ViewModelApp:
 
             result = game.remove_player(player_name=sanity_check.request.name)
 
-            SessionStore.touch(session)
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return PlayersInfosResponse(
                 status=StatusFunction.SUCCESS.name if result.status else StatusFunction.ERROR.name,
-                players_stats=[player.get_stats() for player in game.get_players()],
+                players_stats=list(session.snapshot.players_stats),
                 game_state=game.get_game_state(),
                 error=result.error,
             )
 
     @export
+    @_busy_session_as_error
     def add_player(self, params: bytes | str | None = None) -> ApiResponse:
         """Adds a player to a game session.
 
@@ -306,12 +466,16 @@ class ViewModelApp:
             if len(player_name) <= 2:
                 return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.INVALID_PLAYER_NAME)
 
-            result = game.add_player(player_name=player_name, player_color=player_color)
+            difficulty = sanity_check.request.difficulty
+            result = game.add_player(
+                player_name=player_name, player_color=player_color, is_ai=difficulty is not None, difficulty=difficulty
+            )
 
-            SessionStore.touch(session)
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return PlayersInfosResponse(
                 status=StatusFunction.SUCCESS.name if result.status else StatusFunction.ERROR.name,
-                players_stats=[player.get_stats() for player in game.get_players()],
+                players_stats=list(session.snapshot.players_stats),
                 game_state=game.get_game_state(),
                 error=result.error,
             )
@@ -330,20 +494,20 @@ class ViewModelApp:
         if isinstance(sanity_check, SanityCheckFailure):
             return ApiResponse(status=StatusFunction.ERROR.name, error=sanity_check.error)
 
-        with self.sessions.locked(sanity_check.game_id) as session:
-            if session is None:
-                return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
+        session = self.sessions.get(sanity_check.game_id)
+        if session is None:
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
 
-            game = session.game
-
-            SessionStore.touch(session)
-            return PlayersInfosResponse(
-                status=StatusFunction.SUCCESS.name,
-                players_stats=[player.get_stats() for player in game.get_players()],
-                game_state=game.get_game_state(),
-            )
+        snapshot = session.snapshot
+        self.sessions.touch(sanity_check.game_id, session)
+        return PlayersInfosResponse(
+            status=StatusFunction.SUCCESS.name,
+            players_stats=list(snapshot.players_stats),
+            game_state=snapshot.game_state,
+        )
 
     @export
+    @_busy_session_as_error
     def submit_set(self, params: bytes | str | None = None) -> ApiResponse:
         """Submits a candidate set on behalf of a player.
 
@@ -366,14 +530,23 @@ class ViewModelApp:
             player_name = sanity_check.request.player_name
             cards_set = sanity_check.request.cards_set
 
-            cards_displayed = game.grid.get_displayed_cards()
-            if not all(card in cards_displayed for card in cards_set):
+            # Constant-time, no grid copy -- also turns away wrong-length or duplicate selections,
+            # which aren't a player mistake worth a penalty but a malformed request
+            if not game.grid.are_cards_on_grid(cards_set):
                 return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.CARDS_NOT_FOUND)
 
+            was_running = game.get_game_state() == GameState.RUNNING.name
             result = game.submit_set_from_player_name(player_name, cards_set)
             game.update_game(enable_pause=False)
 
-            SessionStore.touch(session)
+            # Submitting resumes a paused game: so do its bots
+            if game.get_game_state() != GameState.RUNNING.name:
+                self.ai_scheduler.cancel(sanity_check.game_id)
+            elif not was_running:
+                self._schedule_ai_players(sanity_check.game_id, game)
+
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return SubmitSetResponse(
                 status=StatusFunction.SUCCESS.name,
                 is_valid=result.status,
@@ -384,6 +557,7 @@ class ViewModelApp:
             )
 
     @export
+    @_busy_session_as_error
     def apply_penalty(self, params: bytes | str | None = None) -> ApiResponse:
         """Applies a penalty to a player.
 
@@ -404,7 +578,8 @@ class ViewModelApp:
             game = session.game
             result = game.apply_penalty_from_player_name(sanity_check.request.player_name)
 
-            SessionStore.touch(session)
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return GameStateResponse(
                 status=StatusFunction.SUCCESS.name if result.status else StatusFunction.ERROR.name,
                 game_state=game.get_game_state(),
@@ -415,6 +590,7 @@ class ViewModelApp:
     ################################################
 
     @export
+    @_busy_session_as_error
     def change_game_state(self, params: bytes | str | None = None) -> ApiResponse:
         """Starts, resumes or pauses a game session.
 
@@ -442,10 +618,16 @@ class ViewModelApp:
 
             game.update_game(sanity_check.request.enable_pause)
             self.logger.info('Game is now: %s', game.get_game_state())
+
+            if game.get_game_state() == GameState.RUNNING.name:
+                self._schedule_ai_players(sanity_check.game_id, game)
+            else:
+                self.ai_scheduler.cancel(sanity_check.game_id)
             if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug('Grid Layout:\n%s', game.grid.grid_as_str())
 
-            SessionStore.touch(session)
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return GameGridResponse(
                 status=StatusFunction.SUCCESS.name,
                 grid=game.grid.arrange_cards_to_grid(),
@@ -454,6 +636,7 @@ class ViewModelApp:
             )
 
     @export
+    @_busy_session_as_error
     def reset_game(self, params: bytes | str | None = None) -> ApiResponse:
         """Resets a game session, optionally keeping the current roster.
 
@@ -474,10 +657,11 @@ class ViewModelApp:
             hard_reset = sanity_check.request.hard
             old_game = session.game
 
-            new_game = Game(Grid())
+            new_game = Game(Grid(), clock=_game_clock)
             _ = new_game.set_penalty_time(self.config.penalty_timeout_seconds)
             _ = new_game.set_max_player(self.config.max_players)
             session.game = new_game
+            self.ai_scheduler.cancel(sanity_check.game_id)
 
             # hard_reset defaults to True, i.e. the common case -- only bother snapshotting and
             # rebuilding the roster when a soft reset actually needs it.
@@ -491,7 +675,8 @@ class ViewModelApp:
                         difficulty=stats.difficulty,
                     )
 
-            SessionStore.touch(session)
+            self.sessions.publish(sanity_check.game_id, session)
+            self.sessions.touch(sanity_check.game_id, session)
             return GameStateResponse(status=StatusFunction.SUCCESS.name, game_state=new_game.get_game_state())
 
     @export
@@ -508,22 +693,21 @@ class ViewModelApp:
         if isinstance(sanity_check, SanityCheckFailure):
             return ApiResponse(status=StatusFunction.ERROR.name, error=sanity_check.error)
 
-        with self.sessions.locked(sanity_check.game_id) as session:
-            if session is None:
-                return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
+        session = self.sessions.get(sanity_check.game_id)
+        if session is None:
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
 
-            game = session.game
-
-            if self.logger.isEnabledFor(logging.DEBUG):
-                self.logger.debug('Grid Layout:\n%s', game.grid.grid_as_str())
+        snapshot = session.snapshot
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Grid Layout:\n%s', '\n'.join(str(list(row)) for row in snapshot.grid))
 
-            SessionStore.touch(session)
-            return GameGridResponse(
-                status=StatusFunction.SUCCESS.name,
-                grid=game.grid.arrange_cards_to_grid(),
-                draw_pile=game.grid.get_number_cards_left_in_deck(),
-                game_state=game.get_game_state(),
-            )
+        self.sessions.touch(sanity_check.game_id, session)
+        return GameGridResponse(
+            status=StatusFunction.SUCCESS.name,
+            grid=[list(row) for row in snapshot.grid],
+            draw_pile=snapshot.draw_pile,
+            game_state=snapshot.game_state,
+        )
 
     @export
     def get_game_state(self, params: bytes | str | None = None) -> ApiResponse:
@@ -539,12 +723,12 @@ class ViewModelApp:
         if isinstance(sanity_check, SanityCheckFailure):
             return ApiResponse(status=StatusFunction.ERROR.name, error=sanity_check.error)
 
-        with self.sessions.locked(sanity_check.game_id) as session:
-            if session is None:
-                return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
+        session = self.sessions.get(sanity_check.game_id)
+        if session is None:
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
 
-            SessionStore.touch(session)
-            return GameStateResponse(status=StatusFunction.SUCCESS.name, game_state=session.game.get_game_state())
+        self.sessions.touch(sanity_check.game_id, session)
+        return GameStateResponse(status=StatusFunction.SUCCESS.name, game_state=session.snapshot.game_state)
 
     @export
     def get_hints(self, params: bytes | str | None = None) -> ApiResponse:
@@ -560,14 +744,14 @@ class ViewModelApp:
         if isinstance(sanity_check, SanityCheckFailure):
             return ApiResponse(status=StatusFunction.ERROR.name, error=sanity_check.error)
 
-        with self.sessions.locked(sanity_check.game_id) as session:
-            if session is None:
-                return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
+        session = self.sessions.get(sanity_check.game_id)
+        if session is None:
+            return ApiResponse(status=StatusFunction.ERROR.name, error=ApiError.GAME_ID_DOES_NOT_EXIST)
 
-            game = session.game
-            SessionStore.touch(session)
-            return HintsResponse(
-                status=StatusFunction.SUCCESS.name,
-                sets=game.grid.get_unique_sets_on_grid(),
-                game_state=game.get_game_state(),
-            )
+        snapshot = session.snapshot
+        self.sessions.touch(sanity_check.game_id, session)
+        return HintsResponse(
+            status=StatusFunction.SUCCESS.name,
+            sets=[list(card_set) for card_set in snapshot.hints],
+            game_state=snapshot.game_state,
+        )
@@ -1,12 +1,14 @@
 """Shared pytest fixtures for the pySET test suite."""
 
 import logging
+from collections.abc import Iterator
 
 import pytest
 
 from pyset.modules.misc.models import AppConfig
 from pyset.session_store import SessionStore
 from pyset.view_model_app import ViewModelApp
+from tests.fake_redis import FakeRedisServer
 
 
 @pytest.fixture(autouse=True)
@@ -38,12 +40,24 @@ def app_config() -> AppConfig:
 
 
 @pytest.fixture
-def vm(app_config: AppConfig) -> ViewModelApp:
+def vm(app_config: AppConfig) -> Iterator[ViewModelApp]:
     """A ViewModelApp wired with the test config, exercised without going through Flask."""
-    return ViewModelApp(app_config, scheme='http://', subdomain='localhost')
+    view_model = ViewModelApp(app_config, scheme='http://', subdomain='localhost')
+    yield view_model
+    view_model.close()
 
 
 @pytest.fixture
-def session_store(app_config: AppConfig) -> SessionStore:
-    """A SessionStore wired with the test config, for direct unit testing."""
-    return SessionStore(config=app_config, logger=logging.getLogger('test_session_store'))
+def session_store(app_config: AppConfig) -> Iterator[SessionStore]:
+    """A SessionStore wired with the test config, for direct unit testing. Closed after the test."""
+    store = SessionStore(config=app_config, logger=logging.getLogger('test_session_store'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def fake_redis() -> Iterator[FakeRedisServer]:
+    """An in-process stand-in for a Redis server, stopped after the test."""
+    server = FakeRedisServer()
+    yield server
+    server.close()
@@ -0,0 +1,238 @@
+"""In-process stand-in for a Redis server, for the tests of :class:`pyset.session_backend.RedisBackend`."""
+
+import itertools
+import socketserver
+import threading
+from typing import Any, BinaryIO, cast
+
+from pyset.resp import RespError, read_reply
+
+
+def encode_reply(reply: Any) -> bytes:
+    """Encodes a reply: str as a status, bytes as a bulk string, None as a null bulk string.
+
+    Args:
+        reply (Any): str, bytes, int, None, :class:`pyset.resp.RespError`, or a list of those.
+
+    Returns:
+        bytes: The encoded reply.
+    """
+    if isinstance(reply, RespError):
+        return f'-{reply}\r\n'.encode()
+    if isinstance(reply, str):
+        return f'+{reply}\r\n'.encode()
+    if isinstance(reply, int):
+        return f':{reply}\r\n'.encode()
+    if isinstance(reply, bytes):
+        return b'$%d\r\n%b\r\n' % (len(reply), reply)
+    if isinstance(reply, list):
+        return f'*{len(reply)}\r\n'.encode() + b''.join(encode_reply(item) for item in reply)
+    return b'$-1\r\n'
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    """Threaded TCP server, one thread per connection, handing every command to its store."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], store: 'FakeRedisServer'):
+        """Initializes the _Server, listening right away.
+
+        Args:
+            address (tuple[str, int]): Address to listen on.
+            store (FakeRedisServer): Data the connections share.
+        """
+        super().__init__(address, _Handler)
+        self.store = store
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One client connection: reads its commands, keeping its transaction state (WATCH/MULTI)."""
+
+    def handle(self) -> None:
+        """Serves the connection until the client closes it."""
+        store = cast(_Server, self.server).store
+        watched: dict[bytes, int] = {}  # Revision of every watched key, when watched
+        queued: list[list[bytes]] | None = None  # Commands queued since MULTI
+
+        while True:
+            try:
+                command = read_reply(cast(BinaryIO, self.rfile))
+            except (ConnectionError, OSError):
+                return
+
+            name = command[0].upper() if isinstance(command, list) and command else b''
+            args = command[1:] if isinstance(command, list) else []
+            reply: Any
+            if not name:
+                reply = RespError('ERR Protocol error: expected an array of bulk strings')
+            elif name == b'MULTI':
+                queued, reply = [], 'OK'
+            elif name == b'DISCARD':
+                watched, queued, reply = {}, None, 'OK'
+            elif name == b'UNWATCH':
+                watched, reply = {}, 'OK'
+            elif name == b'WATCH':
+                watched.update(store.revisions(args))
+                reply = 'OK'
+            elif name == b'EXEC':
+                if queued is None:
+                    reply = RespError('ERR EXEC without MULTI')
+                else:
+                    reply = store.execute_if_unchanged(watched, queued)
+                watched, queued = {}, None
+            elif queued is not None:
+                queued.append(command)
+                reply = 'QUEUED'
+            else:
+                reply = store.execute(command)
+
+            self.wfile.write(b'*-1\r\n' if name == b'EXEC' and reply is None else encode_reply(reply))
+
+
+class FakeRedisServer:
+    """In-process stand-in for a Redis server, listening on a local port.
+
+    Supports the strings and sets commands :class:`pyset.session_backend.RedisBackend` uses, and
+    optimistic transactions (WATCH/MULTI/EXEC): every write gives its key a new revision, and EXEC
+    aborts -- replying a null array -- if any key watched by the connection got one since. Commands
+    run one at a time, under a single lock, like on a real server.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """Initializes the FakeRedisServer, serving from a background thread.
+
+        Args:
+            host (str, optional): Host to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): Port to listen on, 0 for any free one. Defaults to 0.
+        """
+        self._data: dict[bytes, bytes | set[bytes]] = {}
+        self._revisions: dict[bytes, int] = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._server = _Server((host, port), self)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, name='fake-redis', daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """URL to connect to the server with (see :class:`pyset.session_backend.RedisBackend`)."""
+        host, port = self._server.server_address[:2]
+        return f'redis://{host!s}:{port!s}/0'
+
+    def close(self) -> None:
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def revisions(self, keys: list[bytes]) -> dict[bytes, int]:
+        """Returns the current revision of keys (0 if never written).
+
+        Args:
+            keys (list[bytes]): Keys to look up.
+
+        Returns:
+            dict[bytes, int]: Revision of every key.
+        """
+        with self._lock:
+            return {key: self._revisions.get(key, 0) for key in keys}
+
+    def execute(self, command: list[bytes]) -> Any:
+        """Runs a single command, atomically.
+
+        Args:
+            command (list[bytes]): Command name and arguments.
+
+        Returns:
+            Any: Its reply (see :func:`encode_reply`).
+        """
+        with self._lock:
+            return self._run(command)
+
+    def execute_if_unchanged(self, watched: dict[bytes, int], commands: list[list[bytes]]) -> list[Any] | None:
+        """Runs commands atomically, unless a watched key was written since it was watched.
+
+        Args:
+            watched (dict[bytes, int]): Revision of every watched key, when watched.
+            commands (list[list[bytes]]): Commands to run.
+
+        Returns:
+            list[Any] | None: Reply of every command, or None if the transaction was aborted.
+        """
+        with self._lock:
+            if any(self._revisions.get(key, 0) != revision for key, revision in watched.items()):
+                return None
+            return [self._run(command) for command in commands]
+
+    def _written(self, key: bytes) -> None:
+        """Gives a key a new revision. Caller must hold ``_lock``.
+
+        Args:
+            key (bytes): Written key.
+        """
+        self._revisions[key] = next(self._counter)
+
+    def _run(self, command: list[bytes]) -> Any:
+        """Runs a single command. Caller must hold ``_lock``.
+
+        Args:
+            command (list[bytes]): Command name and arguments.
+
+        Returns:
+            Any: Its reply (see :func:`encode_reply`).
+        """
+        name, args = command[0].upper(), command[1:]
+        if name == b'PING':
+            return 'PONG'
+        if name == b'SELECT':
+            return 'OK'
+        if name == b'FLUSHALL':
+            for key in self._data:
+                self._written(key)
+            self._data.clear()
+            return 'OK'
+        if name in (b'GET', b'MGET'):
+            values = [self._data.get(key) for key in args]
+            if any(isinstance(value, set) for value in values):
+                return RespError('WRONGTYPE Operation against a key holding the wrong kind of value')
+            return values[0] if name == b'GET' else values
+        if name == b'SET':
+            key, value, *options = args
+            if b'NX' in (option.upper() for option in options) and key in self._data:
+                return None
+            self._data[key] = value
+            self._written(key)
+            return 'OK'
+        if name in (b'DEL', b'EXISTS'):
+            present = [key for key in args if key in self._data]
+            if name == b'DEL':
+                for key in present:
+                    del self._data[key]
+                    self._written(key)
+            return len(present)
+
+        if name in (b'SADD', b'SREM', b'SMEMBERS', b'SCARD'):
+            key, members = args[0], set(args[1:])
+            stored = self._data.get(key, set())
+            if not isinstance(stored, set):
+                return RespError('WRONGTYPE Operation against a key holding the wrong kind of value')
+            if name == b'SMEMBERS':
+                return sorted(stored)
+            if name == b'SCARD':
+                return len(stored)
+
+            changed = members - stored if name == b'SADD' else members & stored
+            if changed:
+                stored = stored | changed if name == b'SADD' else stored - changed
+                if stored:
+                    self._data[key] = stored
+                else:
+                    _ = self._data.pop(key, None)
+                self._written(key)
+            return len(changed)
+
+        return RespError(f'ERR unknown command {name.decode(errors="replace")!r}')
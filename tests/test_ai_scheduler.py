@@ -0,0 +1,135 @@
+"""Tests for pyset.ai_scheduler.AIScheduler, and the AI players it drives through ViewModelApp."""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from pyset.ai_scheduler import AIScheduler
+from pyset.modules.misc.models import AIDifficultyConfig, AppConfig
+from pyset.view_model_app import ViewModelApp
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_turns_fire_in_due_order_and_chain_until_stopped():
+    turns: list[tuple[str, str]] = []
+    lock = threading.Lock()
+
+    def play_turn(game_id: str, player_name: str) -> float | None:
+        with lock:
+            turns.append((game_id, player_name))
+            return 0.001 if sum(1 for turn in turns if turn == (game_id, player_name)) < 3 else None
+
+    scheduler = AIScheduler(play_turn, logging.getLogger('test_ai_scheduler'))
+    scheduler.schedule('g1', 'late', 0.05)
+    scheduler.schedule('g1', 'early', 0.0)
+
+    assert _wait_for(lambda: len(turns) == 6 and len(scheduler) == 0)
+    assert turns[0] == ('g1', 'early')
+    assert turns.count(('g1', 'late')) == 3
+    scheduler.close()
+
+
+def test_a_game_is_forgotten_once_its_last_chain_stops():
+    turns: list[str] = []
+
+    def play_turn(game_id: str, player_name: str) -> float | None:
+        turns.append(player_name)
+        return 0.001 if player_name == 'slow' and turns.count('slow') < 5 else None
+
+    scheduler = AIScheduler(play_turn, logging.getLogger('test_ai_scheduler'))
+    scheduler.schedule('g1', 'quick', 0.0)
+    scheduler.schedule('g1', 'slow', 0.0)
+
+    assert _wait_for(lambda: not scheduler._generations)
+    assert turns.count('quick') == 1  # Its chain stopped first, without retiring the other one
+    assert turns.count('slow') == 5
+    assert scheduler._nb_chains == {} and len(scheduler) == 0
+    scheduler.close()
+
+
+def test_cancel_drops_pending_turns_and_stops_in_flight_chains():
+    started, release = threading.Event(), threading.Event()
+    turns: list[str] = []
+
+    def play_turn(game_id: str, player_name: str) -> float | None:
+        turns.append(game_id)
+        if game_id == 'g1':
+            started.set()
+            _ = release.wait(5.0)
+        return 0.001
+
+    scheduler = AIScheduler(play_turn, logging.getLogger('test_ai_scheduler'))
+    scheduler.schedule('g1', 'bot', 0.0)
+    assert started.wait(5.0)
+
+    scheduler.schedule('g2', 'bot', 60.0)
+    scheduler.cancel('g2')
+    scheduler.cancel('g1')  # while its turn is being played
+    release.set()
+
+    time.sleep(0.05)
+    assert turns == ['g1']
+    assert len(scheduler) == 0
+    scheduler.close()
+
+
+def test_close_stops_the_thread_and_drops_pending_turns():
+    turns: list[str] = []
+    scheduler = AIScheduler(lambda game_id, _player_name: turns.append(game_id), logging.getLogger('test_ai_scheduler'))
+    scheduler.schedule('g1', 'bot', 60.0)
+    thread = scheduler._thread
+    assert thread is not None
+
+    scheduler.close()
+    scheduler.close()  # Idempotent
+
+    assert not thread.is_alive()
+    assert len(scheduler) == 0
+    scheduler.schedule('g1', 'bot', 0.0)  # Dropped
+    assert len(scheduler) == 0
+    assert turns == []
+
+
+def test_ai_players_play_server_side_until_paused():
+    config = AppConfig(
+        service_id='pySET-test',
+        max_sessions=5,
+        penalty_timeout_seconds=0,
+        secret='top-secret',
+        ai=AIDifficultyConfig(easy=(1, 2), normal=(1, 2), hard=(1, 2)),
+    )
+    vm = ViewModelApp(config, scheme='http://', subdomain='localhost')
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    assert vm.add_player(json.dumps({'gameID': 'g1', 'name': 'robot', 'difficulty': 'hard'})).status == 'SUCCESS'
+
+    def sets_found() -> int:
+        players_stats = vm.get_players_infos(json.dumps({'gameID': 'g1'})).players_stats
+        return int(players_stats[0].number_valid_sets)
+
+    vm.change_game_state(json.dumps({'gameID': 'g1', 'enablePause': False}))
+    assert _wait_for(lambda: sets_found() >= 2)
+
+    vm.change_game_state(json.dumps({'gameID': 'g1', 'enablePause': True}))
+    paused_at = sets_found()
+    time.sleep(0.05)
+    assert sets_found() == paused_at
+    assert len(vm.ai_scheduler) == 0
+    vm.close()
+
+
+def test_add_player_rejects_unknown_difficulty(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+
+    resp = vm.add_player(json.dumps({'gameID': 'g1', 'name': 'robot', 'difficulty': 'godlike'}))
+
+    assert resp.error == 'PARAMS_ERROR'
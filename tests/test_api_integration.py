@@ -1,15 +1,17 @@
 """End-to-end tests hitting the real Flask app (routing, JSON wire format, aliases)."""
 
 import json
+from collections.abc import Iterator
 
 import pytest
 from flask.testing import FlaskClient
 
+from pyset.modules.web.app_factory import AppView
 from pyset.server_app import create_app
 
 
 @pytest.fixture
-def client(tmp_path, monkeypatch) -> FlaskClient:
+def client(tmp_path, monkeypatch) -> Iterator[FlaskClient]:
     monkeypatch.chdir(tmp_path)  # keep the rotating log file out of the repo
 
     config_path = tmp_path / 'config.json'
@@ -37,7 +39,8 @@ def client(tmp_path, monkeypatch) -> FlaskClient:
 
     app = create_app(str(config_path), scheme='http://', subdomain='localhost', dist_path=str(dist_path))
     app.config.update(TESTING=True)
-    return app.test_client()
+    yield app.test_client()
+    AppView.api_class.close()
 
 
 def test_get_config_endpoint_excludes_secret(client: FlaskClient):
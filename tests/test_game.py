@@ -1,7 +1,11 @@
 """Tests for pyset.modules.game.game.Game."""
 
+import subprocess
+import sys
+
 import pytest
 
+from pyset.modules.game.clock import VirtualClock
 from pyset.modules.game.game import Game, GameState
 from pyset.modules.game.set import Grid
 
@@ -115,3 +119,65 @@ def test_game_state_transitions_through_pause_and_resume(game: Game):
 
     game.update_game(enable_pause=False)
     assert game.get_game_state() == GameState.RUNNING.name
+
+
+def test_engine_objects_are_slotted(game: Game):
+    _ = game.add_player('alice')
+
+    for engine_object in (game, game.grid, game.get_players()[0]):
+        assert not hasattr(engine_object, '__dict__')
+
+
+def test_engine_does_not_import_pydantic():
+    code = 'import sys, pyset.modules.game.game; print(any(name.startswith("pydantic") for name in sys.modules))'
+
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, check=True, text=True).stdout == 'False\n'
+
+
+def test_pause_extends_penalties_under_virtual_time():
+    clock = VirtualClock()
+    game = Game(Grid(), clock=clock)
+    _ = game.set_penalty_time(20)
+    _ = game.add_player('alice')
+    game.update_game()
+
+    _ = game.apply_penalty_from_player_name('alice')
+    _ = clock.advance(10.0)
+    game.update_game(enable_pause=True)
+    _ = clock.advance(100.0)  # paused: doesn't count towards the penalty
+    game.update_game(enable_pause=False)
+    _ = clock.advance(5.0)
+
+    result = game.submit_set_from_player_name('alice', game.grid.get_unique_sets_on_grid()[0])
+    assert result.error == 'PLAYER_ALICE_STILL_UNDER_PENALTY'
+
+    _ = clock.advance(6.0)
+    assert game.submit_set_from_player_name('alice', game.grid.get_unique_sets_on_grid()[0]).status is True
+    assert game.get_players()[0].get_stats().answers_time == [21]  # 10 s before the pause, 11 s after
+
+
+def test_game_state_is_rebased_against_the_clock_it_is_loaded_with():
+    clock = VirtualClock(start=50_000.0)  # E.g. a monotonic clock, long after boot
+    game = Game(Grid(), clock=clock)
+    _ = game.set_penalty_time(20)
+    _ = game.add_player('alice')
+    _ = game.add_player('bob')
+    game.update_game()
+    _ = clock.advance(4.0)
+    _ = game.apply_penalty_from_player_name('alice')
+    _ = clock.advance(6.0)
+
+    rebooted = VirtualClock()  # Starts over from 0
+    loaded = Game.from_state(game.get_state(), clock=rebooted, elapsed=3.0)
+
+    state = loaded.get_state()
+    assert (state['timer_age'], [player['penalty_age'] for player in state['players']]) == (13.0, [9.0, None])
+    assert state['grid'] == game.get_state()['grid']
+    assert loaded.get_game_state() == game.get_game_state()
+
+    result = loaded.submit_set_from_player_name('alice', loaded.grid.get_unique_sets_on_grid()[0])
+    assert result.error == 'PLAYER_ALICE_STILL_UNDER_PENALTY'  # 9 s into a 20 s penalty
+
+    _ = rebooted.advance(12.0)
+    assert loaded.submit_set_from_player_name('alice', loaded.grid.get_unique_sets_on_grid()[0]).status is True
+    assert loaded.get_players()[0].get_stats().answers_time == [25]  # 10 s before, 3 s stored, 12 s after
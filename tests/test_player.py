@@ -1,5 +1,6 @@
 """Tests for pyset.modules.game.player.Player."""
 
+from pyset.modules.game.clock import VirtualClock
 from pyset.modules.game.player import Player
 
 
@@ -55,3 +56,58 @@ def test_resume_penalty_shifts_the_penalty_clock_forward():
 
     assert resumed == penalty_before + 5.0
     assert player.get_last_penalty() == penalty_before + 5.0
+
+
+def test_get_stats_splits_the_found_cards_back_into_sets():
+    player = Player('alice')
+
+    for card_set in ([1111, 2222, 3333], [1123, 1231, 1312]):
+        _ = player.submit_set(card_set, timer=0.0, fold_cards_if_possible=lambda _cards: True)
+
+    stats = player.get_stats()
+    assert stats.valid_sets == [[1111, 2222, 3333], [1123, 1231, 1312]]
+    assert len(stats.answers_time) == 2
+
+
+def test_get_stats_is_cached_until_the_stats_change():
+    player = Player('alice')
+    stats = player.get_stats()
+
+    assert player.get_stats() is stats
+    _ = player.submit_set([1111, 2222, 3333], timer=0.0, fold_cards_if_possible=lambda _cards: True)
+    assert player.get_stats() is not stats
+    stats = player.get_stats()
+    _ = player.apply_penalty()
+    assert player.get_stats() is not stats
+    stats = player.get_stats()
+    _ = player.resume_penalty(1.0)  # Every update_game of a running game does: no stats change
+    assert player.get_stats() is stats
+
+
+def test_get_stats_keeps_the_last_found_sets_only():
+    clock = VirtualClock()
+    player = Player('alice', clock=clock)
+    nb_sets = Player.history_size + 5
+
+    for set_id in range(nb_sets):
+        _ = player.submit_set([set_id, set_id, set_id], timer=0.0, fold_cards_if_possible=lambda _cards: True)
+        _ = clock.advance(1.0)
+
+    stats = player.get_stats()
+    assert stats.number_valid_sets == nb_sets
+    assert stats.valid_sets == [[set_id] * 3 for set_id in range(5, nb_sets)]
+    assert stats.answers_time == list(range(5, nb_sets))
+    assert stats.average_answers_time == int(sum(range(nb_sets)) / nb_sets)
+
+
+def test_penalty_runs_on_the_player_clock():
+    clock = VirtualClock()
+    player = Player('alice', clock=clock)
+
+    assert not player.is_under_penalty(20)
+    _ = player.apply_penalty()  # at virtual time 0: still a penalty
+    assert player.is_under_penalty(20)
+    _ = clock.advance(20.5)
+    assert player.is_under_penalty(20)
+    _ = clock.advance(1.0)
+    assert not player.is_under_penalty(20)
@@ -0,0 +1,133 @@
+"""Tests for pyset.router: the consistent hash ring, and routing/aggregation over stub workers."""
+
+import json
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import pytest
+from werkzeug.serving import make_server
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from pyset.modules.misc.models import AppConfig
+from pyset.router import HashRing, Router, worker_settings
+
+
+class _StubWorker:
+    """Stands in for a pyset.server_app worker: keeps the game ids it was asked to create."""
+
+    def __init__(self) -> None:
+        self.games: list[str] = []
+        self.garbled = False  # Answers 200 with a body that isn't JSON
+        self.server = make_server('127.0.0.1', 0, self, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def address(self) -> str:
+        return f'127.0.0.1:{self.server.server_port}'
+
+    def __call__(self, environ: dict[str, Any], start_response: Any) -> Iterable[bytes]:
+        request = Request(environ)
+        if self.garbled:
+            return Response(b'<html>Bad Gateway</html>', mimetype='text/html')(environ, start_response)
+        endpoint = request.path.strip('/').rsplit('/', 1)[-1]
+        payload: dict[str, Any] = {'status': 'SUCCESS', 'error': ''}
+        if endpoint == 'init_set_game':
+            game_id = json.loads(request.get_data())['gameID']
+            if game_id not in self.games:
+                self.games.append(game_id)
+        elif endpoint == 'get_running_games':
+            payload['games'] = [{'game_id': game_id, 'has_secret': False} for game_id in self.games]
+        elif endpoint == 'delete_running_games' and json.loads(request.get_data())['secret'] != 'top-secret':
+            payload = {'status': 'ERROR', 'error': 'NOT_ALLOWED'}
+        return Response(json.dumps(payload), mimetype='application/json')(environ, start_response)
+
+
+@pytest.fixture
+def stub_workers() -> Iterator[list[_StubWorker]]:
+    workers = [_StubWorker(), _StubWorker()]
+    yield workers
+    for worker in workers:
+        worker.server.shutdown()
+
+
+def _running_games(client: Client) -> list[str]:
+    return sorted(game['game_id'] for game in client.get('/api/app/get_running_games/').get_json()['games'])
+
+
+def test_hash_ring_only_moves_the_keys_of_a_removed_node():
+    ring = HashRing(['a', 'b', 'c'])
+    keys = [f'game-{index}' for index in range(1000)]
+    before = {key: ring.node_for(key) for key in keys}
+
+    ring.remove('b')
+    after = {key: ring.node_for(key) for key in keys}
+
+    assert {node: list(before.values()).count(node) for node in 'abc'} == pytest.approx(
+        {'a': 333, 'b': 333, 'c': 333}, rel=0.3
+    )
+    assert all(after[key] == before[key] for key in keys if before[key] != 'b')
+    assert set(after.values()) == {'a', 'c'}
+
+    ring.add('b')
+    assert {key: ring.node_for(key) for key in keys} == before
+    assert HashRing().node_for('game-0') is None
+
+
+def test_sessions_live_in_one_worker_and_are_listed_across_all(stub_workers: list[_StubWorker]):
+    router = Router(worker.address for worker in stub_workers)
+    client = Client(router)
+    game_ids = [f'game-{index}' for index in range(20)]
+
+    for game_id in game_ids + game_ids:
+        assert client.post('/api/app/init_set_game/', json={'gameID': game_id}).get_json()['status'] == 'SUCCESS'
+
+    for worker in stub_workers:
+        assert worker.games  # Both got some
+        assert all(router.worker_for(game_id) == worker.address for game_id in worker.games)
+    assert sorted(stub_workers[0].games + stub_workers[1].games) == sorted(game_ids)
+    assert _running_games(client) == sorted(game_ids)
+
+    resp = client.post('/api/app/delete_running_games/', json={'secret': 'wrong'})
+    assert resp.get_json() == {'status': 'ERROR', 'error': 'NOT_ALLOWED'}
+
+
+def test_sessions_are_rerouted_while_their_worker_is_down(stub_workers: list[_StubWorker]):
+    down, up = stub_workers
+    router = Router(worker.address for worker in stub_workers)
+    client = Client(router)
+    game_id = next(f'game-{index}' for index in range(100) if router.worker_for(f'game-{index}') == down.address)
+
+    router.mark_down(down.address)
+    _ = client.post('/api/app/init_set_game/', json={'gameID': game_id})
+    assert (down.games, up.games) == ([], [game_id])
+    assert router.live_workers == [up.address]
+
+    router.mark_up(down.address)
+    assert router.worker_for(game_id) == down.address
+    assert _running_games(client) == [game_id]
+
+    router.mark_down(up.address)
+    router.mark_down(down.address)
+    assert client.get('/api/app/get_version/').status_code == 503
+
+
+def test_a_worker_answering_garbage_makes_fan_outs_unavailable(stub_workers: list[_StubWorker]):
+    client = Client(Router(worker.address for worker in stub_workers))
+    stub_workers[1].garbled = True
+
+    assert client.get('/api/app/get_running_games/').status_code == 503
+
+
+def test_workers_split_the_session_cap_and_get_their_own_database():
+    sqlite = AppConfig(max_sessions=10, session_backend='sqlite', session_db_path='data/sessions.sqlite3')
+
+    assert worker_settings(sqlite, 3) == [
+        {'MAX_SESSIONS': '4', 'SESSION_DB_PATH': 'data/sessions.worker0.sqlite3'},
+        {'MAX_SESSIONS': '3', 'SESSION_DB_PATH': 'data/sessions.worker1.sqlite3'},
+        {'MAX_SESSIONS': '3', 'SESSION_DB_PATH': 'data/sessions.worker2.sqlite3'},
+    ]
+    assert worker_settings(AppConfig(max_sessions=1), 2) == [{'MAX_SESSIONS': '1'}, {'MAX_SESSIONS': '1'}]
+    assert worker_settings(sqlite, 1) == [{}]
+    assert worker_settings(AppConfig(session_backend='redis'), 2) == [{}, {}]  # Already shared
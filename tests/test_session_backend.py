@@ -0,0 +1,218 @@
+"""Tests for pyset.session_backend: session serialization, the SQLite and Redis backends."""
+
+import json
+import logging
+import pickle
+import sqlite3
+import time
+import zlib
+
+import pytest
+
+from pyset.modules.game.clock import VirtualClock
+from pyset.modules.game.game import Game
+from pyset.modules.game.set import Grid
+from pyset.modules.misc.models import AppConfig
+from pyset.resp import RespConnection
+from pyset.session_backend import RedisBackend, SQLiteBackend, dump_session, load_session
+from pyset.session_store import GameSession, SessionConflictError, SessionStore
+from pyset.view_model_app import ViewModelApp
+from tests.fake_redis import FakeRedisServer
+
+
+def _sqlite_config(app_config: AppConfig, path: str) -> AppConfig:
+    return app_config.model_copy(update={'session_backend': 'sqlite', 'session_db_path': path})
+
+
+def test_a_session_survives_a_dump_and_load():
+    game = Game(Grid())
+    _ = game.add_player('alice')
+    _ = game.add_player('robot', is_ai=True)
+    game.update_game()
+    for _ in range(3):
+        _ = game.submit_set_from_player_name('robot')
+        game.update_game()
+    session = GameSession(game=game, game_secret='s3cret', created=1, last_accessed=2, ttl=3)
+
+    loaded = load_session(dump_session(session))
+
+    assert (loaded.game_secret, loaded.created, loaded.last_accessed, loaded.ttl) == ('s3cret', 1, 2, 3)
+    assert loaded.snapshot == session.snapshot
+    assert loaded.game.grid.get_unique_sets_on_grid() == game.grid.get_unique_sets_on_grid()
+    assert loaded.game.grid._full_deck is game.grid._full_deck  # The shared deck isn't copied
+    assert loaded.game._rand is game._rand
+    assert len(dump_session(session)) < 2048
+
+
+def _edit_blob(blob: bytes, **changes: object) -> bytes:
+    return zlib.compress(json.dumps(json.loads(zlib.decompress(blob)) | changes).encode())
+
+
+def test_blobs_of_another_format_are_rejected():
+    blob = dump_session(GameSession(game=Game(Grid()), created=1, last_accessed=2, ttl=3))
+
+    with pytest.raises(ValueError, match='Unsupported session format 0'):
+        _ = load_session(_edit_blob(blob, format=0))
+    with pytest.raises(ValueError, match='Not a serialized session'):
+        _ = load_session(zlib.compress(pickle.dumps(('not', 'json'))))
+    with pytest.raises(ValueError, match='Malformed session'):
+        _ = load_session(_edit_blob(blob, game={}))
+
+
+def test_time_spent_stored_counts_towards_penalties():
+    clock = VirtualClock(start=1_000_000.0)
+    game = Game(Grid(), clock=clock)
+    _ = game.set_penalty_time(20)
+    _ = game.add_player('alice')
+    game.update_game()
+    _ = game.apply_penalty_from_player_name('alice')
+    blob = dump_session(GameSession(game=game, created=1, last_accessed=2, ttl=3))
+    card_set = game.grid.get_unique_sets_on_grid()[0]
+
+    restarted = load_session(blob, clock=VirtualClock())
+    assert restarted.game.get_players()[0].is_under_penalty(20)
+
+    saved_at = json.loads(zlib.decompress(blob))['saved_at']
+    stored_for_a_while = load_session(_edit_blob(blob, saved_at=saved_at - 30), clock=VirtualClock())
+    assert stored_for_a_while.game.submit_set_from_player_name('alice', card_set).status is True
+
+
+def test_sessions_are_reloaded_on_startup(app_config: AppConfig, tmp_path):
+    config = _sqlite_config(app_config, str(tmp_path / 'sessions.sqlite3'))
+    vm = ViewModelApp(config, scheme='http://', subdomain='localhost')
+    vm.init_set_game(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein'}))
+    vm.init_set_game(json.dumps({'gameID': 'g2'}))
+    vm.add_player(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein', 'name': 'alice', 'color': '#123456'}))
+    vm.change_game_state(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein', 'enablePause': False}))
+    grid = vm.get_game(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein'})).grid
+    vm.close()
+
+    restarted = ViewModelApp(config.model_copy(), scheme='http://', subdomain='localhost')
+
+    assert sorted(game.game_id for game in restarted.get_running_games().games) == ['g1', 'g2']
+    resp = restarted.get_game(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein'}))
+    assert resp.grid == grid
+    assert resp.game_state == 'RUNNING'
+    players = restarted.get_players_infos(json.dumps({'gameID': 'g1', 'gameSecret': 'letmein'})).players_stats
+    assert [(player.name, player.color) for player in players] == [('alice', '#123456')]
+    restarted.close()
+
+
+def test_removed_sessions_are_deleted_from_the_database(app_config: AppConfig, tmp_path):
+    config = _sqlite_config(app_config, str(tmp_path / 'sessions.sqlite3'))
+    vm = ViewModelApp(config, scheme='http://', subdomain='localhost')
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    vm.delete_running_games(json.dumps({'secret': 'top-secret'}))
+    vm.close()
+
+    restarted = ViewModelApp(config.model_copy(), scheme='http://', subdomain='localhost')
+
+    assert restarted.get_running_games().games == []
+    restarted.close()
+
+
+def test_changes_are_written_behind_in_batches(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    backend = SQLiteBackend(path, logging.getLogger('test_session_backend'), flush_interval=0.05)
+    session = GameSession(game=Game(Grid()), created=0, last_accessed=0, ttl=1800)
+
+    for _ in range(100):
+        _ = backend.save('g1', session)  # Returns straight away: nothing written yet
+    _ = backend.save('g2', session)
+    backend.delete('g2')
+
+    deadline = time.monotonic() + 5
+    rows: list[tuple[str]] = []
+    while not rows and time.monotonic() < deadline:
+        time.sleep(0.01)
+        connection = sqlite3.connect(path)
+        rows = connection.execute('SELECT game_id FROM sessions').fetchall()
+        connection.close()
+
+    assert rows == [('g1',)]
+    connection = sqlite3.connect(path)
+    assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    connection.close()
+    backend.close()
+
+
+def _redis_config(app_config: AppConfig, server: FakeRedisServer) -> AppConfig:
+    return app_config.model_copy(update={'session_backend': 'redis', 'session_redis_url': server.url})
+
+
+def test_fake_redis_aborts_transactions_on_watched_keys(fake_redis: FakeRedisServer):
+    host, port = fake_redis.url.removeprefix('redis://').removesuffix('/0').split(':')
+    alice, bob = RespConnection(host, int(port)), RespConnection(host, int(port))
+
+    assert alice.pipeline([('SET', 'k', 1), ('WATCH', 'k'), ('GET', 'k')]) == ['OK', 'OK', b'1']
+    assert bob.execute('SET', 'k', 2) == 'OK'
+    assert alice.pipeline([('MULTI',), ('SET', 'k', 3), ('EXEC',)]) == ['OK', 'QUEUED', None]
+    assert alice.execute('GET', 'k') == b'2'
+
+    assert alice.pipeline([('WATCH', 'k'), ('MULTI',), ('SET', 'k', 3), ('SADD', 's', 'a'), ('EXEC',)])[-1] == [
+        'OK',
+        1,
+    ]
+    assert alice.execute('MGET', 'k', 'missing') == [b'3', None]
+    alice.close()
+    bob.close()
+
+
+def test_workers_share_sessions_through_redis(app_config: AppConfig, fake_redis: FakeRedisServer):
+    config = _redis_config(app_config, fake_redis)
+    worker_a = ViewModelApp(config, scheme='http://', subdomain='localhost')
+    worker_b = ViewModelApp(config.model_copy(), scheme='http://', subdomain='localhost')
+    game = {'gameID': 'g1', 'gameSecret': 'letmein'}
+
+    worker_a.init_set_game(json.dumps(game))
+    worker_b.init_set_game(json.dumps(game))  # Already exists: no-op
+    worker_b.add_player(json.dumps({**game, 'name': 'alice'}))
+    worker_a.add_player(json.dumps({**game, 'name': 'bob'}))
+    worker_b.change_game_state(json.dumps({**game, 'enablePause': False}))
+
+    players = worker_a.get_players_infos(json.dumps(game)).players_stats
+    assert [player.name for player in players] == ['alice', 'bob']
+    assert worker_a.get_game(json.dumps(game)).grid == worker_b.get_game(json.dumps(game)).grid
+    assert worker_a.get_game_state(json.dumps(game)).game_state == 'RUNNING'
+
+    worker_b.delete_running_games(json.dumps({'secret': 'top-secret'}))
+    assert worker_a.get_running_games().games == []
+    worker_a.close()
+    worker_b.close()
+
+
+def test_changes_to_outdated_copies_are_refused(app_config: AppConfig, fake_redis: FakeRedisServer):
+    logger = logging.getLogger('test_session_backend')
+    store_a = SessionStore(app_config, logger, backend=RedisBackend(fake_redis.url, logger))
+    store_b = SessionStore(app_config, logger, backend=RedisBackend(fake_redis.url, logger))
+    now = int(time.time())
+    store_a.create_if_missing('g1', lambda: GameSession(game=Game(Grid()), created=now, last_accessed=now, ttl=1800))
+
+    with store_a.locked('g1') as copy_a, store_b.locked('g1') as copy_b:
+        assert copy_a is not None and copy_b is not None
+        _ = copy_a.game.add_player('alice')
+        store_a.publish('g1', copy_a)
+
+        _ = copy_b.game.add_player('bob')
+        with pytest.raises(SessionConflictError):
+            store_b.publish('g1', copy_b)
+
+    latest = store_b.get('g1')
+    assert latest is not None and latest is not copy_b
+    assert [player.name for player in latest.game.get_players()] == ['alice']
+    assert latest.stored_version == 2
+    assert len(store_b) == 1
+    store_a.close()
+    store_b.close()
+
+
+def test_states_of_another_format_are_skipped(fake_redis: FakeRedisServer, caplog: pytest.LogCaptureFixture):
+    backend = RedisBackend(fake_redis.url, logging.getLogger('test_session_backend'))
+    now = int(time.time())
+    for game_id in ('current', 'pickled'):
+        assert backend.save(game_id, GameSession(game=Game(Grid()), created=now, last_accessed=now, ttl=1800))
+    _ = backend._pipeline([('SET', backend._key('pickled', 'state'), zlib.compress(pickle.dumps(('a', 'game'))))])
+
+    assert [game_id for game_id, _ in backend.load_all()] == ['current']
+    assert 'Could not load session pickled' in caplog.text
+    backend.close()
@@ -1,15 +1,19 @@
 """Tests for pyset.session_store.SessionStore."""
 
+import json
 import logging
 import threading
 import time
+from collections.abc import Callable, Iterator
+from typing import Any
 
 import pytest
 
 from pyset.modules.game.game import Game
 from pyset.modules.game.set import Grid
 from pyset.modules.misc.models import AppConfig
-from pyset.session_store import GameSession, SessionStore
+from pyset.session_store import GameSession, LatencyHistogram, RWLock, SessionBusyError, SessionStore
+from pyset.view_model_app import ViewModelApp
 
 
 def _make_session(last_accessed: int | None = None) -> GameSession:
@@ -23,6 +27,20 @@ def _make_session(last_accessed: int | None = None) -> GameSession:
     )
 
 
+@pytest.fixture
+def make_store() -> Iterator[Callable[..., SessionStore]]:
+    """Builds SessionStores (same arguments as SessionStore, logger excepted), all closed after the test."""
+    stores: list[SessionStore] = []
+
+    def make(**kwargs: Any) -> SessionStore:
+        stores.append(SessionStore(logger=logging.getLogger('test_session_store'), **kwargs))
+        return stores[-1]
+
+    yield make
+    for store in stores:
+        store.close()
+
+
 def test_starts_empty(session_store: SessionStore):
     assert len(session_store) == 0
     assert session_store.get('nope') is None
@@ -96,9 +114,9 @@ def test_is_full(session_store: SessionStore, app_config: AppConfig):
     assert session_store.is_full()
 
 
-def test_is_full_and_evict_inactive_read_config_live():
-    config = AppConfig(max_sessions=1, session_ttl_seconds=1000)
-    store = SessionStore(config=config, logger=logging.getLogger('test_session_store'))
+def test_is_full_reads_config_live(make_store: Callable[..., SessionStore]):
+    config = AppConfig(max_sessions=1)
+    store = make_store(config=config)
     store.create_if_missing('g1', _make_session)
 
     assert store.is_full()
@@ -109,27 +127,6 @@ def test_is_full_and_evict_inactive_read_config_live():
     assert not store.is_full()
 
 
-def test_evict_inactive_is_a_noop_when_not_full(session_store: SessionStore):
-    session_store.create_if_missing('stale', lambda: _make_session(last_accessed=0))
-
-    session_store.evict_inactive()
-
-    assert session_store.get('stale') is not None
-
-
-def test_evict_inactive_removes_only_stale_sessions_once_full(app_config: AppConfig):
-    config = AppConfig(max_sessions=2, session_ttl_seconds=100)
-    store = SessionStore(config=config, logger=logging.getLogger('test_session_store'))
-    store.create_if_missing('stale', lambda: _make_session(last_accessed=0))
-    store.create_if_missing('fresh', lambda: _make_session(last_accessed=int(time.time())))
-    assert store.is_full()
-
-    store.evict_inactive()
-
-    assert store.get('stale') is None
-    assert store.get('fresh') is not None
-
-
 def test_locked_yields_none_for_a_missing_session(session_store: SessionStore):
     with session_store.locked('nope') as session:
         assert session is None
@@ -200,6 +197,242 @@ def test_touch_updates_last_accessed(session_store: SessionStore):
     assert session is not None
     assert session.last_accessed == 0
 
-    SessionStore.touch(session)
+    session_store.touch('g1', session)
 
     assert session.last_accessed > 0
+
+
+def test_sessions_spread_over_shards_and_stay_reachable(app_config: AppConfig, make_store: Callable[..., SessionStore]):
+    store = make_store(config=app_config, nb_shards=4)
+    for i in range(40):
+        store.create_if_missing(f'g{i}', _make_session)
+
+    assert len(store) == 40
+    assert sum(1 for shard in store._shards if shard.sessions) > 1
+    assert all(store.get(f'g{i}') is not None for i in range(40))
+    assert sorted(game_id for game_id, _ in store.items()) == sorted(f'g{i}' for i in range(40))
+
+
+def test_lookups_in_other_shards_do_not_wait_for_a_busy_shard(
+    app_config: AppConfig, make_store: Callable[..., SessionStore]
+):
+    store = make_store(config=app_config, nb_shards=4)
+    for i in range(40):
+        store.create_if_missing(f'g{i}', _make_session)
+    busy_shard = store._shard_of('g0')
+    elsewhere = next(f'g{i}' for i in range(40) if store._shard_of(f'g{i}') is not busy_shard)
+
+    found: list[GameSession | None] = []
+    with busy_shard.lock:
+        lookup = threading.Thread(target=lambda: found.append(store.get(elsewhere)))
+        lookup.start()
+        lookup.join(timeout=5)
+
+        assert found and found[0] is not None
+
+
+def test_clear_wipes_every_shard_and_notifies_each_removed_session(
+    app_config: AppConfig, make_store: Callable[..., SessionStore]
+):
+    removed: list[str] = []
+    store = make_store(config=app_config, on_remove=removed.append, nb_shards=4)
+    for i in range(10):
+        store.create_if_missing(f'g{i}', _make_session)
+
+    store.clear()
+
+    assert len(store) == 0
+    assert store.items() == []
+    assert sorted(removed) == sorted(f'g{i}' for i in range(10))
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reaper_expires_sessions_on_their_own_ttl_without_the_table_being_full(
+    app_config: AppConfig, make_store: Callable[..., SessionStore]
+):
+    removed: list[str] = []
+    store = make_store(config=app_config, on_remove=removed.append)
+    store.create_if_missing('stale', lambda: _make_session(last_accessed=0))
+    store.create_if_missing('fresh', _make_session)
+
+    assert _wait_for(lambda: store.get('stale') is None)
+    assert store.get('fresh') is not None
+    assert removed == ['stale']
+
+
+def test_reaper_requeues_touched_sessions_and_spares_sessions_in_use(
+    app_config: AppConfig, make_store: Callable[..., SessionStore]
+):
+    store = make_store(config=app_config)
+    store.create_if_missing('touched', lambda: _make_session(last_accessed=int(time.time()) - 1799))
+    store.create_if_missing('in-use', lambda: _make_session(last_accessed=0))
+
+    touched = store.get('touched')
+    assert touched is not None
+    store.touch('touched', touched)
+
+    with store.locked('in-use') as session:
+        assert session is not None
+        time.sleep(1.2)  # 'touched' came due meanwhile, and 'in-use' was retried
+        assert store.get('in-use') is session
+        assert store.get('touched') is touched
+        assert store._expiry_of['touched'] == touched.last_accessed + touched.ttl
+
+    assert _wait_for(lambda: store.get('in-use') is None)
+
+
+def test_close_stops_the_reaper_and_leaves_sessions_alone(session_store: SessionStore):
+    session_store.create_if_missing('g1', _make_session)
+    reaper = session_store._reaper
+    assert reaper is not None and reaper.is_alive()
+
+    session_store.close()
+    session_store.close()
+
+    assert not reaper.is_alive()
+    assert session_store.get('g1') is not None
+    session_store.create_if_missing('g2', lambda: _make_session(last_accessed=0))
+    assert session_store._reaper is reaper  # Not restarted
+
+
+def _lru_config(idle_seconds: int = 60) -> AppConfig:
+    return AppConfig(max_sessions=2, session_eviction_policy='lru', session_lru_idle_seconds=idle_seconds)
+
+
+def test_make_room_is_refused_by_the_ttl_policy(session_store: SessionStore, app_config: AppConfig):
+    for i in range(app_config.max_sessions):
+        session_store.create_if_missing(f'g{i}', lambda: _make_session(last_accessed=int(time.time()) - 600))
+
+    assert not session_store.make_room()
+    assert len(session_store) == app_config.max_sessions
+
+
+def test_make_room_evicts_the_least_recently_used_idle_session(make_store: Callable[..., SessionStore]):
+    removed: list[str] = []
+    store = make_store(config=_lru_config())
+    store._on_remove = removed.append
+    idle_since = int(time.time()) - 600
+    store.create_if_missing('g1', lambda: _make_session(last_accessed=idle_since))
+    store.create_if_missing('g2', lambda: _make_session(last_accessed=idle_since))
+
+    first = store.get('g1')
+    assert first is not None
+    store.touch('g1', first)
+    first.last_accessed = idle_since  # Still idle, but now more recently used than g2
+
+    assert store.make_room()
+    assert store.get('g1') is first
+    assert store.get('g2') is None
+    assert removed == ['g2']
+
+
+def test_make_room_spares_recently_active_and_in_use_sessions(make_store: Callable[..., SessionStore]):
+    store = make_store(config=_lru_config())
+    store.create_if_missing('busy', lambda: _make_session(last_accessed=int(time.time()) - 600))
+    store.create_if_missing('active', _make_session)
+
+    with store.locked('busy'):
+        assert not store.make_room()
+
+    store = make_store(config=_lru_config())
+    store.create_if_missing('active', _make_session)
+    store.create_if_missing('also-active', _make_session)
+
+    assert not store.make_room()
+    assert len(store) == 2
+
+
+def test_init_set_game_admits_new_sessions_by_evicting_idle_ones(vm: ViewModelApp):
+    vm.config.max_sessions = 1
+    vm.config.session_lru_idle_seconds = 0
+    vm.config.session_eviction_policy = 'lru'
+    vm.sessions.close()
+    vm.sessions = SessionStore(config=vm.config, logger=vm.logger, on_remove=vm.ai_scheduler.cancel)
+
+    assert vm.init_set_game(json.dumps({'gameID': 'g1'})).status == 'SUCCESS'
+    assert vm.init_set_game(json.dumps({'gameID': 'g2'})).status == 'SUCCESS'
+
+    assert [game.game_id for game in vm.get_running_games().games] == ['g2']
+
+
+def test_rw_lock_readers_share_and_writers_hold_it_alone():
+    lock = RWLock()
+
+    assert lock.acquire_shared()
+    assert lock.acquire_shared(blocking=False)
+    assert not lock.acquire(blocking=False)
+    lock.release_shared()
+    lock.release_shared()
+
+    assert lock.acquire(blocking=False)
+    assert not lock.acquire_shared(blocking=False)
+    assert not lock.acquire(timeout=0.01)
+    lock.release()
+
+
+def test_rw_lock_waiting_writer_holds_back_new_readers():
+    lock = RWLock()
+    order: list[str] = []
+    assert lock.acquire_shared()
+
+    def write():
+        with lock:
+            order.append('writer')
+
+    def read():
+        with lock.shared():
+            order.append('late reader')
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert _wait_for(lambda: lock._nb_waiting_writers == 1)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.05)
+    assert order == [], 'a reader arriving after a waiting writer must queue behind it'
+
+    lock.release_shared()
+    writer.join(timeout=5)
+    reader.join(timeout=5)
+
+    assert order == ['writer', 'late reader']
+
+
+def test_locked_gives_up_after_the_deadline_and_counts_it(session_store: SessionStore, app_config: AppConfig):
+    app_config.session_lock_timeout_seconds = 0.05
+    session_store.create_if_missing('g1', _make_session)
+    session = session_store.get('g1')
+    assert session is not None
+
+    assert session.lock.acquire()
+    try:
+        with pytest.raises(SessionBusyError), session_store.locked('g1'):
+            pass
+    finally:
+        session.lock.release()
+
+    with session_store.locked('g1'):
+        time.sleep(0.002)
+
+    assert session.lock_stats.timeouts == session_store.lock_stats.timeouts == 1
+    assert session.lock_stats.wait.as_dict()['count'] == 1
+    assert session.lock_stats.hold.as_dict()['buckets']['<=0.01s'] == 1
+    assert session_store.lock_metrics(nb_hottest=1)['sessions']['g1']['timeouts'] == 1
+
+
+def test_latency_histogram_buckets_by_order_of_magnitude():
+    histogram = LatencyHistogram()
+    for seconds in (0.00005, 0.0005, 0.0001, 2.0, 60.0):
+        histogram.record(seconds)
+
+    assert histogram.counts == [2, 1, 0, 0, 0, 1, 1]
+    assert histogram.as_dict()['count'] == 5
@@ -1,9 +1,14 @@
 """Tests for pyset.modules.game.set.Grid."""
 
+import enum
+import json
+import random
+import time
 from itertools import combinations
 
 import pytest
 
+from pyset.modules.game.deck import Deck, KeyedPermutation
 from pyset.modules.game.set import Grid
 
 
@@ -73,3 +78,368 @@ def test_arrange_cards_to_grid_shape():
     rows = grid.arrange_cards_to_grid()
     assert len(rows) * 3 == len(grid.get_displayed_cards())
     assert all(len(row) == 3 for row in rows)
+
+
+def _is_legacy_valid_set(card_set: list[int]) -> bool:
+    # Reference rule, straight off the flavor digits: no feature may be "2 of a kind + 1 odd one"
+    return all(len(set(flavors)) in (1, 3) for flavors in zip(*(str(card) for card in card_set), strict=True))
+
+
+def test_find_all_valid_set_from_matches_brute_force_in_order():
+    grid = Grid()
+    while grid.draw_cards_if_possible() and len(grid.get_displayed_cards()) < 21:
+        pass
+    displayed = grid.get_displayed_cards()
+
+    brute_force = [sorted(combo) for combo in combinations(displayed, 3) if _is_legacy_valid_set(list(combo))]
+
+    grid.update_unique_sets_on_grid()
+    assert grid.get_unique_sets_on_grid() == brute_force
+
+
+def test_find_all_valid_set_from_whole_deck_finds_every_set():
+    grid = Grid(find_all_unique_sets=True)
+    all_time_sets = grid.get_all_time_unique_sets()
+
+    assert len(all_time_sets) == grid.get_size_all_time_unique_sets()
+    assert all(_is_legacy_valid_set(card_set) for card_set in all_time_sets)
+
+
+def test_fold_cards_if_possible_rejects_unknown_cards():
+    grid = Grid()
+    displayed = grid.get_displayed_cards()
+
+    assert grid.fold_cards_if_possible([999, 998, 997]) is False
+    assert grid.get_displayed_cards() == displayed
+
+
+def test_grids_share_one_deck_and_all_time_sets():
+    grid_a = Grid(find_all_unique_sets=True)
+    grid_b = Grid(find_all_unique_sets=True)
+
+    assert grid_a._full_deck is grid_b._full_deck
+    assert grid_a._unique_sets is grid_b._unique_sets
+
+
+def test_on_grid_sets_stay_exact_through_a_whole_game_of_folds_and_draws():
+    grid = Grid()
+
+    while grid.has_unique_sets_on_grid():
+        expected_sets = grid._find_all_valid_set_from(grid._to_indices(grid.get_displayed_cards()))
+        assert grid.count_unique_sets_on_grid() == len(expected_sets)
+        grid.update_unique_sets_on_grid()
+        assert grid._unique_sets_on_grid == expected_sets
+
+        assert grid.fold_cards_if_possible(grid.get_unique_sets_on_grid()[-1]) is True
+        if grid.is_missing_cards_on_grid():
+            grid.draw_cards_if_possible()
+        while not grid.has_unique_sets_on_grid() and grid.draw_cards_if_possible():
+            pass
+        assert grid._slot_of_card == {
+            index: slot for slot, index in enumerate(grid._grid_slots) if index != grid._empty_slot
+        }
+
+    assert grid._find_all_valid_set_from(grid._to_indices(grid.get_displayed_cards())) == []
+
+
+def test_has_and_count_unique_sets_on_grid_without_building_the_list():
+    grid = Grid()
+    while grid.draw_cards_if_possible() and len(grid.get_displayed_cards()) < 21:
+        pass
+    expected_count = len(grid._find_all_valid_set_from(grid._to_indices(grid.get_displayed_cards())))
+
+    assert grid.count_unique_sets_on_grid() == expected_count
+    assert grid.has_unique_sets_on_grid() is (expected_count > 0)
+    assert grid._pending_mask  # neither call had to materialize the set list
+
+
+def test_drawn_cards_take_the_slots_of_the_folded_ones():
+    grid = Grid()
+    while len(grid.get_displayed_cards()) != 12:  # make sure the fold below leaves the grid short
+        grid = Grid()
+    displayed = grid.get_displayed_cards()
+    valid_set = grid.get_unique_sets_on_grid()[0]
+    folded_positions = [displayed.index(card) for card in valid_set]
+
+    assert grid.fold_cards_if_possible(valid_set) is True
+    assert grid.is_missing_cards_on_grid()
+    assert grid.draw_cards_if_possible() is True
+
+    redrawn = grid.get_displayed_cards()
+    assert len(redrawn) == len(displayed)
+    assert all(redrawn[position] not in valid_set for position in folded_positions)
+    assert [card for position, card in enumerate(redrawn) if position not in folded_positions] == [
+        card for position, card in enumerate(displayed) if position not in folded_positions
+    ]
+
+
+def test_are_cards_on_grid_rejects_unplayable_selections():
+    grid = Grid()
+    displayed = grid.get_displayed_cards()
+    valid_set = grid.get_unique_sets_on_grid()[0]
+    off_grid_card = next(card for card in (1111, 1112, 1113, 1121, 1122, 1123) if card not in displayed)
+
+    assert grid.are_cards_on_grid(valid_set) is True
+    assert grid.are_cards_on_grid(valid_set[:2]) is False
+    assert grid.are_cards_on_grid([*valid_set, displayed[0]]) is False
+    assert grid.are_cards_on_grid([valid_set[0], valid_set[0], valid_set[1]]) is False
+    assert grid.are_cards_on_grid([off_grid_card, *valid_set[1:]]) is False
+
+
+def test_fold_cards_if_possible_rejects_duplicate_cards():
+    grid = Grid()
+    card = grid.get_displayed_cards()[0]
+
+    assert grid.fold_cards_if_possible([card, card, card]) is False
+    assert card in grid.get_displayed_cards()
+
+
+class _Flavor2(enum.Enum):
+    A = enum.auto()
+    B = enum.auto()
+
+
+class _Flavor4(enum.Enum):
+    A = enum.auto()
+    B = enum.auto()
+    C = enum.auto()
+    D = enum.auto()
+
+
+def test_iter_all_time_unique_sets_yields_each_set_once():
+    grid = Grid(find_all_unique_sets=True)
+    streamed = list(grid.iter_all_time_unique_sets())
+
+    assert len(streamed) == 1080
+    assert sorted(streamed) == grid.get_all_time_unique_sets()
+
+
+@pytest.mark.parametrize(('features', 'expected_count'), [([_Flavor2] * 3, 28), ([_Flavor4] * 5, 717056)])
+def test_all_time_unique_sets_count_matches_the_enumeration_on_variants(features, expected_count):
+    grid = Grid(features=features)
+
+    assert grid.get_size_all_time_unique_sets() == expected_count
+    if expected_count < 1000:
+        assert sum(1 for _ in grid.iter_all_time_unique_sets()) == expected_count
+
+
+def test_sample_all_time_unique_sets_only_draws_valid_sets():
+    samples = Grid().sample_all_time_unique_sets(200)
+
+    assert len(samples) == 200
+    assert all(_is_legacy_valid_set(card_set) and card_set == sorted(card_set) for card_set in samples)
+
+
+@pytest.mark.parametrize('features', [[_Flavor2] * 3, [_Flavor4] * 5])
+def test_find_sets_on_variants_matches_brute_force(features):
+    deck = Grid(features=features)._full_deck
+    rand = random.Random(0)
+
+    for _ in range(5):
+        indices = rand.sample(range(deck.size), min(deck.size, 30))
+        start = rand.randrange(len(indices))
+        brute_force = [
+            sorted(combo)
+            for combo in combinations(indices, deck.rows)
+            if indices.index(combo[-1]) >= start and deck.is_valid_set(list(combo))
+        ]
+
+        assert sorted(deck.find_sets(indices, start)) == sorted(brute_force)
+        assert deck.count_sets(indices, start) == len(brute_force)
+        assert deck.has_set(indices, start) is bool(brute_force)
+
+
+@pytest.mark.parametrize('rows', [3, 4, 5])
+def test_sample_set_with_builds_a_set_around_the_card(rows):
+    deck = Deck(rows, rows + 1)
+    rand = random.Random(rows)
+
+    for index in rand.sample(range(deck.size), 20):
+        card_set = deck.sample_set_with(index, rand)
+        assert card_set[0] == index
+        assert len(set(card_set)) == rows and deck.is_valid_set(card_set)
+
+
+class _Flavor5(enum.Enum):
+    A = enum.auto()
+    B = enum.auto()
+    C = enum.auto()
+    D = enum.auto()
+    E = enum.auto()
+
+
+class _Flavor6(enum.Enum):
+    A = enum.auto()
+    B = enum.auto()
+    C = enum.auto()
+    D = enum.auto()
+    E = enum.auto()
+    F = enum.auto()
+
+
+@pytest.mark.parametrize('features', [[_Flavor4] * 5, [_Flavor5] * 6, [_Flavor6] * 7])
+def test_variant_grids_deal_and_play_within_the_latency_budget(features):
+    rows = len(features[0])
+    tic = time.perf_counter()
+    _ = Deck(rows, rows + 1)
+    assert time.perf_counter() - tic < 0.3
+
+    for seed in range(3):
+        tic = time.perf_counter()
+        grid = Grid(features=features, rand=random.Random(seed))
+        assert grid.get_unique_sets_on_grid()
+        assert time.perf_counter() - tic < 0.3
+
+        for _ in range(3):
+            tic = time.perf_counter()
+            assert grid.fold_cards_if_possible(grid.get_unique_sets_on_grid()[0])
+            _ = grid.is_missing_cards_on_grid() and grid.draw_cards_if_possible()
+            while not grid.has_unique_sets_on_grid() and grid.draw_cards_if_possible():
+                pass
+            assert grid.get_unique_sets_on_grid()
+            assert time.perf_counter() - tic < 0.3
+            assert len(grid.get_displayed_cards()) <= rows * (rows + 2)
+
+
+def test_variant_grids_stop_growing_once_a_set_is_stacked_on_the_pile():
+    grid = Grid(features=[_Flavor4] * 5, rand=random.Random(0))
+
+    for _ in range(100):
+        assert len(grid.get_displayed_cards()) <= 24
+        assert grid.fold_cards_if_possible(grid.get_unique_sets_on_grid()[0])
+        _ = grid.is_missing_cards_on_grid() and grid.draw_cards_if_possible()
+        while not grid.has_unique_sets_on_grid() and grid.draw_cards_if_possible():
+            pass
+
+
+def test_lazy_deck_matches_the_materialized_one():
+    deck, lazy_deck = Deck(3, 4), Deck(3, 4, lazy=True)
+
+    assert not deck.lazy and lazy_deck.lazy and not lazy_deck.cards
+    assert [lazy_deck.card_of(index) for index in range(lazy_deck.size)] == list(deck.cards)
+    assert [lazy_deck.index_of(card) for card in deck.cards] == list(range(deck.size))
+    assert [lazy_deck.index_of(card) for card in (0, 111, 4111, 1101, 11111)] == [None] * 5
+    assert lazy_deck.find_sets(range(deck.size)) == deck.find_sets(range(deck.size))
+
+
+@pytest.mark.parametrize('size', [1, 2, 81, 1000])
+def test_keyed_permutation_draws_every_index_once(size):
+    permutation = KeyedPermutation(size, random.Random(size))
+
+    assert len(permutation) == size
+    assert sorted(permutation[position] for position in range(size)) == list(range(size))
+    with pytest.raises(IndexError):
+        _ = permutation[size]
+
+
+@pytest.mark.parametrize('size', [2, 81, 1000])
+def test_keyed_permutation_finds_and_swaps_values_like_a_list(size):
+    permutation = KeyedPermutation(size, random.Random(size))
+    listed = [permutation[position] for position in range(size)]
+
+    assert [permutation.index(value) for value in listed] == list(range(size))
+    permutation[0], permutation[size - 1] = permutation[size - 1], permutation[0]
+    listed[0], listed[size - 1] = listed[size - 1], listed[0]
+
+    assert [permutation[position] for position in range(size)] == listed
+    assert [permutation.index(value) for value in listed] == list(range(size))
+    with pytest.raises(ValueError):
+        _ = permutation.index(listed[0], 1)
+    with pytest.raises(ValueError):
+        _ = permutation.index(size)
+
+    restored = KeyedPermutation.from_keys(size, permutation.keys, permutation.moves)
+    assert [restored[position] for position in range(size)] == listed
+
+
+def test_huge_deck_is_lazy_and_decodes_cards_on_demand():
+    deck = Deck(9, 10)
+    permutation = KeyedPermutation(deck.size, random.Random(0))
+
+    assert deck.lazy
+    for position in range(100):
+        card = deck.card_of(permutation[position])
+        assert 1111111111 <= card <= 9999999999 and '0' not in str(card)
+        assert deck.index_of(card) == permutation[position]
+
+
+def test_grid_plays_a_whole_game_on_a_lazy_deck(monkeypatch):
+    monkeypatch.setattr(
+        'pyset.modules.game.set.get_deck', lambda features: Deck(len(features[0]), len(features), lazy=True)
+    )
+    grid = Grid()
+    seen = set(grid.get_displayed_cards())
+
+    assert isinstance(grid._shuffled_cards_id_in_deck, KeyedPermutation)
+    while grid.has_unique_sets_on_grid():
+        assert grid.fold_cards_if_possible(grid.get_unique_sets_on_grid()[0])
+        while (grid.is_missing_cards_on_grid() or not grid.has_unique_sets_on_grid()) and grid.draw_cards_if_possible():
+            pass
+        seen.update(grid.get_displayed_cards())
+
+    assert grid.get_number_cards_left_in_deck() == 0
+    assert len(seen) == 81
+
+
+class _Flavor9(enum.Enum):
+    A = enum.auto()
+    B = enum.auto()
+    C = enum.auto()
+    D = enum.auto()
+    E = enum.auto()
+    F = enum.auto()
+    G = enum.auto()
+    H = enum.auto()
+    I = enum.auto()  # noqa: E741
+
+
+def test_grid_deals_and_plays_a_real_lazy_variant_in_time():
+    tic = time.perf_counter()
+    grid = Grid(features=[_Flavor9] * 10, rand=random.Random(0))
+    hints = grid.get_unique_sets_on_grid()
+    assert time.perf_counter() - tic < 1.0
+
+    assert isinstance(grid._shuffled_cards_id_in_deck, KeyedPermutation)
+    assert hints and len(grid.get_displayed_cards()) <= 99
+    assert grid._shuffled_cards_id_in_deck.moves  # 90 cards without a set: one was stacked
+
+    loaded = Grid.from_state(json.loads(json.dumps(grid.get_state())))
+    for _ in range(3):
+        tic = time.perf_counter()
+        for playing in (grid, loaded):
+            assert playing.fold_cards_if_possible(playing.get_unique_sets_on_grid()[0])
+            while not playing.has_unique_sets_on_grid() and playing.draw_cards_if_possible():
+                pass
+        assert time.perf_counter() - tic < 1.0
+        assert loaded.get_displayed_cards() == grid.get_displayed_cards()
+
+
+def test_grid_state_round_trips_through_json_and_keeps_its_generator(monkeypatch):
+    grid = Grid(rand=random.Random(7))
+    assert grid.fold_cards_if_possible(grid.get_unique_sets_on_grid()[0])
+    _ = grid.draw_cards_if_possible()
+
+    loaded = Grid.from_state(json.loads(json.dumps(grid.get_state())))
+
+    assert loaded.get_state() == grid.get_state()
+    assert loaded._slot_of_card == grid._slot_of_card
+    assert loaded.get_unique_sets_on_grid() == grid.get_unique_sets_on_grid()
+    assert loaded._features == grid._features and loaded._full_deck is grid._full_deck
+    assert loaded.sample_all_time_unique_sets(5) == grid.sample_all_time_unique_sets(5)
+
+    monkeypatch.setattr(
+        'pyset.modules.game.set.get_deck', lambda features: Deck(len(features[0]), len(features), lazy=True)
+    )
+    lazy_grid = Grid()
+    lazy_loaded = Grid.from_state(lazy_grid.get_state())
+    assert lazy_loaded._shuffled_cards_id_in_deck.keys == lazy_grid._shuffled_cards_id_in_deck.keys
+    assert lazy_loaded.draw_cards_if_possible() and lazy_grid.draw_cards_if_possible()
+    assert lazy_loaded.get_displayed_cards() == lazy_grid.get_displayed_cards()
+
+
+def test_grid_state_rejects_cards_that_do_not_fit_its_features():
+    state = Grid().get_state()
+    state['deck'] = state['deck'][:-1]
+
+    with pytest.raises(ValueError):
+        _ = Grid.from_state(state)
@@ -0,0 +1,28 @@
+"""Tests for pyset.modules.game.simulator."""
+
+import dataclasses
+
+from pyset.modules.game.simulator import TimedGrid, play_game, simulate
+
+
+def _without_timings(record) -> dict:
+    return {key: value for key, value in dataclasses.asdict(record).items() if key != 'grid_time'}
+
+
+def test_play_game_plays_a_whole_game():
+    record = play_game(seed=1, game_index=0)
+
+    assert record.sets_found * 3 + record.cards_left_on_grid == 81
+    assert record.cards_left_on_grid <= 20  # 20 cards always hold a set
+    assert record.max_cards_on_grid >= 12
+    assert record.virtual_duration >= 3.0 * record.sets_found
+    assert set(record.grid_time) == set(TimedGrid.timed_methods)
+
+
+def test_simulate_streams_reproducible_records_in_game_order():
+    records = list(simulate(6, seed=7, nb_workers=2, batch_size=2))
+
+    assert [record.game_index for record in records] == list(range(6))
+    assert [_without_timings(record) for record in records] == [
+        _without_timings(play_game(seed=7, game_index=game_index)) for game_index in range(6)
+    ]
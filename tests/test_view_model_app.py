@@ -1,6 +1,10 @@
 """Tests for pyset.view_model_app.ViewModelApp, called directly (no Flask request context)."""
 
+import dataclasses
 import json
+import threading
+
+import pytest
 
 from pyset.view_model_app import ViewModelApp
 
@@ -70,6 +74,18 @@ def test_submit_set_cards_not_found(vm: ViewModelApp):
     assert resp.error == 'CARDS_NOT_FOUND'
 
 
+def test_submit_set_rejects_duplicate_cards_before_validation(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    vm.add_player(json.dumps({'gameID': 'g1', 'name': 'alice'}))
+    card = vm.get_game(json.dumps({'gameID': 'g1'})).grid[0][0]
+
+    resp = vm.submit_set(json.dumps({'gameID': 'g1', 'playerName': 'alice', 'set': [card, card, card]}))
+
+    assert resp.status == 'ERROR'
+    assert resp.error == 'CARDS_NOT_FOUND'
+    assert vm.get_players_infos(json.dumps({'gameID': 'g1'})).players_stats[0].calls == 0
+
+
 def test_delete_running_games_requires_secret(vm: ViewModelApp):
     resp = vm.delete_running_games(json.dumps({}))
     assert resp.error == 'PARAMS_ERROR'
@@ -122,3 +138,83 @@ def test_wrong_game_secret_is_rejected(vm: ViewModelApp):
 
     assert resp.status == 'ERROR'
     assert resp.error == 'INVALID_SECRET'
+
+
+def test_get_hints_serves_the_sets_listed_when_the_game_changed(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    session = vm.sessions.get('g1')
+    assert session is not None
+    grid = session.game.grid
+    assert not grid._pending_mask  # Sets listed by the writer that published the game
+    locked_before = sum(session.lock_stats.wait.counts)
+
+    first = vm.get_hints(json.dumps({'gameID': 'g1'}))
+    second = vm.get_hints(json.dumps({'gameID': 'g1'}))
+
+    assert first.status == second.status == 'SUCCESS'
+    assert first.sets == second.sets == grid.get_unique_sets_on_grid()
+    assert sum(session.lock_stats.wait.counts) == locked_before  # Served without taking the session lock
+
+
+def test_get_hints_of_a_missing_game(vm: ViewModelApp):
+    resp = vm.get_hints(json.dumps({'gameID': 'nope'}))
+
+    assert resp.error == 'GAME_ID_DOES_NOT_EXIST'
+
+
+def test_mutations_publish_a_new_snapshot_that_reads_serve(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    session = vm.sessions.get('g1')
+    assert session is not None
+    first = session.snapshot
+
+    vm.add_player(json.dumps({'gameID': 'g1', 'name': 'alice'}))
+    vm.change_game_state(json.dumps({'gameID': 'g1', 'enablePause': False}))
+
+    assert session.snapshot.version == first.version + 2
+    assert first.players_stats == ()
+    assert vm.get_players_infos(json.dumps({'gameID': 'g1'})).players_stats[0].name == 'alice'
+    assert vm.get_game_state(json.dumps({'gameID': 'g1'})).game_state == session.game.get_game_state()
+    assert vm.get_game(json.dumps({'gameID': 'g1'})).grid == session.game.grid.arrange_cards_to_grid()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        session.snapshot.game_state = 'ENDED'  # type: ignore[misc]
+
+
+def test_reads_do_not_wait_for_a_writer_holding_the_session(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    responses = []
+
+    with vm.sessions.locked('g1'):
+        reader = threading.Thread(target=lambda: responses.append(vm.get_game(json.dumps({'gameID': 'g1'}))))
+        reader.start()
+        reader.join(timeout=5)
+
+        assert responses and responses[0].status == 'SUCCESS'
+
+
+def test_writes_to_a_busy_session_give_up_with_session_busy(vm: ViewModelApp):
+    vm.config.session_lock_timeout_seconds = 0.01
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    responses = []
+
+    with vm.sessions.locked('g1'):
+        writer = threading.Thread(
+            target=lambda: responses.append(vm.add_player(json.dumps({'gameID': 'g1', 'name': 'alice'})))
+        )
+        writer.start()
+        writer.join(timeout=5)
+
+    assert responses[0].error == 'SESSION_BUSY'
+    assert vm.get_players_infos(json.dumps({'gameID': 'g1'})).players_stats == []
+
+
+def test_get_lock_metrics_requires_the_admin_secret(vm: ViewModelApp):
+    vm.init_set_game(json.dumps({'gameID': 'g1'}))
+    vm.add_player(json.dumps({'gameID': 'g1', 'name': 'alice'}))
+
+    assert vm.get_lock_metrics(json.dumps({'secret': 'wrong'})).error == 'NOT_ALLOWED'
+
+    resp = vm.get_lock_metrics(json.dumps({'secret': 'top-secret'}))
+    assert resp.status == 'SUCCESS'
+    assert resp.metrics['global']['wait']['count'] == 1
+    assert resp.metrics['sessions']['g1']['timeouts'] == 0